@@ -1,5 +1,54 @@
+from ._async_publisher import AsyncTQDMProgressPublisher
+from ._batching import BatchingSender
+from ._broadcast import ProgressBroadcastServer, format_server_sent_events
+from ._codecs import BinaryCodec, JSONCodec
+from ._deltas import ProgressDeltaDecoder
+from ._dispatcher import ProgressDispatcher, get_shared_dispatcher
 from ._handler import TQDMProgressHandler
+from ._http import HTTPProgressForwarder, announce_progress_batch
+from ._instrumentation import ProgressInstrumentation
+from ._journal import ProgressJournal, ProgressJournalReader
+from ._listeners import AsyncListener, ConflatingListener
+from ._messages import EncodedMessage, ProgressMessage
+from ._processes import ProcessProgressReceiver, ProcessProgressSender
 from ._publisher import TQDMProgressPublisher
+from ._relay import ProgressRelay, ProgressRelayServer
+from ._shared_memory import (
+    SharedMemoryProgressPublisher,
+    SharedProgressBoard,
+    SharedProgressSlot,
+)
+from ._state_store import ProgressStateStore
 from ._subscriber import TQDMProgressSubscriber
 
-__all__ = ["TQDMProgressPublisher", "TQDMProgressSubscriber", "TQDMProgressHandler"]
+__all__ = [
+    "TQDMProgressPublisher",
+    "TQDMProgressSubscriber",
+    "AsyncTQDMProgressPublisher",
+    "TQDMProgressHandler",
+    "ProgressDeltaDecoder",
+    "ConflatingListener",
+    "AsyncListener",
+    "ProgressDispatcher",
+    "get_shared_dispatcher",
+    "ProcessProgressReceiver",
+    "ProcessProgressSender",
+    "SharedProgressBoard",
+    "SharedProgressSlot",
+    "SharedMemoryProgressPublisher",
+    "HTTPProgressForwarder",
+    "announce_progress_batch",
+    "BatchingSender",
+    "JSONCodec",
+    "BinaryCodec",
+    "ProgressBroadcastServer",
+    "format_server_sent_events",
+    "EncodedMessage",
+    "ProgressMessage",
+    "ProgressInstrumentation",
+    "ProgressJournal",
+    "ProgressJournalReader",
+    "ProgressRelayServer",
+    "ProgressRelay",
+    "ProgressStateStore",
+]
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+from typing import Any, Callable, Dict, Optional, Set
+
+from tqdm.asyncio import tqdm_asyncio
+
+from ._publisher import TQDMProgressPublisher
+
+_logger = logging.getLogger(__name__)
+
+
+class _CoroutineCallback:
+    """
+    A synchronous callback that schedules a coroutine callback on an event loop.
+
+    At most one call of the coroutine callback runs at a time; the publications made in the meantime are merged into a
+    single pending `format_dict`, which is passed to the next call. The memory used for a slow callback is therefore
+    bounded, whatever the rate of the updates.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Dict[str, Any]], Any],
+        loop: asyncio.AbstractEventLoop,
+        semaphore: asyncio.Semaphore,
+        tasks: Set[asyncio.Task],
+    ):
+        self.callback = callback
+        self.loop = loop
+        self.semaphore = semaphore
+        self.tasks = tasks
+        self.active = True
+
+        self._task: Optional[asyncio.Task] = None
+        self._pending_format_dict: Optional[Dict[str, Any]] = None
+
+    def __call__(self, format_dict: Dict[str, Any]) -> None:
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self.loop:
+            self._schedule(format_dict=format_dict)
+        else:  # Published from another thread, e.g., by a dispatcher
+            self.loop.call_soon_threadsafe(self._schedule, format_dict)
+
+    def _schedule(self, format_dict: Dict[str, Any]) -> None:
+        if self._task is None:
+            self._task = self.loop.create_task(self._run(format_dict=format_dict))
+            self.tasks.add(self._task)
+        elif self._pending_format_dict is None:
+            self._pending_format_dict = format_dict
+        else:  # Merging rather than replacing keeps the entries of deltas
+            self._pending_format_dict = dict(self._pending_format_dict, **format_dict)
+
+    async def _run(self, format_dict: Dict[str, Any]) -> None:
+        try:
+            while format_dict is not None and self.active:
+                async with self.semaphore:
+                    try:
+                        await self.callback(format_dict)
+                    except Exception:
+                        _logger.exception("A coroutine callback of a progress bar raised an exception.")
+                format_dict, self._pending_format_dict = self._pending_format_dict, None
+        finally:
+            self.tasks.discard(self._task)
+            self._task = None
+
+
+class AsyncTQDMProgressPublisher(TQDMProgressPublisher, tqdm_asyncio):
+    """
+    A `TQDMProgressPublisher` built on `tqdm.asyncio`, which supports `async for` and the `as_completed` and `gather`
+    class methods, and whose callbacks may be coroutine functions.
+
+    Coroutine callbacks are scheduled as tasks on the event loop rather than awaited inside `update`, so neither the
+    loop nor the progress is ever blocked by a slow callback. At most `max_concurrent_callbacks` of them run at once,
+    and while a callback runs, the following publications are merged into one, so that each callback always receives
+    the newest state. Regular callbacks are still called inside `update`.
+
+    Examples
+    --------
+    >>> async def send_progress(format_dict):
+    >>>     await websocket.send(json.dumps(format_dict))
+    >>>
+    >>> results = await AsyncTQDMProgressPublisher.gather(*tasks, on_progress_update=send_progress)
+    """
+
+    def __init__(
+        self,
+        *tqdm_args,
+        on_progress_update: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        max_concurrent_callbacks: int = 10,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        **tqdm_kwargs,
+    ):
+        """
+        Parameters
+        ----------
+        on_progress_update : callable, optional
+            A callback (or coroutine function) to subscribe immediately, e.g., when the progress bar is created by
+            `as_completed` or `gather`.
+        max_concurrent_callbacks : int, default: 10
+            The maximum number of coroutine callbacks of this progress bar running at once.
+        loop : asyncio.AbstractEventLoop, optional
+            The event loop running the coroutine callbacks. Defaults to the running event loop when the first
+            coroutine callback is subscribed.
+        """
+        self.loop = loop
+        self.max_concurrent_callbacks = max_concurrent_callbacks
+        self._callback_semaphore: Optional[asyncio.Semaphore] = None
+        self._callback_tasks: Set[asyncio.Task] = set()
+
+        super().__init__(*tqdm_args, **tqdm_kwargs)
+
+        if on_progress_update is not None:
+            self.subscribe(on_progress_update)
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], Any]) -> str:
+        """
+        Subscribe to updates from the progress bar; see `TQDMProgressPublisher.subscribe`.
+
+        If the callback is a coroutine function, each call is scheduled on the event loop of the progress bar.
+        """
+        if asyncio.iscoroutinefunction(callback):
+            if self.loop is None:
+                self.loop = asyncio.get_running_loop()
+            if self._callback_semaphore is None:
+                self._callback_semaphore = asyncio.Semaphore(self.max_concurrent_callbacks)
+
+            callback = _CoroutineCallback(
+                callback=callback, loop=self.loop, semaphore=self._callback_semaphore, tasks=self._callback_tasks
+            )
+
+        return super().subscribe(callback)
+
+    def unsubscribe(self, callback_id: str) -> bool:
+        callback = self.callbacks.get(callback_id)
+        if isinstance(callback, _CoroutineCallback):
+            callback.active = False  # Skip its pending call, if any
+        return super().unsubscribe(callback_id)
+
+    async def wait_for_callbacks(self) -> None:
+        """Wait until the coroutine callbacks have received the latest publication, e.g., after closing the bar."""
+        while self._callback_tasks:
+            await asyncio.gather(*tuple(self._callback_tasks), return_exceptions=True)
@@ -0,0 +1,210 @@
+import abc
+import logging
+import os
+import threading
+import time
+from multiprocessing.util import Finalize
+from typing import Any, Dict, List, Optional, Tuple
+
+from ._subscriber import TQDMProgressSubscriber
+
+_logger = logging.getLogger(__name__)
+
+# The senders reconstructed in this process, so that all copies of a sender share a single thread and connection
+_senders: Dict[Tuple[Any, ...], "BatchingSender"] = dict()
+_senders_lock = threading.Lock()
+
+
+def _reconstruct_sender(sender_class: type, parameters: Dict[str, Any]) -> "BatchingSender":
+    key = (os.getpid(), sender_class, tuple(sorted(parameters.items())))
+    with _senders_lock:
+        sender = _senders.get(key)
+        if sender is None:
+            sender = _senders[key] = sender_class(**parameters)
+    return sender
+
+
+class BatchingSender(abc.ABC):
+    """
+    The base class of the senders that forward progress messages to another process in batches.
+
+    Messages are collected and handed to `_send_batch` by a background thread whenever `max_batch_size` messages are
+    waiting or the oldest waiting message is `max_batch_interval` seconds old.
+
+    Senders are picklable, so they can be passed to worker processes; all the copies of a sender within a process are
+    the same object, which sends its remaining messages when the process exits.
+    """
+
+    def __init__(self, max_batch_size: int = 100, max_batch_interval: float = 0.1, maxsize: int = 10_000):
+        """
+        Parameters
+        ----------
+        max_batch_size : int, default: 100
+            The number of waiting messages after which a batch is sent.
+        max_batch_interval : float, default: 0.1
+            The age, in seconds, of the oldest waiting message after which a batch is sent.
+        maxsize : int, default: 10,000
+            The maximum number of waiting messages, after which the oldest ones are dropped.
+        """
+        self.max_batch_size = max_batch_size
+        self.max_batch_interval = max_batch_interval
+        self.maxsize = maxsize
+
+        self.dropped_messages = 0
+
+        self._messages: List[Dict[Any, Any]] = list()
+        self._oldest_message_time = 0.0
+        self._flush_requested = False
+        self._sending = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def _get_parameters(self) -> Dict[str, Any]:
+        """Return the arguments that recreate this sender in another process."""
+        return dict(
+            max_batch_size=self.max_batch_size, max_batch_interval=self.max_batch_interval, maxsize=self.maxsize
+        )
+
+    def __reduce__(self):
+        return _reconstruct_sender, (type(self), self._get_parameters())
+
+    def __call__(self, message: Dict[Any, Any]) -> None:
+        """
+        Add a message to the next batch.
+
+        Once the sender is closed (e.g., during the shutdown of the interpreter), the message is dropped and counted in
+        `dropped_messages` rather than interrupting the progress bar that sent it.
+        """
+        with self._condition:
+            if self._closed:
+                self.dropped_messages += 1
+                _logger.debug("Dropped a progress message sent to a closed %s.", type(self).__name__)
+                return
+
+            if not self._messages:
+                self._oldest_message_time = time.time()
+            elif len(self._messages) >= self.maxsize:
+                del self._messages[0]
+                self.dropped_messages += 1
+            self._messages.append(message)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+                self._thread.start()
+                Finalize(self, self.close, exitpriority=10)
+            if len(self._messages) >= self.max_batch_size:
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send the waiting messages now, and wait until they are sent.
+
+        Returns
+        -------
+        success : bool
+            True if the messages were handled before the timeout expired, False otherwise.
+        """
+        if threading.current_thread() is self._thread:
+            return False
+
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: not self._messages and not self._sending, timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Send the waiting messages, then stop the background thread."""
+        success = self.flush(timeout=timeout)
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+
+        return success
+
+    def create_progress_subscriber(
+        self, *tqdm_args, additional_metadata: dict = dict(), flush_timeout: float = 5.0, **tqdm_kwargs
+    ) -> TQDMProgressSubscriber:
+        """
+        Create a progress subscriber whose messages are sent by this sender.
+
+        This mirrors `TQDMProgressHandler.create_progress_subscriber`; the messages contain the `progress_bar_id`, the
+        `format_dict` and any `additional_metadata`. The waiting messages are sent when the progress bar is closed,
+        which waits up to `flush_timeout` seconds for them (e.g., while a forwarder retries); any message still
+        waiting then is left to the background thread.
+        """
+
+        def on_progress_update(progress_update: dict):
+            self(message=dict(**progress_update, **additional_metadata))
+
+        return _FlushingProgressSubscriber(
+            *tqdm_args, sender=self, flush_timeout=flush_timeout, on_progress_update=on_progress_update, **tqdm_kwargs
+        )
+
+    @abc.abstractmethod
+    def _send_batch(self, batch: List[Dict[Any, Any]]) -> None:
+        """Send a batch of messages; called by the background thread only."""
+
+    def _close_connection(self) -> None:
+        """Close the connection of the sender, if any; also called once the background thread stops."""
+
+    def _is_batch_due(self) -> bool:
+        if not self._messages:
+            return False
+
+        return (
+            self._flush_requested
+            or len(self._messages) >= self.max_batch_size
+            or time.time() - self._oldest_message_time >= self.max_batch_interval
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._is_batch_due():
+                    if self._closed:
+                        self._close_connection()
+                        return
+
+                    timeout = None
+                    if self._messages:
+                        timeout = max(0.0, self._oldest_message_time + self.max_batch_interval - time.time())
+                    self._condition.wait(timeout=timeout)
+
+                batch = self._messages[: self.max_batch_size]
+                del self._messages[: self.max_batch_size]
+                if self._messages:
+                    self._oldest_message_time = time.time()
+                else:
+                    self._flush_requested = False
+                self._sending = True
+
+            try:
+                self._send_batch(batch=batch)
+            finally:
+                with self._condition:
+                    self._sending = False
+                    self._condition.notify_all()
+
+
+class _FlushingProgressSubscriber(TQDMProgressSubscriber):
+    """A progress subscriber that sends the waiting messages of its sender when it is closed."""
+
+    def __init__(self, *tqdm_args, sender: BatchingSender, flush_timeout: float, **tqdm_kwargs):
+        self.sender = sender
+        self.flush_timeout = flush_timeout
+        super().__init__(*tqdm_args, **tqdm_kwargs)
+
+    def close(self) -> None:
+        super().close()
+        sender = getattr(self, "sender", None)  # Not set if the constructor raised early
+        if sender is not None and not sender.flush(timeout=self.flush_timeout):
+            _logger.warning(
+                "The progress messages of a closed progress bar were not sent within %s seconds; "
+                "they are left to the background thread of the %s.",
+                self.flush_timeout,
+                type(sender).__name__,
+            )
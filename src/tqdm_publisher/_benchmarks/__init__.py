@@ -0,0 +1,3 @@
+from ._suite import run_benchmarks
+
+__all__ = ["run_benchmarks"]
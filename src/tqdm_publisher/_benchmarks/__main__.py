@@ -0,0 +1,6 @@
+import sys
+
+from ._suite import _command_line_interface
+
+if __name__ == "__main__":
+    _command_line_interface(arguments=sys.argv[1:])
@@ -0,0 +1,279 @@
+"""Benchmarks of the overhead of the publishers and the throughput of the handler, reported as JSON."""
+
+import asyncio
+import datetime
+import gc
+import io
+import json
+import platform
+import queue
+import statistics
+import threading
+import time
+import tracemalloc
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Callable, Dict, List, Optional
+
+from tqdm import tqdm as base_tqdm
+
+from tqdm_publisher import TQDMProgressHandler, TQDMProgressPublisher
+
+
+def _get_version(package_name: str) -> Optional[str]:
+    try:
+        return version(package_name)
+    except PackageNotFoundError:
+        return None
+
+
+def _time_per_iteration(run: Callable[[], None], number_of_iterations: int, number_of_repeats: int) -> float:
+    """Return the best time of the repeats, after a warm-up run, in nanoseconds per iteration."""
+    run()
+
+    timings = list()
+    for _ in range(number_of_repeats):
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings) / number_of_iterations * 1e9
+
+
+def benchmark_publisher_overhead(
+    number_of_iterations: int = 100_000,
+    numbers_of_callbacks: List[int] = (0, 1, 10),
+    number_of_repeats: int = 5,
+) -> Dict[str, Any]:
+    """
+    Measure the time per iteration of a `TQDMProgressPublisher` against a plain `tqdm`, for several callbacks.
+
+    Both the iteration over the progress bar (where tqdm only calls `update` at its display interval) and manual
+    calls to `update` (which publish on each call) are measured, with no-op callbacks and output to a buffer.
+    """
+
+    def iterate(progress_bar_class, number_of_callbacks):
+        def run():
+            progress_bar = progress_bar_class(range(number_of_iterations), file=io.StringIO())
+            for _ in range(number_of_callbacks):
+                progress_bar.subscribe(lambda format_dict: None)
+            for _ in progress_bar:
+                pass
+
+        return run
+
+    def update(progress_bar_class, number_of_callbacks):
+        def run():
+            progress_bar = progress_bar_class(total=number_of_iterations, file=io.StringIO())
+            for _ in range(number_of_callbacks):
+                progress_bar.subscribe(lambda format_dict: None)
+            for _ in range(number_of_iterations):
+                progress_bar.update(1)
+            progress_bar.close()
+
+        return run
+
+    results = dict()
+    for mode, make_run in (("iterate", iterate), ("update", update)):
+        baseline = _time_per_iteration(
+            run=make_run(base_tqdm, 0), number_of_iterations=number_of_iterations, number_of_repeats=number_of_repeats
+        )
+        results[mode] = dict(tqdm_nanoseconds_per_iteration=baseline, publisher=list())
+        for number_of_callbacks in numbers_of_callbacks:
+            nanoseconds_per_iteration = _time_per_iteration(
+                run=make_run(TQDMProgressPublisher, number_of_callbacks),
+                number_of_iterations=number_of_iterations,
+                number_of_repeats=number_of_repeats,
+            )
+            results[mode]["publisher"].append(
+                dict(
+                    number_of_callbacks=number_of_callbacks,
+                    nanoseconds_per_iteration=nanoseconds_per_iteration,
+                    overhead_nanoseconds_per_iteration=nanoseconds_per_iteration - baseline,
+                )
+            )
+
+    return dict(number_of_iterations=number_of_iterations, **results)
+
+
+def benchmark_announce_throughput(
+    numbers_of_listeners: List[int] = (1, 10, 100, 1000),
+    number_of_messages: int = 1000,
+    number_of_repeats: int = 3,
+) -> List[Dict[str, Any]]:
+    """Measure the number of messages per second that `TQDMProgressHandler.announce` delivers to its listeners."""
+    message = dict(progress_bar_id="00000000-0000-0000-0000-000000000000", format_dict=dict(n=1, total=10))
+
+    results = list()
+    for queue_class in (queue.Queue, asyncio.Queue):
+        for number_of_listeners in numbers_of_listeners:
+            handler = TQDMProgressHandler(queue_class)
+            listeners = [handler.listen() for _ in range(number_of_listeners)]
+
+            def drain():
+                for listener in listeners:
+                    while not listener.empty():
+                        listener.get_nowait()
+
+            timings = list()
+            for _ in range(number_of_repeats):
+                gc.collect()
+                start = time.perf_counter()
+                for _ in range(number_of_messages):
+                    handler.announce(message=message)
+                timings.append(time.perf_counter() - start)
+                drain()
+
+            best_timing = min(timings)
+            results.append(
+                dict(
+                    queue_class=f"{queue_class.__module__}.{queue_class.__qualname__}",
+                    number_of_listeners=number_of_listeners,
+                    announcements_per_second=number_of_messages / best_timing,
+                    deliveries_per_second=number_of_messages * number_of_listeners / best_timing,
+                )
+            )
+
+    return results
+
+
+def benchmark_slow_consumer_memory(number_of_messages: int = 100_000, maxsize: int = 1000) -> List[Dict[str, Any]]:
+    """Measure the memory held by a listener whose consumer never reads, unbounded and bounded to `maxsize`."""
+    results = list()
+    for listener_maxsize in (0, maxsize):
+        handler = TQDMProgressHandler()
+        listener = handler.listen(maxsize=listener_maxsize)
+
+        gc.collect()
+        tracemalloc.start()
+        start_size, _ = tracemalloc.get_traced_memory()
+        for n in range(number_of_messages):
+            # A distinct message for each update, like the ones of the subscribers
+            handler.announce(message=dict(progress_bar_id="a", format_dict=dict(n=n, total=number_of_messages)))
+        end_size, peak_size = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append(
+            dict(
+                maxsize=listener_maxsize,
+                number_of_messages=number_of_messages,
+                retained_messages=listener.qsize(),
+                dropped_messages=handler.get_dropped_message_count(listener=listener),
+                retained_bytes=end_size - start_size,
+                peak_bytes=peak_size - start_size,
+            )
+        )
+        handler.unsubscribe(listener=listener)
+
+    return results
+
+
+def _summarize_latencies(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latency * 1e6 for latency in latencies)
+    quantiles = statistics.quantiles(latencies, n=100)
+    return dict(
+        number_of_samples=len(latencies),
+        p50_microseconds=quantiles[49],
+        p90_microseconds=quantiles[89],
+        p99_microseconds=quantiles[98],
+        max_microseconds=latencies[-1],
+    )
+
+
+def benchmark_update_latency(number_of_updates: int = 2000, interval: float = 0.0005) -> Dict[str, Any]:
+    """
+    Measure the time from a call to `update` on a progress bar of the handler to the receipt of its message.
+
+    The updates are made on one thread and consumed by a thread blocked on a `queue.Queue` listener, and by an
+    asyncio event loop iterating over an `AsyncListener`.
+    """
+    handler = TQDMProgressHandler()
+    update_times = [0.0] * (number_of_updates + 1)
+    thread_latencies, asyncio_latencies = list(), list()
+
+    listener = handler.listen()
+
+    def consume_in_thread():
+        while len(thread_latencies) < number_of_updates:
+            message = listener.get()
+            n = message["format_dict"]["n"]
+            if n > 0:
+                thread_latencies.append(time.perf_counter() - update_times[n])
+
+    loop = asyncio.new_event_loop()
+    asynchronous_listener = handler.alisten(loop=loop)
+
+    async def consume_in_event_loop():
+        async for message in asynchronous_listener:
+            n = message["format_dict"]["n"]
+            if n > 0:
+                asyncio_latencies.append(time.perf_counter() - update_times[n])
+            if len(asyncio_latencies) == number_of_updates:
+                return
+
+    consumer_thread = threading.Thread(target=consume_in_thread)
+    event_loop_thread = threading.Thread(target=loop.run_until_complete, args=(consume_in_event_loop(),))
+    consumer_thread.start()
+    event_loop_thread.start()
+
+    progress_bar = handler.create_progress_subscriber(total=number_of_updates, file=io.StringIO())
+    for n in range(1, number_of_updates + 1):
+        update_times[n] = time.perf_counter()
+        progress_bar.update(1)
+        time.sleep(interval)  # Let the consumers catch up, to measure the latency rather than the queuing
+    progress_bar.close()
+
+    consumer_thread.join()
+    event_loop_thread.join()
+    loop.close()
+    handler.unsubscribe(listener=listener)
+    handler.unsubscribe(listener=asynchronous_listener)
+
+    return dict(thread=_summarize_latencies(thread_latencies), asyncio=_summarize_latencies(asyncio_latencies))
+
+
+def run_benchmarks(quick: bool = False) -> Dict[str, Any]:
+    """
+    Run all benchmarks and return their results as a JSON-serializable dictionary.
+
+    Parameters
+    ----------
+    quick : bool, default: False
+        If True, run each benchmark at a much smaller scale; useful to check that they run, not to compare results.
+    """
+    scale = 100 if quick else 1
+
+    return dict(
+        metadata=dict(
+            timestamp=datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+            python_version=platform.python_version(),
+            platform=platform.platform(),
+            tqdm_version=_get_version("tqdm"),
+            tqdm_publisher_version=_get_version("tqdm_publisher"),
+            quick=quick,
+        ),
+        publisher_overhead=benchmark_publisher_overhead(
+            number_of_iterations=100_000 // scale, number_of_repeats=1 if quick else 5
+        ),
+        announce_throughput=benchmark_announce_throughput(
+            numbers_of_listeners=(1, 10) if quick else (1, 10, 100, 1000), number_of_messages=1000 // scale
+        ),
+        slow_consumer_memory=benchmark_slow_consumer_memory(number_of_messages=100_000 // scale, maxsize=1000 // scale),
+        update_latency=benchmark_update_latency(number_of_updates=2000 // scale),
+    )
+
+
+def _command_line_interface(arguments: List[str]) -> None:
+    """Run the benchmarks, writing the results as JSON to the file given as first argument, or to the output."""
+    quick = "--quick" in arguments
+    arguments = [argument for argument in arguments if argument != "--quick"]
+
+    results = run_benchmarks(quick=quick)
+    results_json = json.dumps(obj=results, indent=2)
+
+    if len(arguments) == 0:
+        print(results_json)
+        return
+
+    with open(file=arguments[0], mode="w") as file:
+        file.write(results_json)
+    print(f"Benchmark results written to {arguments[0]}.")
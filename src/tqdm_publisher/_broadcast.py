@@ -0,0 +1,445 @@
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import logging
+import struct
+from typing import Any, Callable, Dict, Optional, Set
+
+from ._handler import OVERFLOW_POLICIES, TQDMProgressHandler
+from ._messages import EncodedMessage, ProgressMessage
+
+_logger = logging.getLogger(__name__)
+
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# WebSocket opcodes
+_CONTINUATION = 0x0
+_TEXT = 0x1
+_CLOSE = 0x8
+_PING = 0x9
+_PONG = 0xA
+
+_MAXIMUM_INCOMING_FRAME_SIZE = 64 * 1024  # The clients only send commands
+
+# WebSocket close codes
+_UNSUPPORTED_DATA = 1003
+_MESSAGE_TOO_BIG = 1009
+
+
+def format_server_sent_events(*, message_data: str, event_type: str = "message") -> str:
+    """
+    Format an `event_type` type server-sent event with `data` in a way expected by the EventSource browser implementation.
+
+    With reference to the following demonstration of frontend elements.
+
+    ```javascript
+    const server_sent_event = new EventSource("/api/v1/sse");
+
+    /*
+     * This will listen only for events
+     * similar to the following:
+     *
+     * event: notice
+     * data: useful data
+     * id: someid
+     */
+    server_sent_event.addEventListener("notice", (event) => {
+      console.log(event.data);
+    });
+
+    /*
+     * Similarly, this will listen for events
+     * with the field `event: update`
+     */
+    server_sent_event.addEventListener("update", (event) => {
+      console.log(event.data);
+    });
+
+    /*
+     * The event "message" is a special case, as it
+     * will capture events without an event field
+     * as well as events that have the specific type
+     * `event: message` It will not trigger on any
+     * other event type.
+     */
+    server_sent_event.addEventListener("message", (event) => {
+      console.log(event.data);
+    });
+    ```
+
+    Parameters
+    ----------
+    message_data : str
+        The message data to be sent to the client.
+    event_type : str, default="message"
+        The type of event corresponding to the message data.
+
+    Returns
+    -------
+    formatted_message : str
+        The formatted message to be sent to the client.
+    """
+    message = f"data: {message_data}\n\n"
+    if event_type != "":
+        message = f"event: {event_type}\n{message}"
+    return message
+
+
+def _encode_websocket_frame(payload: bytes, opcode: int = _TEXT) -> bytes:
+    """Encode a single, unmasked frame, as sent by a server."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 2**16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    """Unmask the payload of a frame sent by a client, as a single XOR of two integers."""
+    length = len(payload)
+    repeated_mask = (mask * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(repeated_mask, "big")).to_bytes(length, "big")
+
+
+class _BroadcastClient:
+    """A connected client, with a bounded buffer of outgoing data written by its own task."""
+
+    def __init__(self, writer: asyncio.StreamWriter, maxsize: int, overflow: str):
+        self.writer = writer
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped_messages = 0
+        self.closed = False
+
+        self._outgoing = collections.deque()
+        self._wakeup = asyncio.Event()
+
+    def send(self, data: bytes) -> None:
+        if self.closed:
+            return
+
+        if 0 < self.maxsize <= len(self._outgoing):
+            if self.overflow == "disconnect":
+                self.close()
+                return
+            elif self.overflow == "drop_newest":
+                self.dropped_messages += 1
+                return
+            self._outgoing.popleft()
+            self.dropped_messages += 1
+
+        self._outgoing.append(data)
+        self._wakeup.set()
+
+    def send_control(self, data: bytes) -> None:
+        """Write a control frame at once, bypassing the buffer so that it is never dropped by the overflow policy."""
+        if not self.writer.is_closing():
+            self.writer.write(data)
+
+    def close(self, discard_outgoing: bool = False) -> None:
+        self.closed = True
+        if discard_outgoing:  # Nothing may follow a WebSocket closing frame
+            self._outgoing.clear()
+        self._wakeup.set()
+
+    async def write_forever(self) -> None:
+        """Write the outgoing data as it comes, waiting for the client to keep up before writing more."""
+        try:
+            while True:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+
+                if self._outgoing:
+                    data = b"".join(self._outgoing)
+                    self._outgoing.clear()
+                    self.writer.write(data)
+                    await self.writer.drain()
+
+                if self.closed:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            self.closed = True
+            self.writer.close()
+
+
+class ProgressBroadcastServer:
+    """
+    Broadcast the messages announced on a `TQDMProgressHandler` to any number of clients, over Server-Sent Events and
+    WebSocket connections served by a single asyncio event loop.
+
+    Each message is serialized once, then the same bytes are written to every client. Each client has its own bounded
+    buffer and writing task, so a slow client never delays the others: once its buffer is full, its messages are
+    handled according to the `overflow` policy.
+
+    Examples
+    --------
+    >>> async def main():
+    >>>     async with ProgressBroadcastServer(handler=progress_handler, port=3768) as server:
+    >>>         await server.serve_forever()
+    """
+
+    def __init__(
+        self,
+        handler: TQDMProgressHandler,
+        host: str = "localhost",
+        port: int = 0,
+        server_sent_events_path: str = "/events",
+        websocket_path: str = "/ws",
+        client_maxsize: int = 1000,
+        overflow: str = "drop_oldest",
+        encoder: Callable[[Dict[str, Any]], str] = json.dumps,
+    ):
+        """
+        Parameters
+        ----------
+        handler : TQDMProgressHandler
+            The handler whose messages are broadcast.
+        host : str, default: "localhost"
+            The interface to listen on.
+        port : int, default: 0
+            The port to listen on; if zero, a free port is chosen, which is available as the `port` attribute once
+            the server is started.
+        server_sent_events_path : str, default: "/events"
+            The path of the Server-Sent Events stream.
+        websocket_path : str, default: "/ws"
+            The path of the WebSocket endpoint.
+        client_maxsize : int, default: 1000
+            The maximum number of messages waiting to be written to a client.
+            If zero or less, the buffers are unbounded.
+        overflow : "drop_oldest", "drop_newest" or "disconnect", default: "drop_oldest"
+            What happens to the messages of a client whose buffer is full.
+        encoder : callable, default: json.dumps
+            The function serializing each message to text, as a string or UTF-8 encoded bytes; the messages it fails
+            to serialize (including to binary formats, such as that of the `BinaryCodec`) are logged and skipped.
+            Messages announced by a handler with an `encoder` are sent in their already `encoded` form instead, and a
+            `ProgressMessage` is passed as a dictionary.
+        """
+        if overflow not in OVERFLOW_POLICIES or overflow == "block":
+            raise ValueError(
+                "The overflow policy of a broadcast server must be one of 'drop_oldest', 'drop_newest' or "
+                f"'disconnect', not '{overflow}'."
+            )
+
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.server_sent_events_path = server_sent_events_path
+        self.websocket_path = websocket_path
+        self.client_maxsize = client_maxsize
+        self.overflow = overflow
+        self.encoder = encoder
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._listener = None
+        self._broadcast_task: Optional[asyncio.Task] = None
+        self._server_sent_events_clients: Set[_BroadcastClient] = set()
+        self._websocket_clients: Set[_BroadcastClient] = set()
+        self._client_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def number_of_clients(self) -> int:
+        """The number of connected clients."""
+        return len(self._server_sent_events_clients) + len(self._websocket_clients)
+
+    @property
+    def dropped_messages(self) -> int:
+        """The number of messages dropped for the clients that are currently connected."""
+        return sum(client.dropped_messages for client in self._server_sent_events_clients | self._websocket_clients)
+
+    async def start(self) -> None:
+        """Start accepting clients and broadcasting the messages of the handler."""
+        self._listener = self.handler.alisten(loop=asyncio.get_running_loop())
+        self._broadcast_task = asyncio.create_task(self._broadcast_forever())
+
+        self._server = await asyncio.start_server(self._handle_connection, host=self.host, port=self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        """Serve the clients until the server is closed."""
+        await self._server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop the broadcast and disconnect every client."""
+        if self._server is None:
+            return
+
+        self._server.close()
+        self.handler.unsubscribe(self._listener)  # Ends the broadcast task
+        await self._broadcast_task
+
+        for client in self._server_sent_events_clients | self._websocket_clients:
+            client.close()
+        if self._client_tasks:
+            await asyncio.gather(*self._client_tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> "ProgressBroadcastServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _broadcast_forever(self) -> None:
+        while True:
+            messages = await self._listener.get_batch()
+            if not messages:
+                return
+
+            for message in messages:
+                if not self._server_sent_events_clients and not self._websocket_clients:
+                    continue
+
+                try:
+                    if isinstance(message, EncodedMessage):
+                        message_data = message.encoded
+                    else:
+                        message_data = self.encoder(
+                            message.to_dict() if isinstance(message, ProgressMessage) else message
+                        )
+                    if isinstance(message_data, bytes):  # Must be UTF-8 text, e.g., JSON, rather than binary data
+                        message_data = message_data.decode()
+                except Exception:
+                    _logger.exception("Failed to encode a progress message for the broadcast.")
+                    continue
+
+                if self._server_sent_events_clients:
+                    data = format_server_sent_events(message_data=message_data).encode()
+                    for client in self._server_sent_events_clients:
+                        client.send(data=data)
+                if self._websocket_clients:
+                    data = _encode_websocket_frame(payload=message_data.encode())
+                    for client in self._websocket_clients:
+                        client.send(data=data)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._client_tasks.add(asyncio.current_task())
+        try:
+            try:
+                request = await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                writer.close()
+                return
+
+            request_line, *header_lines = request.decode("latin-1").split("\r\n")
+            method, path, *_ = request_line.split(" ") + ["", ""]
+            headers = dict()
+            for header_line in header_lines:
+                name, separator, value = header_line.partition(":")
+                if separator:
+                    headers[name.strip().lower()] = value.strip()
+
+            path = path.split("?", 1)[0]
+            if method == "GET" and path == self.websocket_path and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader=reader, writer=writer, key=headers.get("sec-websocket-key", ""))
+            elif method == "GET" and path == self.server_sent_events_path:
+                await self._serve_server_sent_events(reader=reader, writer=writer)
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                writer.close()
+        finally:
+            self._client_tasks.discard(asyncio.current_task())
+
+    async def _serve(self, client: _BroadcastClient, clients: Set[_BroadcastClient], read_forever) -> None:
+        clients.add(client)
+        writing_task = asyncio.create_task(client.write_forever())
+        reading_task = asyncio.create_task(read_forever)
+        try:
+            await asyncio.wait([writing_task, reading_task], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            clients.discard(client)
+            client.close()
+            reading_task.cancel()
+
+            # Give the client a moment to receive its remaining data, but not to stall the server if it stopped reading
+            await asyncio.wait([writing_task], timeout=1.0)
+            writing_task.cancel()
+            await asyncio.gather(writing_task, reading_task, return_exceptions=True)
+
+    async def _serve_server_sent_events(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n"
+            b"Access-Control-Allow-Origin: *\r\n\r\n"
+        )
+        client = _BroadcastClient(writer=writer, maxsize=self.client_maxsize, overflow=self.overflow)
+
+        async def read_until_disconnected():
+            try:
+                while await reader.read(1024):
+                    pass
+            except ConnectionError:
+                pass
+
+        await self._serve(
+            client=client, clients=self._server_sent_events_clients, read_forever=read_until_disconnected()
+        )
+
+    async def _serve_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, key: str) -> None:
+        if not key:
+            writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            writer.close()
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(
+            b"HTTP/1.1 101 Switching Protocols\r\n"
+            b"Upgrade: websocket\r\n"
+            b"Connection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept.encode() + b"\r\n\r\n"
+        )
+        client = _BroadcastClient(writer=writer, maxsize=self.client_maxsize, overflow=self.overflow)
+
+        async def read_until_closed():
+            """
+            Answer the control frames of the client; its data frames are ignored.
+
+            Fragmented messages are not supported, and close the connection, as do frames larger than
+            `_MAXIMUM_INCOMING_FRAME_SIZE`.
+            """
+
+            def close_connection(payload: bytes) -> None:
+                client.close(discard_outgoing=True)
+                client.send_control(data=_encode_websocket_frame(payload=payload, opcode=_CLOSE))
+
+            try:
+                while True:
+                    first_byte, second_byte = await reader.readexactly(2)
+                    is_final = first_byte & 0x80
+                    opcode = first_byte & 0x0F
+                    length = second_byte & 0x7F
+                    if length == 126:
+                        (length,) = struct.unpack("!H", await reader.readexactly(2))
+                    elif length == 127:
+                        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+                    if length > _MAXIMUM_INCOMING_FRAME_SIZE:
+                        close_connection(payload=struct.pack("!H", _MESSAGE_TOO_BIG))
+                        return
+                    if not is_final or opcode == _CONTINUATION:
+                        close_connection(payload=struct.pack("!H", _UNSUPPORTED_DATA))
+                        return
+
+                    mask = await reader.readexactly(4) if second_byte & 0x80 else None
+                    payload = await reader.readexactly(length)
+                    if mask is not None:
+                        payload = _unmask(payload=payload, mask=mask)
+
+                    if opcode == _CLOSE:
+                        close_connection(payload=payload[:2])
+                        return
+                    elif opcode == _PING:
+                        client.send_control(data=_encode_websocket_frame(payload=payload, opcode=_PONG))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+
+        await self._serve(client=client, clients=self._websocket_clients, read_forever=read_until_closed())
@@ -0,0 +1,311 @@
+import json
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from ._messages import _to_serializable
+
+
+class JSONCodec:
+    """
+    Encode progress messages as JSON.
+
+    This is the format of the demos and of the `HTTPProgressForwarder` by default. It is stateless, so every encoded
+    message can be decoded on its own.
+    """
+
+    content_type = "application/json"
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        """Encode a single message."""
+        return json.dumps(obj=message, default=_to_serializable).encode()
+
+    def decode(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """Decode a single message."""
+        return json.loads(data)
+
+    def encode_state(self) -> Optional[bytes]:
+        """Return the state a new decoder needs to decode the following messages; a JSON decoder needs none."""
+        return None
+
+    def encode_batch(self, messages: List[Dict[str, Any]]) -> bytes:
+        """Encode several messages into a single body of the form `{"messages": [...]}`."""
+        return json.dumps(obj=dict(messages=messages), default=_to_serializable).encode()
+
+    def decode_batch(self, data: bytes) -> List[Dict[str, Any]]:
+        """Decode a body produced by `encode_batch`."""
+        return json.loads(data)["messages"]
+
+
+# Frame types
+_MESSAGE_FRAME = 1
+_STATE_FRAME = 2
+_RESET_MESSAGE_FRAME = 3  # A message frame whose decoder first clears its table
+
+# Kinds of table definitions
+_STRING_DEFINITION = 0
+_UUID_DEFINITION = 1
+
+# Kinds of values, stored on two bits per field
+_ABSENT, _NONE, _INTEGER, _FLOAT = range(4)
+_REFERENCE = _INTEGER  # For the fields stored in the string table
+
+_NUMERIC_FIELDS = ("n", "total", "elapsed", "rate")
+_STRING_FIELDS = ("prefix", "unit")  # The `desc` and `unit` of the progress bar, in the `format_dict`
+_COMMON_FIELDS = frozenset(_NUMERIC_FIELDS + _STRING_FIELDS)
+
+_HEADER = struct.Struct("<BIH")  # Frame type, kinds of the fields, number of new table definitions
+_DEFINITION_HEADER = struct.Struct("<BI")  # Kind, size of the definition in bytes
+_LENGTH = struct.Struct("<I")
+
+_INT64_MIN, _INT64_MAX = -(2**63), 2**63 - 1
+_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+def _is_canonical_uuid(value: str) -> bool:
+    if len(value) != 36:
+        return False
+    try:
+        return str(UUID(value)) == value
+    except ValueError:
+        return False
+
+
+class BinaryCodec:
+    """
+    Encode progress messages in a compact binary format.
+
+    The `progress_bar_id` is stored as 16 bytes (when it is a UUID string), the `n`, `total`, `elapsed` and `rate` of
+    the `format_dict` as 8-byte integers or floats, and every string (including the `desc` and `unit`) is interned in a
+    table: it is sent in full the first time only, then referenced by its index. The remaining entries of the
+    `format_dict` and of the message, which rarely change, are interned as a whole. Decoding restores the same dict.
+
+    The codec is stateful: a decoder must receive the frames of an encoder in order. A decoder joining an existing
+    stream must first receive the frame returned by `encode_state` of the encoder, for which `decode` returns None.
+    Each instance holds the table of a single stream; use one instance per stream (or per batch).
+
+    The table holds about `max_table_size` entries at most: once full, the encoder clears it and its next frame tells
+    the decoder to do the same, so a long-lived stream (e.g., of progress bars with a changing `postfix`) uses bounded
+    memory, at the cost of sending the strings in use again.
+    """
+
+    content_type = "application/octet-stream"
+
+    def __init__(self, max_table_size: int = 10_000):
+        """
+        Parameters
+        ----------
+        max_table_size : int, default: 10,000
+            The number of interned strings and dictionaries after which the table is cleared.
+        """
+        if max_table_size < 1:
+            raise ValueError(f"The maximum size of the table must be positive, not {max_table_size}.")
+        self.max_table_size = max_table_size
+
+        # Encoding
+        self._indices: Dict[Any, int] = dict()  # Keyed by the string, or the items of an interned dictionary
+        self._definitions: List[bytes] = list()  # The encoded definitions of the table, for `encode_state`
+
+        # Decoding
+        self._table: List[str] = list()
+        self._parsed_dictionaries: Dict[int, Dict[str, Any]] = dict()
+
+        self._value_structs: Dict[int, struct.Struct] = dict()
+
+    def _get_value_struct(self, kinds: int) -> struct.Struct:
+        value_struct = self._value_structs.get(kinds)
+        if value_struct is None:
+            value_format = "<"
+            for field_index in range(len(_NUMERIC_FIELDS)):
+                kind = (kinds >> (2 * field_index)) & 3
+                value_format += {_ABSENT: "", _NONE: "", _INTEGER: "q", _FLOAT: "d"}[kind]
+            for field_index in range(len(_NUMERIC_FIELDS), len(_NUMERIC_FIELDS) + 5):
+                kind = (kinds >> (2 * field_index)) & 3
+                value_format += "I" if kind == _REFERENCE else ""
+            value_struct = self._value_structs[kinds] = struct.Struct(value_format)
+        return value_struct
+
+    def _intern(self, key: Any, text: str, new_definitions: List[bytes], is_uuid: bool = False) -> int:
+        index = self._indices.get(key)
+        if index is None:
+            index = self._indices[key] = len(self._indices)
+            payload = UUID(text).bytes if is_uuid else text.encode()
+            definition = _DEFINITION_HEADER.pack(_UUID_DEFINITION if is_uuid else _STRING_DEFINITION, len(payload))
+            definition += payload
+            self._definitions.append(definition)
+            new_definitions.append(definition)
+        return index
+
+    def _intern_dictionary(self, dictionary: Dict[str, Any], new_definitions: List[bytes]) -> int:
+        # Since `1`, `1.0` and `True` are equal keys, the scalar values are tagged with their type; any other value is
+        # keyed by the serialized dictionary, which tells them apart
+        key = None
+        if all(type(value) in _SCALAR_TYPES for value in dictionary.values()):
+            key = (dict, tuple((field, type(value), value) for field, value in dictionary.items()))
+            index = self._indices.get(key)
+            if index is not None:
+                return index
+
+        text = json.dumps(obj=dictionary)
+        if key is None:
+            key = (dict, text)
+        return self._intern(key=key, text=text, new_definitions=new_definitions)
+
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        """Encode a single message."""
+        frame_type = _MESSAGE_FRAME
+        if len(self._indices) >= self.max_table_size:
+            self._indices.clear()
+            self._definitions.clear()
+            frame_type = _RESET_MESSAGE_FRAME
+
+        new_definitions: List[bytes] = list()
+        kinds = 0
+        values = list()
+        message_extras = dict()
+        format_extras = dict()
+
+        format_dict = message.get("format_dict")
+        has_format_dict = isinstance(format_dict, dict)
+        if has_format_dict:
+            for field_index, field in enumerate(_NUMERIC_FIELDS):
+                if field not in format_dict:
+                    continue
+                value = format_dict[field]
+                value_type = type(value)
+                if value is None:
+                    kind = _NONE
+                elif value_type is int and _INT64_MIN <= value <= _INT64_MAX:
+                    kind = _INTEGER
+                    values.append(value)
+                elif value_type is float:
+                    kind = _FLOAT
+                    values.append(value)
+                else:
+                    format_extras[field] = value
+                    continue
+                kinds |= kind << (2 * field_index)
+
+            for field_index, field in enumerate(_STRING_FIELDS, start=len(_NUMERIC_FIELDS)):
+                if field not in format_dict:
+                    continue
+                value = format_dict[field]
+                if value is None:
+                    kinds |= _NONE << (2 * field_index)
+                elif type(value) is str:
+                    kinds |= _REFERENCE << (2 * field_index)
+                    values.append(self._intern(key=value, text=value, new_definitions=new_definitions))
+                else:
+                    format_extras[field] = value
+
+            for field, value in format_dict.items():
+                if field not in _COMMON_FIELDS:
+                    format_extras[field] = value
+        elif "format_dict" in message:
+            message_extras["format_dict"] = format_dict
+
+        progress_bar_id = message.get("progress_bar_id")
+        field_index = len(_NUMERIC_FIELDS) + len(_STRING_FIELDS)
+        if "progress_bar_id" not in message:
+            pass
+        elif type(progress_bar_id) is str:
+            kinds |= _REFERENCE << (2 * field_index)
+            values.append(
+                self._intern(
+                    key=progress_bar_id,
+                    text=progress_bar_id,
+                    new_definitions=new_definitions,
+                    is_uuid=progress_bar_id not in self._indices and _is_canonical_uuid(progress_bar_id),
+                )
+            )
+        else:
+            message_extras["progress_bar_id"] = progress_bar_id
+
+        for key, value in message.items():
+            if key != "progress_bar_id" and key != "format_dict":
+                message_extras[key] = value
+
+        # The extras of the format_dict are present (even if empty) whenever the format_dict is, to restore it
+        if has_format_dict:
+            kinds |= _REFERENCE << (2 * (field_index + 1))
+            values.append(self._intern_dictionary(dictionary=format_extras, new_definitions=new_definitions))
+        if message_extras:
+            kinds |= _REFERENCE << (2 * (field_index + 2))
+            values.append(self._intern_dictionary(dictionary=message_extras, new_definitions=new_definitions))
+
+        header = _HEADER.pack(frame_type, kinds, len(new_definitions))
+        return header + b"".join(new_definitions) + self._get_value_struct(kinds=kinds).pack(*values)
+
+    def encode_state(self) -> bytes:
+        """Return a frame holding the whole table, for a decoder joining the stream after this point."""
+        return _HEADER.pack(_STATE_FRAME, 0, len(self._definitions)) + b"".join(self._definitions)
+
+    def _read_definitions(self, data: bytes, offset: int, number_of_definitions: int) -> int:
+        for _ in range(number_of_definitions):
+            kind, size = _DEFINITION_HEADER.unpack_from(data, offset)
+            offset += _DEFINITION_HEADER.size
+            payload = bytes(data[offset : offset + size])
+            offset += size
+            self._table.append(str(UUID(bytes=payload)) if kind == _UUID_DEFINITION else payload.decode())
+        return offset
+
+    def _get_dictionary(self, index: int) -> Dict[str, Any]:
+        dictionary = self._parsed_dictionaries.get(index)
+        if dictionary is None:
+            dictionary = self._parsed_dictionaries[index] = json.loads(self._table[index])
+        return dict(dictionary)
+
+    def decode(self, data: bytes) -> Optional[Dict[str, Any]]:
+        """Decode a single frame; returns None for the frames that only carry the state of the encoder."""
+        frame_type, kinds, number_of_definitions = _HEADER.unpack_from(data, 0)
+
+        if frame_type == _STATE_FRAME or frame_type == _RESET_MESSAGE_FRAME:
+            self._table = list()
+            self._parsed_dictionaries = dict()
+        if frame_type == _STATE_FRAME:
+            self._read_definitions(data=data, offset=_HEADER.size, number_of_definitions=number_of_definitions)
+            return None
+
+        offset = self._read_definitions(data=data, offset=_HEADER.size, number_of_definitions=number_of_definitions)
+        values = iter(self._get_value_struct(kinds=kinds).unpack_from(data, offset))
+
+        format_dict = dict()
+        for field_index, field in enumerate(_NUMERIC_FIELDS):
+            kind = (kinds >> (2 * field_index)) & 3
+            if kind != _ABSENT:
+                format_dict[field] = None if kind == _NONE else next(values)
+        for field_index, field in enumerate(_STRING_FIELDS, start=len(_NUMERIC_FIELDS)):
+            kind = (kinds >> (2 * field_index)) & 3
+            if kind != _ABSENT:
+                format_dict[field] = None if kind == _NONE else self._table[next(values)]
+
+        message = dict()
+        field_index = len(_NUMERIC_FIELDS) + len(_STRING_FIELDS)
+        if (kinds >> (2 * field_index)) & 3 == _REFERENCE:
+            message["progress_bar_id"] = self._table[next(values)]
+        if (kinds >> (2 * (field_index + 1))) & 3 == _REFERENCE:
+            format_dict.update(self._get_dictionary(index=next(values)))
+            message["format_dict"] = format_dict
+        if (kinds >> (2 * (field_index + 2))) & 3 == _REFERENCE:
+            message.update(self._get_dictionary(index=next(values)))
+
+        return message
+
+    def encode_batch(self, messages: List[Dict[str, Any]]) -> bytes:
+        """Encode several messages into a single body of length-prefixed frames."""
+        frames = [self.encode(message=message) for message in messages]
+        return b"".join(_LENGTH.pack(len(frame)) + frame for frame in frames)
+
+    def decode_batch(self, data: bytes) -> List[Dict[str, Any]]:
+        """Decode a body produced by `encode_batch`."""
+        messages = list()
+        view = memoryview(data)
+        offset = 0
+        while offset < len(view):
+            (size,) = _LENGTH.unpack_from(view, offset)
+            offset += _LENGTH.size
+            message = self.decode(data=view[offset : offset + size])
+            offset += size
+            if message is not None:
+                messages.append(message)
+        return messages
@@ -0,0 +1,66 @@
+from typing import Any, Dict
+
+
+class ProgressDeltaDecoder:
+    """
+    Rebuild the full progress messages from a stream of delta-encoded messages.
+
+    Delta-encoded messages are sent by a `TQDMProgressSubscriber` (or a `TQDMProgressHandler`) created with
+    `publish_deltas=True`. The first message of each progress bar holds the full `format_dict` and is flagged with
+    `delta=False`; each following message only holds the entries of the `format_dict` that changed and is flagged with
+    `delta=True`.
+
+    Examples
+    --------
+    >>> decoder = ProgressDeltaDecoder()
+    >>> handler = TQDMProgressHandler()
+    >>> listener = handler.listen()
+    >>> progress_bar = handler.create_progress_subscriber(total=10, publish_deltas=True)
+    >>> message = decoder.decode(message=listener.get())  # Always contains the full `format_dict`
+    """
+
+    def __init__(self):
+        self.format_dicts: Dict[str, Dict[str, Any]] = dict()
+
+    def decode(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Merge a message into the known state of its progress bar.
+
+        Parameters
+        ----------
+        message : dict
+            A message containing the `progress_bar_id`, the (possibly partial) `format_dict` and the `delta` flag.
+            Messages without a `delta` flag are treated as full snapshots.
+
+        Returns
+        -------
+        decoded_message : dict
+            A copy of the message, without the `delta` flag, whose `format_dict` is the full state of the progress bar.
+        """
+        progress_bar_id = message["progress_bar_id"]
+
+        if message.get("delta", False):
+            if progress_bar_id not in self.format_dicts:
+                raise ValueError(
+                    f"Received a delta for the progress bar '{progress_bar_id}' before receiving its full snapshot."
+                )
+            format_dict = self.format_dicts[progress_bar_id]
+            format_dict.update(message["format_dict"])
+        else:
+            format_dict = dict(message["format_dict"])
+            self.format_dicts[progress_bar_id] = format_dict
+
+        decoded_message = {key: value for key, value in message.items() if key != "delta"}
+        decoded_message["format_dict"] = dict(format_dict)
+        return decoded_message
+
+    def forget(self, progress_bar_id: str) -> bool:
+        """
+        Drop the known state of a progress bar, for instance once it has finished.
+
+        Returns
+        -------
+        success : bool
+            True if the progress bar was known, False otherwise.
+        """
+        return self.format_dicts.pop(progress_bar_id, None) is not None
@@ -1,26 +1,28 @@
+import importlib
 import os
 import subprocess
 import sys
 import webbrowser
 from pathlib import Path
 
-from tqdm_publisher._demos._multiple_bars._server import run_multiple_bar_demo
-from tqdm_publisher._demos._parallel_bars._server import run_parallel_bar_demo
-from tqdm_publisher._demos._single_bar._server import run_single_bar_demo
+from tqdm_publisher._benchmarks._suite import (
+    _command_line_interface as _benchmark_command_line_interface,
+)
 
 CLIENT_PORT = 1234
 
+# The servers are imported only when their demo is run, since they require the optional demo dependencies
 DEMOS = {
-    "demo_single": dict(subpath="_single_bar", server=run_single_bar_demo),
-    "demo_multiple": dict(subpath="_multiple_bars", server=run_multiple_bar_demo),
-    "demo_parallel": dict(subpath="_parallel_bars", server=run_parallel_bar_demo),
+    "demo_single": dict(subpath="_single_bar", server="run_single_bar_demo"),
+    "demo_multiple": dict(subpath="_multiple_bars", server="run_multiple_bar_demo"),
+    "demo_parallel": dict(subpath="_parallel_bars", server="run_parallel_bar_demo"),
 }
 
 DEMO_BASE_FOLDER_PATH = Path(__file__).parent
 
 
 def _command_line_interface():
-    """A simple command line interface for running the demo for TQDM Publisher."""
+    """A simple command line interface for running the demo (or the benchmarks) for TQDM Publisher."""
     if len(sys.argv) <= 1:
         print("No input provided. Please specify a command (e.g. 'demo').")
         return
@@ -33,6 +35,10 @@ def _command_line_interface():
         )
         return
 
+    if command == "benchmark":  # tqdm_publisher benchmark [output_file_path] [--quick]
+        _benchmark_command_line_interface(arguments=sys.argv[2:])
+        return
+
     flags_list = sys.argv[2:]
     if len(flags_list) > 0:
         print(f"No flags are accepted at this time, but flags {flags_list} were received.")
@@ -47,6 +53,7 @@ def _command_line_interface():
 
         webbrowser.open_new_tab(f"http://localhost:{CLIENT_PORT}/{client_relative_path}")
 
-        demo_info["server"]()
+        server_module = importlib.import_module(f"tqdm_publisher._demos.{demo_info['subpath']}._server")
+        getattr(server_module, demo_info["server"])()
     else:
         print(f"{command} is an invalid command.")
@@ -10,10 +10,11 @@ import tqdm_publisher
 
 async def handler(websocket: websockets.WebSocketServerProtocol) -> None:
     """Handle messages from the client and manage the client connections."""
+    progress_handler = tqdm_publisher.TQDMProgressHandler()
 
     class WebSocketProgressBar:
         """
-        This is similar to the `send_progress_update_to_client` function from the single bar demo server.
+        This is similar to the `start_progress_bar` function from the single bar demo server.
 
         The translation of this approach into a scoped class definition is merely to showcase an alternative approach
         of the execution.
@@ -23,16 +24,6 @@ async def handler(websocket: websockets.WebSocketServerProtocol) -> None:
             super().__init__()
             self.request_id = request_id
 
-        def update(self, format_dict: dict) -> None:
-            """
-            This is the function that will run on every update of the TQDM object.
-
-            It will forward the progress to the client.
-            """
-            asyncio.run(
-                websocket.send(message=json.dumps(obj=dict(format_dict=format_dict, request_id=self.request_id)))
-            )
-
         def run(self):
             """
             Emulate running the specified number of tasks by sleeping the specified amount of time on each iteration.
@@ -40,12 +31,13 @@ async def handler(websocket: websockets.WebSocketServerProtocol) -> None:
             Defaults are chosen for a deterministic and regular update period of one second for a total time of
             seconds per bar.
 
-            This is similar to the `start_progress_bar` function from the single bar demo server. This is simply a
-            showcase of an alternative approach to defining and scoping the execution.
+            Each update is announced by the `progress_handler` along with the `request_id`, which associates it with
+            the correct element on the client.
             """
             all_task_durations_in_seconds = [1.0 for _ in range(10)]  # Ten seconds at one task per second
-            self.progress_bar = tqdm_publisher.TQDMProgressPublisher(iterable=all_task_durations_in_seconds)
-            self.progress_bar.subscribe(callback=self.update)
+            self.progress_bar = progress_handler.create_progress_subscriber(
+                iterable=all_task_durations_in_seconds, additional_metadata=dict(request_id=self.request_id)
+            )
 
             for task_duration in self.progress_bar:
                 time.sleep(task_duration)
@@ -54,13 +46,25 @@ async def handler(websocket: websockets.WebSocketServerProtocol) -> None:
             thread = threading.Thread(target=self.run)
             thread.start()
 
-    # Wait for messages from the client
-    async for message in websocket:
-        message_from_client = json.loads(message)
+    async def send_progress_updates_to_client(listener: tqdm_publisher.AsyncListener) -> None:
+        """Forward the updates of every progress bar to the client, on the event loop managing the `websocket`."""
+        async for message in listener:
+            await websocket.send(message=json.dumps(obj=message))
 
-        if message_from_client["command"] == "start":
-            web_socket_progress_bar = WebSocketProgressBar(request_id=message_from_client["request_id"])
-            web_socket_progress_bar.start()
+    listener = progress_handler.alisten()
+    sending_task = asyncio.create_task(send_progress_updates_to_client(listener=listener))
+
+    # Wait for messages from the client
+    try:
+        async for message in websocket:
+            message_from_client = json.loads(message)
+
+            if message_from_client["command"] == "start":
+                web_socket_progress_bar = WebSocketProgressBar(request_id=message_from_client["request_id"])
+                web_socket_progress_bar.start()
+    finally:
+        progress_handler.unsubscribe(listener)  # Ends the iteration over the listener
+        await sending_task
 
 
 async def spawn_server() -> None:
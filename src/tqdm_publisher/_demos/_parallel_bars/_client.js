@@ -2,13 +2,20 @@ import { EventSourceManager } from '../utils/EventSourceManager.js';
 import { getBar } from '../utils/elements.js';
 
 
-// Update the specified progress bar when a message is received from the server
-const onProgressUpdate = (event) => {
-    const { request_id, progress_bar_id, format_dict } = JSON.parse(event.data);
+// Update the specified progress bar
+const updateBar = ({ request_id, progress_bar_id, format_dict }) => {
     const { update } = getBar(request_id, progress_bar_id);
     update(format_dict, { request_id, progress_bar_id });
 }
 
+// Update the progress bars when a message is received from the server
+// The first message is a snapshot of the progress bars that started before this page connected
+const onProgressUpdate = (event) => {
+    const message = JSON.parse(event.data);
+    if (message.snapshot) message.snapshot.forEach(updateBar);
+    else updateBar(message);
+}
+
 // Create a new message client
 const client = new EventSourceManager({ onmessage: onProgressUpdate });
 
@@ -6,13 +6,20 @@ import sys
 import time
 import uuid
 from concurrent.futures import ProcessPoolExecutor, as_completed
-from typing import List
+from typing import Dict, List, Optional
 
-import requests
 from flask import Flask, Response, jsonify, request
 from flask_cors import CORS, cross_origin
 
-from tqdm_publisher import TQDMProgressHandler, TQDMProgressPublisher
+from tqdm_publisher import (
+    BatchingSender,
+    HTTPProgressForwarder,
+    ProcessProgressReceiver,
+    TQDMProgressHandler,
+    TQDMProgressPublisher,
+    announce_progress_batch,
+    format_server_sent_events,
+)
 
 N_JOBS = 3
 
@@ -26,26 +33,15 @@ TASK_TIMES: List[List[float]] = [
     for task_index in range(1, NUMBER_OF_TASKS_PER_JOB + 1)
 ]
 
-## TQDMProgressHandler cannot be called from a process...so we just use a global reference exposed to each subprocess
-progress_handler = TQDMProgressHandler()
-
-
-def forward_to_http_server(url: str, request_id: str, progress_bar_id: int, format_dict: dict):
-    """
-    This is the parallel callback definition.
-    Its parameters are attributes of a tqdm instance and their values are what a typical default tqdm printout
-    to console would contain (update step `n` out of `total` iterations).
-    """
-    json_data = json.dumps(obj=dict(request_id=request_id, id=str(progress_bar_id), data=format_dict))
-
-    requests.post(url=url, data=json_data, headers={"Content-Type": "application/json"})
+# Each message is serialized once for all clients, and the latest state of each progress bar is kept for new clients
+progress_handler = TQDMProgressHandler(encoder=json.dumps, state_maxsize=1000)
 
 
 def _run_sleep_tasks_in_subprocess(
     task_times: List[float],
     iteration_index: int,
     request_id: str,
-    url: str,
+    progress_sender: BatchingSender,
 ):
     """
     Run a 'task' that takes a certain amount of time to run on each worker.
@@ -61,30 +57,29 @@ def _run_sleep_tasks_in_subprocess(
         Each index would map to a different tqdm position.
     request_id : int
         Identifier of the request, provided by the client.
-    url : str
-        The localhost URL to sent progress updates to.
+    progress_sender : BatchingSender
+        The sender forwarding the progress updates to the `progress_handler` of the server.
     """
-
-    subprogress_bar_id = uuid.uuid4()
-
-    sub_progress_bar = TQDMProgressPublisher(
+    sub_progress_bar = progress_sender.create_progress_subscriber(
         iterable=task_times,
         position=iteration_index + 1,
-        desc=f"Progress on iteration {iteration_index} ({subprogress_bar_id})",
+        desc=f"Progress on iteration {iteration_index}",
         leave=False,
-    )
-
-    sub_progress_bar.subscribe(
-        lambda format_dict: forward_to_http_server(
-            url=url, request_id=request_id, progress_bar_id=subprogress_bar_id, format_dict=format_dict
-        )
+        publish_finished=True,
+        additional_metadata=dict(request_id=request_id),
     )
 
     for sleep_time in sub_progress_bar:
         time.sleep(sleep_time)
 
 
-def run_parallel_processes(*, all_task_times: List[List[float]], request_id: str, url: str):
+def run_parallel_processes(*, all_task_times: List[List[float]], request_id: str, progress_sender: BatchingSender):
+    """
+    Run each list of tasks on a worker process, forwarding the progress of every worker through the `progress_sender`.
+
+    The `progress_sender` is either the sender of a `ProcessProgressReceiver`, when the progress handler lives in this
+    process, or an `HTTPProgressForwarder` to the `/update` endpoint of a (possibly remote) server.
+    """
 
     futures = list()
     with ProcessPoolExecutor(max_workers=N_JOBS) as executor:
@@ -97,19 +92,22 @@ def run_parallel_processes(*, all_task_times: List[List[float]], request_id: str
                     task_times=task_times_per_job,
                     iteration_index=iteration_index,
                     request_id=request_id,
-                    url=url,
+                    progress_sender=progress_sender,
                 )
             )
 
         total_tasks_iterable = as_completed(futures)
         total_tasks_progress_bar = TQDMProgressPublisher(
-            iterable=total_tasks_iterable, total=len(all_task_times), desc=f"Total tasks completed for {request_id}"
+            iterable=total_tasks_iterable,
+            total=len(all_task_times),
+            desc=f"Total tasks completed for {request_id}",
+            publish_finished=True,
         )
 
         # The 'total' progress bar bas an ID equivalent to the request ID
         total_tasks_progress_bar.subscribe(
-            lambda format_dict: forward_to_http_server(
-                url=url, request_id=request_id, progress_bar_id=request_id, format_dict=format_dict
+            lambda format_dict: progress_sender(
+                message=dict(request_id=request_id, progress_bar_id=request_id, format_dict=format_dict)
             )
         )
 
@@ -117,76 +115,17 @@ def run_parallel_processes(*, all_task_times: List[List[float]], request_id: str
         for _ in total_tasks_progress_bar:
             pass
 
+    progress_sender.flush()
 
-def format_server_sent_events(*, message_data: str, event_type: str = "message") -> str:
-    """
-    Format an `event_type` type server-sent event with `data` in a way expected by the EventSource browser implementation.
-
-    With reference to the following demonstration of frontend elements.
-
-    ```javascript
-    const server_sent_event = new EventSource("/api/v1/sse");
-
-    /*
-     * This will listen only for events
-     * similar to the following:
-     *
-     * event: notice
-     * data: useful data
-     * id: someid
-     */
-    server_sent_event.addEventListener("notice", (event) => {
-      console.log(event.data);
-    });
-
-    /*
-     * Similarly, this will listen for events
-     * with the field `event: update`
-     */
-    server_sent_event.addEventListener("update", (event) => {
-      console.log(event.data);
-    });
-
-    /*
-     * The event "message" is a special case, as it
-     * will capture events without an event field
-     * as well as events that have the specific type
-     * `event: message` It will not trigger on any
-     * other event type.
-     */
-    server_sent_event.addEventListener("message", (event) => {
-      console.log(event.data);
-    });
-    ```
-
-    Parameters
-    ----------
-    message_data : str
-        The message data to be sent to the client.
-    event_type : str, default="message"
-        The type of event corresponding to the message data.
-
-    Returns
-    -------
-    formatted_message : str
-        The formatted message to be sent to the client.
-    """
-
-    # message = f"event: {event_type}\n" if event_type != "" else ""
-    # message += f"data: {message_data}\n\n"
-    # return message
-
-    message = f"data: {message_data}\n\n"
-    if event_type != "":
-        message = f"event: {event_type}\n{message}"
-    return message
 
-
-def listen_to_events():
-    messages = progress_handler.listen()  # returns a queue.Queue
-    while True:
-        message_data = messages.get()  # blocks until a new message arrives
-        yield format_server_sent_events(message_data=json.dumps(message_data))
+def listen_to_events(metadata: Optional[Dict[str, str]] = None):
+    # A queue.Queue that drops the oldest messages if full, and only receives the messages matching `metadata`
+    # It is unsubscribed when the client disconnects and the generator is closed, or evicted if left unread
+    # Its first message is a snapshot of the progress bars that started (or finished) before the client connected
+    with progress_handler.listening(maxsize=1000, metadata=metadata, idle_timeout=60, snapshot=True) as messages:
+        while True:
+            message_data = messages.get()  # blocks until a new message arrives
+            yield format_server_sent_events(message_data=message_data.encoded)
 
 
 app = Flask(__name__)
@@ -200,23 +139,19 @@ PORT = 3768
 def start():
     data = json.loads(request.data) if request.data else {}
     request_id = data["request_id"]
-    url = f"http://localhost:{PORT}/update"
-    app.logger.info(url)
 
-    run_parallel_processes(all_task_times=TASK_TIMES, request_id=request_id, url=url)
+    with ProcessProgressReceiver(handler=progress_handler) as progress_receiver:
+        run_parallel_processes(
+            all_task_times=TASK_TIMES, request_id=request_id, progress_sender=progress_receiver.sender
+        )
     return jsonify({"status": "success"})
 
 
 @app.route("/update", methods=["POST"])
 @cross_origin()
 def update():
-    data = json.loads(request.data) if request.data else {}
-    request_id = data["request_id"]
-    progress_bar_id = data["id"]
-    format_dict = data["data"]
-
-    # Forward updates over Server-Sent Events
-    progress_handler.announce(dict(request_id=request_id, progress_bar_id=progress_bar_id, format_dict=format_dict))
+    # Forward batches of updates from remote workers (see `_run_parallel_bars_demo`) over Server-Sent Events
+    announce_progress_batch(handler=progress_handler, body=request.data)
 
     return jsonify({"status": "success"})
 
@@ -224,7 +159,8 @@ def update():
 @app.route("/events", methods=["GET"])
 @cross_origin()
 def events():
-    return Response(listen_to_events(), mimetype="text/event-stream")
+    # The query arguments (e.g., `/events?request_id=...`) restrict the stream to the matching progress bars
+    return Response(listen_to_events(metadata=request.args.to_dict() or None), mimetype="text/event-stream")
 
 
 async def start_server(port):
@@ -237,12 +173,16 @@ def run_parallel_bar_demo() -> None:
 
 
 def _run_parallel_bars_demo(port: str, host: str):
+    """Run the parallel tasks from another machine, forwarding their progress to the `/update` endpoint of the server."""
     URL = f"http://{host}:{port}/update"
-    request_id = uuid.uuid4()
-    run_parallel_processes(all_task_times=TASK_TIMES, request_id=request_id, url=URL)
+    request_id = str(uuid.uuid4())
+
+    progress_forwarder = HTTPProgressForwarder(url=URL)
+    run_parallel_processes(all_task_times=TASK_TIMES, request_id=request_id, progress_sender=progress_forwarder)
+    progress_forwarder.close()
 
 
-if __name__ == "main":
+if __name__ == "__main__":
     flags_list = sys.argv[1:]
 
     port_flag = "--port" in flags_list
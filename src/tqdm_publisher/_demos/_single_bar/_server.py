@@ -8,57 +8,53 @@ import websockets
 import tqdm_publisher
 
 
-def start_progress_bar(*, progress_callback: callable) -> None:
+def start_progress_bar(*, progress_handler: tqdm_publisher.TQDMProgressHandler) -> None:
     """
     Emulate running the specified number of tasks by sleeping the specified amount of time on each iteration.
 
     Defaults are chosen for a deterministic and regular update period of one second for a total time of 10 seconds.
+
+    Each update of the progress bar is announced by the `progress_handler` as a dictionary containing the `id` of the
+    progress bar and the `format_dict` of the TQDM instance.
     """
     all_task_durations_in_seconds = [1.0 for _ in range(10)]  # Ten seconds at one second per task
-    progress_bar = tqdm_publisher.TQDMProgressPublisher(iterable=all_task_durations_in_seconds)
-
-    def run_function_on_progress_update(format_dict: dict) -> None:
-        """
-        This is the injected callback that will be run on each update of the TQDM object.
-
-        Its first and only positional argument must be the `format_dict` of the TQDM instance. Additional customization
-        on outside parameters must be achieved by defining those fields at an outer scope and defining this
-        server-specific callback inside the local scope.
+    progress_bar = progress_handler.create_progress_subscriber(iterable=all_task_durations_in_seconds)
 
-        In this demo, we will execute the `progress_callback` whose protocol is known only to the WebSocketHandler.
+    for task_duration in progress_bar:
+        time.sleep(task_duration)
 
-        This specifically requires the `id` of the progress bar and the `format_dict` of the TQDM instance.
-        """
-        progress_callback(format_dict=format_dict, progress_bar_id=progress_bar.progress_bar_id)
 
-    progress_bar.subscribe(callback=run_function_on_progress_update)
+async def send_progress_updates_to_client(
+    *, websocket: websockets.WebSocketServerProtocol, listener: tqdm_publisher.AsyncListener
+) -> None:
+    """
+    This is the coroutine that actually sends the progress updates to the front end webpage.
 
-    for task_duration in progress_bar:
-        time.sleep(task_duration)
+    The progress bar runs in a separate thread; the listener hands its updates over to the event loop of the server,
+    so they can be sent on the same event loop as the one managing the `websocket`.
+    """
+    async for message in listener:
+        await websocket.send(message=json.dumps(obj=message))
 
 
 async def handler(websocket: websockets.WebSocketServerProtocol) -> None:
     """Handle messages from the client and manage the client connections."""
-
-    def send_progress_update_to_client(*, format_dict: dict, progress_bar_id: str) -> None:
-        """
-        This is the callback that actually sends the updated `format_dict` to the front end webpage.
-
-        It must be defined within the scope of the handler so that the `websocket` is inherited from the higher level.
-        """
-        message = json.dumps(obj=dict(format_dict=format_dict, progress_bar_id=progress_bar_id))
-        asyncio.run(websocket.send(message=message))
+    progress_handler = tqdm_publisher.TQDMProgressHandler()
+    listener = progress_handler.alisten()
+    sending_task = asyncio.create_task(send_progress_updates_to_client(websocket=websocket, listener=listener))
 
     # Wait for messages from the client
-    async for message in websocket:
-        message_from_client = json.loads(message)
-
-        if message_from_client["command"] == "start":
-            # Start the progress bar in a separate thread
-            thread = threading.Thread(
-                target=start_progress_bar, kwargs=dict(progress_callback=send_progress_update_to_client)
-            )
-            thread.start()
+    try:
+        async for message in websocket:
+            message_from_client = json.loads(message)
+
+            if message_from_client["command"] == "start":
+                # Start the progress bar in a separate thread
+                thread = threading.Thread(target=start_progress_bar, kwargs=dict(progress_handler=progress_handler))
+                thread.start()
+    finally:
+        progress_handler.unsubscribe(listener)  # Ends the iteration over the listener
+        await sending_task
 
 
 async def spawn_server() -> None:
@@ -0,0 +1,228 @@
+import atexit
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from ._publisher import TQDMProgressPublisher
+
+_logger = logging.getLogger(__name__)
+
+
+class ProgressDispatcher:
+    """
+    Run the callbacks of `TQDMProgressPublisher` instances on dedicated background threads.
+
+    The publishers only hand over a snapshot of their `format_dict` on each publication, so slow callbacks (e.g.,
+    blocking HTTP requests) never block the loop iterating over the progress bar.
+
+    While the callbacks of a publisher are running, only the newest snapshot of that publisher is kept; any earlier
+    snapshot that was not delivered yet is replaced (conflated). The callbacks of each publisher are always run in
+    order, by a single thread at a time.
+    """
+
+    def __init__(self, number_of_threads: int = 1, maxsize: int = 1000):
+        """
+        Parameters
+        ----------
+        number_of_threads : int, default: 1
+            The number of background threads running the callbacks.
+        maxsize : int, default: 1000
+            The maximum number of publishers with an undelivered snapshot. When reached, publishers without an
+            undelivered snapshot wait for room before handing over a new one.
+        """
+        self.number_of_threads = number_of_threads
+        self.maxsize = maxsize
+
+        # Keyed by the `id` of the publishers, since progress bars compare equal when they share a position
+        self._pending: Dict[int, Tuple["TQDMProgressPublisher", Dict[str, Any]]] = dict()
+        self._in_flight: Set[int] = set()
+        self._reserved: Set[int] = set()  # The publishers waiting to run a function exclusively; see `run_exclusively`
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = list()
+        self._closed = False
+
+    def submit(self, publisher: "TQDMProgressPublisher", format_dict: Dict[str, Any]) -> None:
+        """
+        Hand over the newest snapshot of a publisher, to be delivered to its callbacks in the background.
+
+        Once the dispatcher is closed (e.g., the shared dispatcher during the shutdown of the interpreter), and when
+        called from a callback run by the dispatcher while it is full, which would wait for itself, the snapshot is
+        delivered in the calling thread instead.
+        """
+        publisher_id = id(publisher)
+        with self._condition:
+            if publisher_id not in self._pending and (
+                self._closed or (len(self._pending) >= self.maxsize and threading.current_thread() in self._threads)
+            ):
+                if publisher_id in self._in_flight:
+                    # Being delivered (possibly by this very thread); exceed the bound rather than deliver out of order
+                    self._pending[publisher_id] = (publisher, format_dict)
+                    self._condition.notify_all()
+                    return
+                self._in_flight.add(publisher_id)
+                deliver_inline = True
+            else:
+                deliver_inline = False
+
+        if deliver_inline:
+            self._deliver(publisher_id=publisher_id, publisher=publisher, format_dict=format_dict)
+            return
+
+        with self._condition:
+            if publisher_id not in self._pending:
+                self._condition.wait_for(lambda: len(self._pending) < self.maxsize)
+            self._pending[publisher_id] = (publisher, format_dict)
+
+            if len(self._threads) < self.number_of_threads:
+                thread = threading.Thread(target=self._run, name="ProgressDispatcher", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify_all()
+
+    def flush(self, publisher: Optional["TQDMProgressPublisher"] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the submitted snapshots are delivered.
+
+        Parameters
+        ----------
+        publisher : TQDMProgressPublisher, optional
+            Only wait for the snapshots of this publisher. By default, wait for the snapshots of every publisher.
+        timeout : float, optional
+            The maximum number of seconds to wait. By default, wait indefinitely.
+
+        Returns
+        -------
+        success : bool
+            True if the snapshots were delivered, False if the timeout expired first.
+        """
+        if threading.current_thread() in self._threads:  # Flushing from a callback would wait for itself
+            return False
+
+        if publisher is None:
+            is_delivered = lambda: not self._pending and not self._in_flight
+        else:
+            is_delivered = lambda: id(publisher) not in self._pending and id(publisher) not in self._in_flight
+
+        with self._condition:
+            return self._condition.wait_for(is_delivered, timeout=timeout)
+
+    def run_exclusively(self, publisher: "TQDMProgressPublisher", function: Callable[[], Any]) -> Any:
+        """
+        Run a function in the calling thread once the submitted snapshots of a publisher are delivered, holding back
+        the delivery of the snapshots it submits in the meantime until the function returns.
+
+        This lets the callbacks of a publisher be updated (e.g., by `subscribe`) without racing with their delivery.
+        The undelivered snapshot of the publisher, if any, is delivered in the calling thread first, so a publisher
+        submitting snapshots continuously does not delay the function indefinitely. When called from a callback run by
+        the dispatcher, which would wait for itself, the function is run at once.
+
+        Returns
+        -------
+        result
+            The value returned by the function.
+        """
+        if threading.current_thread() in self._threads:
+            return function()
+
+        publisher_id = id(publisher)
+        with self._condition:
+            self._reserved.add(publisher_id)  # No background thread starts a new delivery of its snapshots
+            try:
+                self._condition.wait_for(lambda: publisher_id not in self._in_flight)
+            finally:
+                self._reserved.discard(publisher_id)
+            self._in_flight.add(publisher_id)
+            pending = self._pending.pop(publisher_id, None)
+            self._condition.notify_all()
+
+        try:
+            if pending is not None:
+                self._send(publisher=publisher, format_dict=pending[1])
+            return function()
+        finally:
+            with self._condition:
+                # Once closed, no background thread may be left to deliver a snapshot submitted in the meantime
+                pending = self._pending.pop(publisher_id, None) if self._closed else None
+                if pending is None:
+                    self._in_flight.discard(publisher_id)
+                    self._condition.notify_all()
+            if pending is not None:
+                self._deliver(publisher_id=publisher_id, publisher=publisher, format_dict=pending[1])
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """Deliver the remaining snapshots, then stop the background threads."""
+        success = self.flush(timeout=timeout)
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=timeout)
+
+        return success
+
+    def _next_publisher_id(self) -> Optional[int]:
+        for publisher_id in self._pending:
+            if publisher_id not in self._in_flight and publisher_id not in self._reserved:
+                return publisher_id
+        return None
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or self._next_publisher_id() is not None)
+                publisher_id = self._next_publisher_id()
+                if publisher_id is None:  # Closed
+                    return
+
+                publisher, format_dict = self._pending.pop(publisher_id)
+                self._in_flight.add(publisher_id)
+                self._condition.notify_all()
+
+            self._deliver(publisher_id=publisher_id, publisher=publisher, format_dict=format_dict)
+
+    def _send(self, publisher: "TQDMProgressPublisher", format_dict: Dict[str, Any]) -> None:
+        try:
+            publisher._send_to_callbacks(format_dict=format_dict)
+        except Exception:
+            _logger.exception("A callback of the progress bar %s raised an exception.", publisher.progress_bar_id)
+
+    def _deliver(self, publisher_id: int, publisher: "TQDMProgressPublisher", format_dict: Dict[str, Any]) -> None:
+        """Run the callbacks of a publisher marked as in flight."""
+        released = False
+        try:
+            while True:
+                self._send(publisher=publisher, format_dict=format_dict)
+
+                with self._condition:
+                    # Once closed, no background thread may be left to deliver a snapshot submitted in the meantime
+                    if self._closed and publisher_id in self._pending:
+                        publisher, format_dict = self._pending.pop(publisher_id)
+                        continue
+                    self._in_flight.discard(publisher_id)
+                    released = True
+                    self._condition.notify_all()
+                    return
+        finally:
+            if not released:  # E.g., interrupted by a `KeyboardInterrupt`
+                with self._condition:
+                    self._in_flight.discard(publisher_id)
+                    self._condition.notify_all()
+
+
+_shared_dispatcher: Optional[ProgressDispatcher] = None
+_shared_dispatcher_lock = threading.Lock()
+
+
+def get_shared_dispatcher() -> ProgressDispatcher:
+    """Return the dispatcher shared by all publishers created with `dispatcher=True` in this process."""
+    global _shared_dispatcher
+
+    with _shared_dispatcher_lock:
+        if _shared_dispatcher is None:
+            _shared_dispatcher = ProgressDispatcher()
+            atexit.register(_shared_dispatcher.close)
+
+    return _shared_dispatcher
@@ -0,0 +1,171 @@
+import heapq
+import itertools
+import logging
+import threading
+from collections.abc import Mapping
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ._messages import EncodedMessage
+
+_logger = logging.getLogger(__name__)
+
+_MAX_TRACKED_PROGRESS_BARS = 10_000
+
+
+def _is_finished(message: Mapping) -> bool:
+    format_dict = message.get("format_dict")
+    return isinstance(format_dict, Mapping) and format_dict.get("finished", False)
+
+
+def _merge_delta(previous_message: Mapping, message: Mapping) -> Mapping:
+    """Merge the changed entries of a delta message into the previous, undelivered message of its progress bar."""
+    encoder = message._encoder if isinstance(message, EncodedMessage) else None
+    previous_data = previous_message.data if isinstance(previous_message, EncodedMessage) else previous_message
+    data = message.data if isinstance(message, EncodedMessage) else message
+
+    merged = dict(data)
+    merged["format_dict"] = dict(previous_data["format_dict"], **data["format_dict"])
+    merged["delta"] = previous_data.get("delta", False)  # Still a delta only if the previous message was one
+    return merged if encoder is None else EncodedMessage(data=merged, encoder=encoder)
+
+
+class _FlushScheduler:
+    """A single background thread flushing the downsamplers when they are due, started only while any is pending."""
+
+    def __init__(self):
+        self._due: List[Tuple[float, int, "_Downsampler"]] = list()
+        self._counter = itertools.count()  # Breaks the ties between downsamplers due at the same time
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, due_time: float, downsampler: "_Downsampler") -> None:
+        with self._condition:
+            heapq.heappush(self._due, (due_time, next(self._counter), downsampler))
+            if self._thread is None or not self._thread.is_alive():  # Not started, stopped or lost in a fork
+                self._thread = threading.Thread(target=self._run, name="ProgressDownsampler", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._due:
+                    self._thread = None
+                    return
+                due_time, _, downsampler = self._due[0]
+                delay = due_time - monotonic()
+                if delay > 0:
+                    self._condition.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._due)
+
+            try:
+                downsampler.flush()
+            except Exception:
+                _logger.exception("Delivering the downsampled progress messages to a listener failed.")
+
+
+_scheduler = _FlushScheduler()
+
+
+class _Downsampler:
+    """
+    Limit the rate at which the progress messages are delivered to a single listener.
+
+    At most one message per progress bar is delivered every `1 / max_rate` seconds: the messages announced in the
+    meantime replace the undelivered message of their progress bar (their changed entries are merged into it, for
+    progress bars publishing deltas), and the newest ones are delivered together when the interval has elapsed, by a
+    shared background thread. The first message of each progress bar, its `finished` message (see the
+    `publish_finished` argument of `TQDMProgressPublisher`) and the messages without a `progress_bar_id` are always
+    delivered at once, so a listener never misses a progress bar starting or ending.
+    """
+
+    def __init__(self, max_rate: float, deliver: Callable[[Mapping], None]):
+        """
+        Parameters
+        ----------
+        max_rate : float
+            The maximum number of deliveries per second.
+        deliver : callable
+            The function delivering a message to the listener.
+        """
+        if max_rate <= 0:
+            raise ValueError(f"The maximum delivery rate must be positive, not {max_rate}.")
+
+        self.max_rate = max_rate
+        self.interval = 1.0 / max_rate
+        self.deliver = deliver
+        self.closed = False
+
+        self._pending: Dict[Any, Mapping] = dict()  # The undelivered message of each progress bar, in arrival order
+        self._started: Set[Any] = set()  # The progress bars whose first message was delivered
+        self._last_delivery_time = -self.interval
+        self._flush_scheduled = False
+        self._lock = threading.RLock()  # Delivering may evict the listener, which closes the downsampler
+
+    def put(self, message: Mapping) -> None:
+        """Deliver the message now, or keep it as the undelivered message of its progress bar."""
+        progress_bar_id = message.get("progress_bar_id")
+        try:
+            hash(progress_bar_id)
+        except TypeError:  # An unhashable ID, which cannot be tracked
+            progress_bar_id = None
+
+        with self._lock:
+            if self.closed:
+                return
+
+            if progress_bar_id is None:
+                self.deliver(message)
+                return
+
+            if _is_finished(message=message):
+                # The final state supersedes any undelivered one
+                self._pending.pop(progress_bar_id, None)
+                self._started.discard(progress_bar_id)
+                self.deliver(message)
+                return
+
+            if progress_bar_id not in self._started:
+                if len(self._started) >= _MAX_TRACKED_PROGRESS_BARS:  # Progress bars that never finished
+                    self._started.clear()
+                self._started.add(progress_bar_id)
+                self._pending.pop(progress_bar_id, None)
+                self.deliver(message)
+                return
+
+            now = monotonic()
+            if not self._pending and now - self._last_delivery_time >= self.interval:
+                self._last_delivery_time = now
+                self.deliver(message)
+                return
+
+            previous_message = self._pending.get(progress_bar_id)
+            if previous_message is not None and message.get("delta", False):
+                message = _merge_delta(previous_message=previous_message, message=message)
+            self._pending[progress_bar_id] = message
+
+            if not self._flush_scheduled:
+                self._flush_scheduled = True
+                _scheduler.schedule(due_time=self._last_delivery_time + self.interval, downsampler=self)
+
+    def flush(self) -> None:
+        """Deliver the undelivered messages at once."""
+        with self._lock:
+            self._flush_scheduled = False
+            if self.closed or not self._pending:
+                return
+
+            self._last_delivery_time = monotonic()
+            pending, self._pending = self._pending, dict()
+            for message in pending.values():
+                if self.closed:  # The listener was evicted by a delivery
+                    return
+                self.deliver(message)
+
+    def close(self) -> None:
+        """Discard the undelivered messages and ignore the following ones."""
+        with self._lock:
+            self.closed = True
+            self._pending.clear()
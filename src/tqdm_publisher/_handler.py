@@ -1,24 +1,706 @@
+import asyncio
+import contextlib
+import os
 import queue
-from typing import Any, Dict, Iterable, List
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from time import monotonic, perf_counter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
+from ._downsampling import _Downsampler
+from ._instrumentation import ProgressInstrumentation
+from ._journal import ProgressJournal
+from ._listeners import AsyncListener, ConflatingListener
+from ._messages import EncodedMessage, ProgressMessage
+from ._state_store import ProgressStateStore
 from ._subscriber import TQDMProgressSubscriber
 
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block", "disconnect")
+
+
+class _ListenerRecord:
+    """The delivery options, filters, lifecycle and statistics of a single listener."""
+
+    __slots__ = (
+        "listener",
+        "weak_reference",
+        "overflow",
+        "timeout",
+        "dropped_messages",
+        "progress_bar_ids",
+        "metadata",
+        "idle_timeout",
+        "last_active_time",
+        "last_depth",
+        "downsampler",
+    )
+
+    def __init__(
+        self,
+        listener: Any,
+        overflow: str,
+        timeout: float,
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        weak: bool = False,
+        idle_timeout: Optional[float] = None,
+        on_garbage_collected: Optional[Callable[[weakref.ref], None]] = None,
+    ):
+        # Only one of the listener or its weak reference is held
+        self.listener = None if weak else listener
+        self.weak_reference = weakref.ref(listener, on_garbage_collected) if weak else None
+        self.overflow = overflow
+        self.timeout = timeout
+        self.dropped_messages = 0
+        self.progress_bar_ids = None if progress_bar_ids is None else frozenset(progress_bar_ids)
+        self.metadata = dict(metadata) if metadata else None
+        self.idle_timeout = idle_timeout
+        self.last_active_time = monotonic()
+        self.last_depth = 0
+        self.downsampler: Optional[_Downsampler] = None
+
+    @property
+    def is_managed(self) -> bool:
+        """Whether the announcements must check the lifecycle or delivery options of the listener."""
+        return self.weak_reference is not None or self.idle_timeout is not None or self.downsampler is not None
+
+    def get_listener(self) -> Optional[Any]:
+        """Return the listener, or None if it was only weakly referenced and has been garbage collected."""
+        return self.listener if self.weak_reference is None else self.weak_reference()
+
+    def matches_metadata(self, message: Dict[Any, Any]) -> bool:
+        return all(message.get(key, _MISSING) == value for key, value in self.metadata.items())
+
+
+_MISSING = object()
+
+EVICTION_REASONS = ("garbage_collected", "idle", "overflow")
+
 
 class TQDMProgressHandler:
     def __init__(
-        self, queue_cls: queue.Queue = queue.Queue  # Can provide different queue implementations (e.g. asyncio.Queue)
+        self,
+        queue_cls: queue.Queue = queue.Queue,  # Can provide different queue implementations (e.g. asyncio.Queue)
+        encoder: Optional[Callable[[Dict[Any, Any]], Union[bytes, str]]] = None,
+        instrumentation: Optional[ProgressInstrumentation] = None,
+        compact_messages: bool = False,
+        state_maxsize: int = 0,
+        finished_ttl: float = 60.0,
     ):
+        """
+        Parameters
+        ----------
+        queue_cls : type, default: queue.Queue
+            The class of the listeners created by `listen`.
+        encoder : callable, optional
+            A function serializing a message, such as `json.dumps`. If specified, each message is announced as an
+            `EncodedMessage`, whose `encoded` form is computed once and shared by all listeners instead of being
+            serialized again by each of their consumers.
+        instrumentation : ProgressInstrumentation, optional
+            If set, records the duration of each announcement and the depth, high-water mark and enqueue rate of
+            each listener.
+        compact_messages : bool, default: False
+            If True, the progress bars created by `create_progress_subscriber` announce read-only `ProgressMessage`
+            objects, which share their `additional_metadata` instead of merging it into a new dictionary on each
+            update. Use `ProgressMessage.to_dict` where a real dictionary is needed.
+        state_maxsize : int, default: 0
+            The maximum number of progress bars whose latest message is kept, for `snapshot` and for the listeners
+            created with `snapshot=True`. When full, the finished progress bars are forgotten first, then the least
+            recently updated ones. If zero, no state is kept.
+        finished_ttl : float, default: 60.0
+            The number of seconds a progress bar stays in the state after its `finished` message, which the progress
+            bars created by `create_progress_subscriber` send when closed while the state is kept. Expired progress
+            bars are forgotten on the next announcement or snapshot.
+        """
         self._queue = queue_cls
-        self.listeners: List[self._queue] = []
+        self.encoder = encoder
+        self.instrumentation = instrumentation
+        self.compact_messages = compact_messages
+        self.state_maxsize = state_maxsize
+        self.finished_ttl = finished_ttl
+        self.eviction_counts: Dict[str, int] = {reason: 0 for reason in EVICTION_REASONS}
+
+        # The registry of the listeners, keyed by their `id` so that weakly referenced listeners are not kept alive
+        self._listener_records: Dict[int, _ListenerRecord] = dict()
+        self._records_snapshot: Optional[Tuple[_ListenerRecord, ...]] = ()  # Rebuilt after each change, as below
+        self._registry_lock = threading.RLock()
+        self._number_of_managed_listeners = 0  # The weakly referenced, idle timed out and rate limited listeners
+
+        # The routing index: each filtered listener is stored under each of its progress bar IDs, or else under one of
+        # the entries of its metadata filter, so that an announcement only looks up the listeners it may match.
+        # Announcements iterate over a snapshot of the unfiltered listeners, rebuilt after each change. The buckets of
+        # the filtered listeners and the counts of the metadata keys are never modified once stored (copy-on-write):
+        # a change swaps in a new bucket, or a new dictionary of counts, so announcements iterate without locking.
+        self._unfiltered_listeners: Dict[int, _ListenerRecord] = dict()
+        self._unfiltered_snapshot: Optional[Tuple[_ListenerRecord, ...]] = ()
+        self._listeners_by_progress_bar_id: Dict[str, Dict[int, _ListenerRecord]] = dict()
+        self._listeners_by_metadata: Dict[Tuple[str, Any], Dict[int, _ListenerRecord]] = dict()
+        self._metadata_key_counts: Dict[str, int] = dict()
+
+        # The latest message of each progress bar, from the least to the most recently updated, and the time at which
+        # each finished progress bar finished, in the same order as they expire
+        self._states: Dict[Any, Dict[Any, Any]] = OrderedDict()
+        self._finished_times: Dict[Any, float] = OrderedDict()
+        self._state_lock = threading.RLock()
+
+    @property
+    def listeners(self) -> List[Any]:
+        """
+        The subscribed listeners, in the order in which they subscribed.
+
+        It is built from an immutable snapshot of the registry, so it can be read from any thread while others
+        subscribe or unsubscribe listeners.
+        """
+        records_snapshot = self._records_snapshot
+        if records_snapshot is None:
+            with self._registry_lock:
+                records_snapshot = self._records_snapshot = tuple(self._listener_records.values())
+
+        listeners = list()
+        for record in records_snapshot:
+            listener = record.get_listener()
+            if listener is not None:
+                listeners.append(listener)
+        return listeners
+
+    def listen(
+        self,
+        maxsize: int = 0,
+        overflow: str = "drop_oldest",
+        timeout: float = 1.0,
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        weak: bool = False,
+        idle_timeout: Optional[float] = None,
+        snapshot: bool = False,
+        max_rate: Optional[float] = None,
+    ) -> queue.Queue:
+        """
+        Create a new listener that receives every announced message, or only those matching its filters.
+
+        Parameters
+        ----------
+        maxsize : int, default: 0
+            The maximum number of messages held by the listener. If zero or less, the listener is unbounded.
+        overflow : {"drop_oldest", "drop_newest", "block", "disconnect"}, default: "drop_oldest"
+            What to do when a message is announced to a full listener.
+              - "drop_oldest": discard the oldest message held by the listener to make room for the new one.
+              - "drop_newest": discard the new message.
+              - "block": wait up to `timeout` seconds for room, then discard the new message.
+                Only supported by thread-safe queue classes (not `asyncio.Queue`).
+              - "disconnect": discard the new message and evict the listener.
+        timeout : float, default: 1.0
+            The number of seconds to wait for room when `overflow="block"`.
+        progress_bar_ids : iterable of str, optional
+            If set, only the messages of these progress bars are received.
+        metadata : dict, optional
+            If set, only the messages containing all these entries (e.g., the `additional_metadata` of
+            `create_progress_subscriber`, such as `dict(request_id="abc")`) are received. The values must be hashable.
+        weak : bool, default: False
+            If True, the handler only holds a weak reference to the listener, which is evicted as soon as its consumer
+            drops it (e.g., when the generator of a disconnected client is garbage collected).
+        idle_timeout : float, optional
+            If set, the listener is evicted when it held messages for this number of seconds without its consumer
+            reading any of them, which is checked on each announcement.
+        snapshot : bool, default: False
+            If True, the first message received is `{"snapshot": [...]}`, holding the latest message of each known
+            progress bar that matches the filters (see `TQDMProgressHandler.snapshot`), followed by the live messages.
+            Requires a `state_maxsize` for the handler.
+        max_rate : float, optional
+            If set, the maximum number of messages per second delivered for each progress bar, e.g., 1 for a log
+            shipper or 20 for a live display. The messages announced in between replace the undelivered message of
+            their progress bar, and the newest ones are delivered once the interval has elapsed; the first and
+            `finished` messages of each progress bar are always delivered at once. Other listeners are not affected.
+            Only supported by thread-safe queue classes (not `asyncio.Queue`), since the delayed messages are delivered
+            by a background thread; use `alisten` instead.
+
+        Returns
+        -------
+        listener : queue.Queue
+            A new instance of the `queue_cls` of the handler.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}'; expected one of {OVERFLOW_POLICIES}.")
+        if overflow == "block" and issubclass(self._queue, asyncio.Queue):
+            raise ValueError("The 'block' overflow policy cannot be used with an `asyncio.Queue`.")
+        if max_rate is not None and issubclass(self._queue, asyncio.Queue):
+            raise ValueError("A `max_rate` cannot be used with an `asyncio.Queue`; use `alisten` instead.")
 
-    def listen(self) -> queue.Queue:
-        new_queue = self._queue(maxsize=0)
-        self.listeners.append(new_queue)
+        new_queue = self._queue(maxsize=maxsize)
+        self._subscribe(
+            listener=new_queue,
+            overflow=overflow,
+            timeout=timeout,
+            progress_bar_ids=progress_bar_ids,
+            metadata=metadata,
+            weak=weak,
+            idle_timeout=idle_timeout,
+            snapshot=snapshot,
+            max_rate=max_rate,
+        )
         return new_queue
 
+    @contextlib.contextmanager
+    def listening(self, **listen_kwargs) -> Iterator[queue.Queue]:
+        """
+        Create a new listener, as with `listen`, which is unsubscribed when leaving the context.
+
+        Examples
+        --------
+        >>> with handler.listening(metadata=dict(request_id=request_id)) as listener:
+        >>>     while True:
+        >>>         yield listener.get()
+        """
+        listener = self.listen(**listen_kwargs)
+        try:
+            yield listener
+        finally:
+            self.unsubscribe(listener=listener)
+
+    def listen_latest(
+        self,
+        key: str = "progress_bar_id",
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        weak: bool = False,
+        idle_timeout: Optional[float] = None,
+        snapshot: bool = False,
+    ) -> ConflatingListener:
+        """
+        Create a new listener that only keeps the newest message of each progress bar.
+
+        Each read of the listener returns the newest message of every progress bar updated since the previous read.
+
+        Parameters
+        ----------
+        key : str, default: "progress_bar_id"
+            The message entry that identifies the messages that replace one another.
+        progress_bar_ids : iterable of str, optional
+            If set, only the messages of these progress bars are received.
+        metadata : dict, optional
+            If set, only the messages containing all these entries are received; see `listen`.
+        weak : bool, default: False
+            If True, the listener is evicted once garbage collected; see `listen`.
+        idle_timeout : float, optional
+            If set, the listener is evicted once left unread for this number of seconds; see `listen`.
+        snapshot : bool, default: False
+            If True, the listener first receives the current state of the progress bars; see `listen`.
+
+        Returns
+        -------
+        listener : ConflatingListener
+            A new listener, which can be unsubscribed from the handler like any other listener.
+        """
+        new_listener = ConflatingListener(key=key)
+        self._subscribe(
+            listener=new_listener,
+            overflow="drop_oldest",
+            timeout=0.0,
+            progress_bar_ids=progress_bar_ids,
+            metadata=metadata,
+            weak=weak,
+            idle_timeout=idle_timeout,
+            snapshot=snapshot,
+        )
+        return new_listener
+
+    def alisten(
+        self,
+        maxsize: int = 0,
+        overflow: str = "drop_oldest",
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        weak: bool = False,
+        idle_timeout: Optional[float] = None,
+        snapshot: bool = False,
+        max_rate: Optional[float] = None,
+    ) -> AsyncListener:
+        """
+        Create a new listener that delivers every announced message to an asyncio event loop.
+
+        Messages may be announced from any thread (e.g., a worker thread iterating over a progress bar); they are
+        handed over to the event loop safely and in batches.
+
+        Parameters
+        ----------
+        maxsize : int, default: 0
+            The maximum number of messages held by the listener. If zero or less, the listener is unbounded.
+        overflow : {"drop_oldest", "drop_newest", "disconnect"}, default: "drop_oldest"
+            What to do when a message is announced to a full listener; see `listen` for details.
+        loop : asyncio.AbstractEventLoop, optional
+            The event loop of the consumer. Defaults to the running event loop.
+        progress_bar_ids : iterable of str, optional
+            If set, only the messages of these progress bars are received.
+        metadata : dict, optional
+            If set, only the messages containing all these entries are received; see `listen`.
+        weak : bool, default: False
+            If True, the listener is evicted once garbage collected; see `listen`.
+        idle_timeout : float, optional
+            If set, the listener is evicted (which ends its iteration) once left unread for this number of seconds;
+            see `listen`.
+        snapshot : bool, default: False
+            If True, the listener first receives the current state of the progress bars; see `listen`.
+        max_rate : float, optional
+            If set, the maximum number of messages per second delivered for each progress bar; see `listen`.
+
+        Returns
+        -------
+        listener : AsyncListener
+            A new listener, already subscribed to the handler, to be iterated over with `async for`.
+            The iteration ends once the listener is unsubscribed from the handler.
+
+        Examples
+        --------
+        >>> async for message in handler.alisten():
+        >>>     await websocket.send(json.dumps(message))
+        """
+        if overflow not in OVERFLOW_POLICIES or overflow == "block":
+            raise ValueError(f"Unsupported overflow policy '{overflow}' for an asynchronous listener.")
+
+        new_listener = AsyncListener(loop=loop or asyncio.get_running_loop(), maxsize=maxsize)
+        self._subscribe(
+            listener=new_listener,
+            overflow=overflow,
+            timeout=0.0,
+            progress_bar_ids=progress_bar_ids,
+            metadata=metadata,
+            weak=weak,
+            idle_timeout=idle_timeout,
+            snapshot=snapshot,
+            max_rate=max_rate,
+        )
+        return new_listener
+
+    def listen_journal(
+        self,
+        path: Union[str, os.PathLike],
+        capacity: int = 100_000,
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ProgressJournal:
+        """
+        Create a new listener that records the progress of every announced message into a memory-mapped ring file.
+
+        Recording never blocks the announcement. Read the journal with a `ProgressJournalReader`, even while it is
+        being written; it is closed when unsubscribed from the handler.
+
+        Parameters
+        ----------
+        path : path-like
+            The journal file; see `ProgressJournal`.
+        capacity : int, default: 100_000
+            The number of records kept, after which the oldest records are overwritten.
+        progress_bar_ids : iterable of str, optional
+            If set, only the messages of these progress bars are recorded.
+        metadata : dict, optional
+            If set, only the messages containing all these entries are recorded; see `listen`.
+
+        Returns
+        -------
+        listener : ProgressJournal
+            A new journal, already subscribed to the handler.
+        """
+        new_listener = ProgressJournal(path=path, capacity=capacity)
+        self._subscribe(
+            listener=new_listener,
+            overflow="drop_newest",  # Never applied, as a journal is never full
+            timeout=0.0,
+            progress_bar_ids=progress_bar_ids,
+            metadata=metadata,
+        )
+        return new_listener
+
+    def listen_state(
+        self,
+        capacity: int = 1024,
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> ProgressStateStore:
+        """
+        Create a new listener that keeps the latest progress of every progress bar in contiguous typed columns.
+
+        Unlike the state kept by the handler itself (see `state_maxsize`), no message is retained: each announcement
+        only writes a few numbers, and the messages are built when reading a snapshot or a diff of the store. As in
+        that state, the progress bars are forgotten `finished_ttl` seconds after their `finished` message (see the
+        `publish_finished` argument of the progress bars).
+
+        Parameters
+        ----------
+        capacity : int, default: 1024
+            The initial number of progress bars; see `ProgressStateStore`.
+        progress_bar_ids : iterable of str, optional
+            If set, only the progress of these progress bars is kept.
+        metadata : dict, optional
+            If set, only the progress of the messages containing all these entries is kept; see `listen`.
+
+        Returns
+        -------
+        listener : ProgressStateStore
+            A new state store, already subscribed to the handler.
+        """
+        new_listener = ProgressStateStore(capacity=capacity, finished_ttl=self.finished_ttl)
+        self._subscribe(
+            listener=new_listener,
+            overflow="drop_newest",  # Never applied, as a state store is never full
+            timeout=0.0,
+            progress_bar_ids=progress_bar_ids,
+            metadata=metadata,
+        )
+        return new_listener
+
+    def _subscribe(
+        self, listener: Any, snapshot: bool = False, max_rate: Optional[float] = None, **record_kwargs
+    ) -> None:
+        if snapshot and self.state_maxsize <= 0:
+            raise ValueError(
+                "A snapshot requires the handler to keep the state of the progress bars (`state_maxsize`)."
+            )
+
+        listener_id = id(listener)
+        record = _ListenerRecord(
+            listener=listener,
+            on_garbage_collected=lambda weak_reference: self._evict_garbage_collected(
+                listener_id=listener_id, weak_reference=weak_reference
+            ),
+            **record_kwargs,
+        )
+        if max_rate is not None:
+            record.downsampler = _Downsampler(
+                max_rate=max_rate,
+                deliver=lambda message: self._deliver_downsampled(record=record, message=message),
+            )
+
+        # Holding the state while subscribing ensures that no message is missing between the snapshot and the live ones
+        with self._state_lock if snapshot else contextlib.nullcontext():
+            if snapshot:
+                listener.put_nowait(
+                    item=self._encode(
+                        message=dict(
+                            snapshot=self.snapshot(progress_bar_ids=record.progress_bar_ids, metadata=record.metadata)
+                        )
+                    )
+                )
+            self._register(listener_id=listener_id, record=record)
+
+    def _register(self, listener_id: int, record: _ListenerRecord) -> None:
+        with self._registry_lock:
+            self._listener_records[listener_id] = record
+            self._records_snapshot = None
+            if record.is_managed:
+                self._number_of_managed_listeners += 1
+
+            if record.progress_bar_ids is not None:
+                for progress_bar_id in record.progress_bar_ids:
+                    bucket = self._listeners_by_progress_bar_id.get(progress_bar_id, dict())
+                    self._listeners_by_progress_bar_id[progress_bar_id] = {**bucket, listener_id: record}
+            elif record.metadata is not None:
+                index_key = next(iter(record.metadata.items()))
+                bucket = self._listeners_by_metadata.get(index_key, dict())
+                self._listeners_by_metadata[index_key] = {**bucket, listener_id: record}
+                metadata_key_counts = dict(self._metadata_key_counts)
+                metadata_key_counts[index_key[0]] = metadata_key_counts.get(index_key[0], 0) + 1
+                self._metadata_key_counts = metadata_key_counts
+            else:
+                self._unfiltered_listeners[listener_id] = record
+                self._unfiltered_snapshot = None
+
+    def _remove(self, listener_id: int, record: _ListenerRecord) -> bool:
+        """Remove a listener from the registry and the routing index, in time proportional to its buckets."""
+        with self._registry_lock:
+            if self._listener_records.get(listener_id) is not record:
+                return False
+            del self._listener_records[listener_id]
+            self._records_snapshot = None
+            if record.is_managed:
+                self._number_of_managed_listeners -= 1
+
+            if record.progress_bar_ids is not None:
+                for progress_bar_id in record.progress_bar_ids:
+                    bucket = dict(self._listeners_by_progress_bar_id[progress_bar_id])
+                    del bucket[listener_id]
+                    if bucket:
+                        self._listeners_by_progress_bar_id[progress_bar_id] = bucket
+                    else:
+                        del self._listeners_by_progress_bar_id[progress_bar_id]
+            elif record.metadata is not None:
+                index_key = next(iter(record.metadata.items()))
+                bucket = dict(self._listeners_by_metadata[index_key])
+                del bucket[listener_id]
+                if bucket:
+                    self._listeners_by_metadata[index_key] = bucket
+                else:
+                    del self._listeners_by_metadata[index_key]
+                metadata_key_counts = dict(self._metadata_key_counts)
+                metadata_key_counts[index_key[0]] -= 1
+                if metadata_key_counts[index_key[0]] == 0:
+                    del metadata_key_counts[index_key[0]]
+                self._metadata_key_counts = metadata_key_counts
+            else:
+                del self._unfiltered_listeners[listener_id]
+                self._unfiltered_snapshot = None
+
+        if record.downsampler is not None:
+            record.downsampler.close()
+
+        listener = record.get_listener()
+        if listener is not None:
+            if isinstance(listener, (AsyncListener, ProgressJournal)):
+                listener.close()
+            if self.instrumentation is not None:
+                self.instrumentation.forget_listener(listener=listener)
+        return True
+
+    def _evict(self, listener_id: int, record: _ListenerRecord, reason: str) -> None:
+        if self._remove(listener_id=listener_id, record=record):
+            with self._registry_lock:
+                self.eviction_counts[reason] += 1
+
+    def _evict_garbage_collected(self, listener_id: int, weak_reference: weakref.ref) -> None:
+        record = self._listener_records.get(listener_id)
+        if record is not None and record.weak_reference is weak_reference:  # The ID may have been reused since
+            self._evict(listener_id=listener_id, record=record, reason="garbage_collected")
+
+    def _get_matching_records(self, message: Dict[Any, Any]) -> Iterable[_ListenerRecord]:
+        """Look up the listeners whose filters match the message, in time proportional to their number."""
+        unfiltered_snapshot = self._unfiltered_snapshot
+        if unfiltered_snapshot is None:
+            with self._registry_lock:
+                unfiltered_snapshot = self._unfiltered_snapshot = tuple(self._unfiltered_listeners.values())
+
+        metadata_key_counts = self._metadata_key_counts
+        if not self._listeners_by_progress_bar_id and not metadata_key_counts:
+            return unfiltered_snapshot
+
+        candidates = list()
+        try:
+            candidates.extend(self._listeners_by_progress_bar_id.get(message.get("progress_bar_id"), dict()).values())
+        except TypeError:  # An unhashable ID, which cannot be filtered on
+            pass
+        for key in metadata_key_counts:
+            if key in message:
+                try:
+                    candidates.extend(self._listeners_by_metadata.get((key, message[key]), dict()).values())
+                except TypeError:
+                    pass
+
+        if not candidates:
+            return unfiltered_snapshot
+
+        matching_records = list(unfiltered_snapshot)
+        for record in candidates:
+            if record.metadata is None or record.matches_metadata(message=message):
+                matching_records.append(record)
+        return matching_records
+
+    def get_dropped_message_count(self, listener: queue.Queue) -> int:
+        """
+        Return the number of messages that were discarded because the listener was full.
+
+        Raises a `KeyError` if the listener is not (or no longer) subscribed to the handler.
+        """
+        return self._listener_records[id(listener)].dropped_messages
+
+    def snapshot(
+        self, progress_bar_ids: Optional[Iterable[str]] = None, metadata: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[Any, Any]]:
+        """
+        Return the latest message of each known progress bar, from the least to the most recently updated.
+
+        Only available when the handler keeps the state of the progress bars (see `state_maxsize`). The messages of
+        progress bars publishing deltas are merged into their full state.
+
+        Parameters
+        ----------
+        progress_bar_ids : iterable of str, optional
+            If set, only the messages of these progress bars are returned.
+        metadata : dict, optional
+            If set, only the messages containing all these entries are returned.
+
+        Returns
+        -------
+        messages : list of dict
+            The latest messages, as dictionaries.
+        """
+        if progress_bar_ids is not None:
+            progress_bar_ids = frozenset(progress_bar_ids)
+
+        messages = list()
+        with self._state_lock:
+            self._expire_finished_states(now=monotonic())
+            for message in self._states.values():
+                if progress_bar_ids is not None and message.get("progress_bar_id") not in progress_bar_ids:
+                    continue
+                if metadata and any(message.get(key, _MISSING) != value for key, value in metadata.items()):
+                    continue
+                messages.append(message.to_dict() if isinstance(message, ProgressMessage) else message)
+        return messages
+
+    def _record_state(self, message: Dict[Any, Any]) -> None:
+        """Keep the message as the latest state of its progress bar."""
+        if isinstance(message, EncodedMessage):
+            message = message.data
+
+        progress_bar_id = message.get("progress_bar_id")
+        if progress_bar_id is None:
+            return
+        try:
+            hash(progress_bar_id)
+        except TypeError:  # An unhashable ID, which cannot be tracked
+            return
+
+        now = monotonic()
+        with self._state_lock:
+            self._expire_finished_states(now=now)
+
+            previous_message = self._states.get(progress_bar_id)
+            if previous_message is None:
+                if len(self._states) >= self.state_maxsize:
+                    if self._finished_times:
+                        evicted_progress_bar_id, _ = self._finished_times.popitem(last=False)
+                        del self._states[evicted_progress_bar_id]
+                    else:
+                        self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(progress_bar_id)
+                if message.get("delta", False):  # Merge the changed entries into the full state
+                    format_dict = dict(previous_message["format_dict"])
+                    format_dict.update(message["format_dict"])
+                    message = {key: value for key, value in message.items() if key != "delta"}
+                    message["format_dict"] = format_dict
+            self._states[progress_bar_id] = message
+
+            format_dict = message.get("format_dict")
+            if isinstance(format_dict, Mapping) and format_dict.get("finished", False):
+                self._finished_times.pop(progress_bar_id, None)
+                self._finished_times[progress_bar_id] = now
+
+    def _expire_finished_states(self, now: float) -> None:
+        """Forget the progress bars that finished more than `finished_ttl` seconds ago, oldest first."""
+        while self._finished_times:
+            progress_bar_id, finished_time = next(iter(self._finished_times.items()))
+            if now - finished_time < self.finished_ttl:
+                return
+            del self._finished_times[progress_bar_id]
+            self._states.pop(progress_bar_id, None)
+
     def create_progress_subscriber(
         self, *tqdm_args, additional_metadata: dict = dict(), **tqdm_kwargs
     ) -> TQDMProgressSubscriber:
+        if self.state_maxsize > 0:
+            tqdm_kwargs.setdefault("publish_finished", True)  # To let the state expire once the progress bar closes
+
+        if self.compact_messages:
+            return TQDMProgressSubscriber(
+                *tqdm_args,
+                on_progress_update=self.announce,
+                compact_messages=True,
+                metadata=MappingProxyType(dict(additional_metadata)) if additional_metadata else None,
+                **tqdm_kwargs,
+            )
 
         def on_progress_update(progress_update: dict):
             """
@@ -35,21 +717,107 @@ class TQDMProgressHandler:
 
     def announce(self, message: Dict[Any, Any]):
         """
-        Announce a message to all listeners.
+        Announce a message to all listeners whose filters match it.
 
         This message can be any dictionary. But, when used internally, is
         expected to contain the progress_bar_id and format_dict of the TQDMProgressSubscriber update function,
         as well as any additional metadata supplied by the create_progress_subscriber method.
 
+        Messages announced to a full listener are handled according to the overflow policy of that listener, so this
+        never raises `queue.Full` into the loop that produces the progress.
+
+        If the handler has an `encoder`, the listeners receive the message as an `EncodedMessage`.
+        If it keeps the state of the progress bars (see `state_maxsize`), the message becomes the latest state of its
+        progress bar.
         """
-        number_of_listeners = len(self.listeners)
-        listener_indices = range(number_of_listeners)
-        for listener_index in listener_indices:
-            self.listeners[listener_index].put_nowait(item=message)
+        message = self._encode(message=message)
+        if self.state_maxsize > 0:
+            self._record_state(message=message)
+
+        records = self._get_matching_records(message=message)
+        if self.instrumentation is None and self._number_of_managed_listeners == 0:
+            for record in records:
+                try:
+                    record.listener.put_nowait(item=message)
+                except (queue.Full, asyncio.QueueFull):
+                    self._handle_overflow(listener=record.listener, record=record, message=message)
+            return
+
+        start = None if self.instrumentation is None else perf_counter()
+        for record in records:
+            listener = record.listener
+            if listener is None:
+                listener = record.weak_reference()
+                if listener is None:  # Garbage collected; about to be evicted
+                    continue
+
+            if record.idle_timeout is not None:
+                depth = listener.qsize()
+                now = monotonic()
+                if (
+                    depth == 0 or depth < record.last_depth
+                ):  # The consumer read messages since the previous announcement
+                    record.last_active_time = now
+                elif now - record.last_active_time > record.idle_timeout:
+                    self._evict(listener_id=id(listener), record=record, reason="idle")
+                    continue
+
+            if record.downsampler is not None:
+                record.downsampler.put(message=message)
+            else:
+                self._deliver(listener=listener, record=record, message=message)
+
+        if start is not None:
+            self.instrumentation.record_announcement(seconds=perf_counter() - start)
+
+    def _deliver(self, listener: Any, record: _ListenerRecord, message: Dict[Any, Any]) -> None:
+        try:
+            listener.put_nowait(item=message)
+        except (queue.Full, asyncio.QueueFull):
+            self._handle_overflow(listener=listener, record=record, message=message)
+
+        if record.idle_timeout is not None:
+            record.last_depth = listener.qsize()
+        if self.instrumentation is not None:
+            self.instrumentation.record_enqueue(listener=listener, depth=listener.qsize())
+
+    def _deliver_downsampled(self, record: _ListenerRecord, message: Dict[Any, Any]) -> None:
+        """Deliver a message released by the downsampler of a listener, possibly from the background thread."""
+        listener = record.get_listener()
+        if listener is not None:
+            self._deliver(listener=listener, record=record, message=message)
+
+    def _encode(self, message: Dict[Any, Any]) -> Dict[Any, Any]:
+        if self.encoder is not None and not isinstance(message, EncodedMessage):
+            return EncodedMessage(data=message, encoder=self.encoder)
+        return message
+
+    def _handle_overflow(self, listener: queue.Queue, record: _ListenerRecord, message: Dict[Any, Any]) -> None:
+        if record.overflow == "drop_oldest":
+            try:
+                listener.get_nowait()
+                listener.task_done()
+                listener.put_nowait(item=message)
+            except (queue.Empty, asyncio.QueueEmpty):  # The consumer emptied the listener in the meantime
+                listener.put_nowait(item=message)
+                return
+            except (queue.Full, asyncio.QueueFull):  # Another producer refilled the listener in the meantime
+                record.dropped_messages += 1
+        elif record.overflow == "block":
+            try:
+                listener.put(item=message, timeout=record.timeout)
+                return
+            except queue.Full:
+                pass
+        elif record.overflow == "disconnect":
+            self._evict(listener_id=id(listener), record=record, reason="overflow")
+
+        record.dropped_messages += 1
 
     def unsubscribe(self, listener: queue.Queue) -> bool:
         """
-        Unsubscribe a listener from the handler.
+        Unsubscribe a listener from the handler, without visiting the other listeners (except for those sharing one
+        of its filters).
 
         Args:
             listener: The listener to unsubscribe.
@@ -57,8 +825,7 @@ class TQDMProgressHandler:
         Returns:
             bool: True if the listener was successfully unsubscribed, False otherwise.
         """
-        try:
-            self.listeners.remove(listener)
-            return True
-        except ValueError:
+        record = self._listener_records.get(id(listener))
+        if record is None or record.get_listener() is not listener:
             return False
+        return self._remove(listener_id=id(listener), record=record)
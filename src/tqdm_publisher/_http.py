@@ -0,0 +1,166 @@
+import http.client
+import logging
+import time
+import urllib.parse
+from typing import Any, Dict, List, Optional, Type, Union
+
+from ._batching import BatchingSender
+from ._codecs import BinaryCodec, JSONCodec
+from ._handler import TQDMProgressHandler
+
+_logger = logging.getLogger(__name__)
+
+
+class HTTPProgressForwarder(BatchingSender):
+    """
+    Forward progress messages to an HTTP endpoint, in batches, over a persistent connection.
+
+    Messages (e.g., from the subscribers created by `create_progress_subscriber`, possibly from several progress bars)
+    are collected and sent by a background thread as a single JSON request body of the form `{"messages": [...]}`
+    whenever `max_batch_size` messages are waiting or the oldest waiting message is `max_batch_interval` seconds old.
+    The receiving end can announce them on its own `TQDMProgressHandler` with `announce_progress_batch`.
+
+    With `codec=BinaryCodec`, the batches are sent in the compact binary format instead. A new codec is used for each
+    batch so that every request can be decoded on its own, even when a previous one was dropped.
+
+    Like the `ProcessProgressSender`, it is picklable so it can be passed to worker processes.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_batch_size: int = 100,
+        max_batch_interval: float = 0.5,
+        maxsize: int = 10_000,
+        max_retries: int = 3,
+        retry_interval: float = 0.5,
+        timeout: float = 10.0,
+        codec: Type[Union[JSONCodec, BinaryCodec]] = JSONCodec,
+    ):
+        """
+        Parameters
+        ----------
+        url : str
+            The URL of the endpoint receiving the batches with POST requests.
+        max_batch_size : int, default: 100
+            The number of waiting messages after which a batch is sent.
+        max_batch_interval : float, default: 0.5
+            The age, in seconds, of the oldest waiting message after which a batch is sent.
+        maxsize : int, default: 10,000
+            The maximum number of waiting messages, after which the oldest ones are dropped.
+        max_retries : int, default: 3
+            The number of times a batch is sent again after a connection error or a server error (5xx status),
+            before it is dropped.
+        retry_interval : float, default: 0.5
+            The number of seconds to wait before the first retry; the wait doubles with each following retry.
+        timeout : float, default: 10.0
+            The timeout, in seconds, of the connection to the endpoint.
+        codec : JSONCodec or BinaryCodec class, default: JSONCodec
+            The codec encoding each batch; the receiving end must decode it with the same codec.
+        """
+        super().__init__(max_batch_size=max_batch_size, max_batch_interval=max_batch_interval, maxsize=maxsize)
+        self.url = url
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.codec = codec
+
+        self._connection: Optional[http.client.HTTPConnection] = None
+
+    def _get_parameters(self) -> Dict[str, Any]:
+        return dict(
+            super()._get_parameters(),
+            url=self.url,
+            max_retries=self.max_retries,
+            retry_interval=self.retry_interval,
+            timeout=self.timeout,
+            codec=self.codec,
+        )
+
+    def _send_batch(self, batch: List[Dict[Any, Any]]) -> None:
+        body = self.codec().encode_batch(messages=batch)
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                time.sleep(self.retry_interval * 2 ** (attempt - 1))
+
+            try:
+                status = self._post(body=body)
+            except (OSError, http.client.HTTPException) as exception:
+                _logger.debug("Failed to forward the progress to %s: %s", self.url, exception)
+                self._close_connection()
+                continue
+
+            if status < 500:
+                if status >= 400:
+                    _logger.warning("The progress was rejected by %s with the status %s.", self.url, status)
+                return
+
+        _logger.warning("Dropped %s progress messages after %s retries to %s.", len(batch), self.max_retries, self.url)
+        with self._condition:
+            self.dropped_messages += len(batch)
+
+    def _post(self, body: bytes) -> int:
+        parsed_url = urllib.parse.urlsplit(self.url)
+        if self._connection is None:
+            connection_class = (
+                http.client.HTTPSConnection if parsed_url.scheme == "https" else http.client.HTTPConnection
+            )
+            self._connection = connection_class(host=parsed_url.netloc, timeout=self.timeout)
+
+        path = parsed_url.path or "/"
+        if parsed_url.query:
+            path += f"?{parsed_url.query}"
+
+        self._connection.request(method="POST", url=path, body=body, headers={"Content-Type": self.codec.content_type})
+        response = self._connection.getresponse()
+        response.read()  # The response must be read entirely before the connection can be reused
+        if response.will_close:
+            self._close_connection()
+
+        return response.status
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def announce_progress_batch(
+    handler: TQDMProgressHandler,
+    body: Union[bytes, str, Dict[str, Any]],
+    codec: Type[Union[JSONCodec, BinaryCodec]] = JSONCodec,
+) -> int:
+    """
+    Announce on a handler each message of a batch sent by an `HTTPProgressForwarder`.
+
+    Parameters
+    ----------
+    handler : TQDMProgressHandler
+        The handler on which the messages are announced.
+    body : bytes, str or dict
+        The body of the request, either as received or already decoded from JSON.
+    codec : JSONCodec or BinaryCodec class, default: JSONCodec
+        The codec of the `HTTPProgressForwarder` that sent the batch.
+
+    Returns
+    -------
+    number_of_messages : int
+        The number of announced messages.
+
+    Examples
+    --------
+    >>> @app.route("/update", methods=["POST"])
+    >>> def update():
+    >>>     announce_progress_batch(handler=progress_handler, body=request.data)
+    >>>     return jsonify({"status": "success"})
+    """
+    if isinstance(body, dict):
+        messages = body["messages"]
+    else:
+        messages = codec().decode_batch(data=body.encode() if isinstance(body, str) else body)
+
+    for message in messages:
+        handler.announce(message=message)
+
+    return len(messages)
@@ -0,0 +1,227 @@
+import bisect
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+# The upper bounds, in seconds, of the buckets of the latency histograms; the last bucket is unbounded
+LATENCY_BUCKETS = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1, 1.0)
+
+
+class _LatencyMetrics:
+    """The number, total, maximum and histogram of the durations of an operation."""
+
+    __slots__ = ("count", "total_seconds", "max_seconds", "histogram")
+
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record(self, seconds: float) -> None:
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(
+            count=self.count,
+            total_seconds=self.total_seconds,
+            mean_seconds=self.total_seconds / self.count if self.count else 0.0,
+            max_seconds=self.max_seconds,
+            histogram=list(self.histogram),
+        )
+
+
+class _CallbackMetrics:
+    __slots__ = ("progress_bar_id", "latency", "number_of_exceptions", "last_exception")
+
+    def __init__(self, progress_bar_id: str):
+        self.progress_bar_id = progress_bar_id
+        self.latency = _LatencyMetrics()
+        self.number_of_exceptions = 0
+        self.last_exception = None
+
+
+class _ListenerMetrics:
+    __slots__ = (
+        "listener_reference",
+        "listener_type",
+        "number_of_enqueued_messages",
+        "high_water_mark",
+        "window_start",
+        "window_count",
+        "hook_window_start",
+        "hook_window_count",
+    )
+
+    def __init__(self, listener: Any):
+        self.listener_reference = weakref.ref(listener)  # The metrics must not keep an abandoned listener alive
+        self.listener_type = type(listener).__name__
+        self.number_of_enqueued_messages = 0
+        self.high_water_mark = 0
+        # The manual snapshots and the hook measure the enqueue rate over their own windows
+        self.window_start = self.hook_window_start = time.perf_counter()
+        self.window_count = self.hook_window_count = 0
+
+
+class ProgressInstrumentation:
+    """
+    Collect metrics about the delivery of progress, to find out whether a lagging consumer is caused by a slow callback
+    of a `TQDMProgressPublisher` or by a backed-up listener of a `TQDMProgressHandler`.
+
+    Pass the same instance as the `instrumentation` argument of any number of publishers and handlers, then read the
+    metrics with `snapshot`, or have them passed periodically to a `hook`. Publishers and handlers without an
+    instrumentation only pay for a single check on each publication or announcement.
+
+    The latency histograms count the durations up to each bound of `latency_buckets` (in seconds), with a last bucket
+    for the longer ones.
+    """
+
+    latency_buckets = LATENCY_BUCKETS
+
+    def __init__(self, hook: Optional[Callable[[Dict[str, Any]], Any]] = None, hook_interval: float = 1.0):
+        """
+        Parameters
+        ----------
+        hook : callable, optional
+            Called with a `snapshot` of the metrics at most every `hook_interval` seconds, from the thread that
+            records a metric once the interval has passed.
+        hook_interval : float, default: 1.0
+            The minimum number of seconds between two calls of the `hook`.
+        """
+        self.hook = hook
+        self.hook_interval = hook_interval
+
+        self._lock = threading.RLock()
+        self._callbacks: Dict[str, _CallbackMetrics] = dict()
+        self._listeners: Dict[int, _ListenerMetrics] = dict()
+        self._announcements = _LatencyMetrics()
+        self._last_hook_time = time.perf_counter()
+
+    def record_callback(
+        self, callback_id: str, progress_bar_id: str, seconds: float, exception: Optional[BaseException] = None
+    ) -> None:
+        """Record a call of the callback of a publisher, which lasted `seconds` and may have raised an exception."""
+        with self._lock:
+            metrics = self._callbacks.get(callback_id)
+            if metrics is None:
+                metrics = self._callbacks[callback_id] = _CallbackMetrics(progress_bar_id=progress_bar_id)
+            metrics.latency.record(seconds=seconds)
+            if exception is not None:
+                metrics.number_of_exceptions += 1
+                metrics.last_exception = repr(exception)
+        self._call_hook_if_due()
+
+    def forget_callback(self, callback_id: str) -> None:
+        """Discard the metrics of an unsubscribed callback."""
+        with self._lock:
+            self._callbacks.pop(callback_id, None)
+
+    def record_enqueue(self, listener: Any, depth: int) -> None:
+        """Record a message put in a listener, which then holds `depth` messages."""
+        with self._lock:
+            metrics = self._listeners.get(id(listener))
+            if metrics is None:
+                metrics = self._listeners[id(listener)] = _ListenerMetrics(listener=listener)
+            metrics.number_of_enqueued_messages += 1
+            metrics.window_count += 1
+            metrics.hook_window_count += 1
+            if depth > metrics.high_water_mark:
+                metrics.high_water_mark = depth
+
+    def forget_listener(self, listener: Any) -> None:
+        """Discard the metrics of an unsubscribed listener."""
+        with self._lock:
+            self._listeners.pop(id(listener), None)
+
+    def record_announcement(self, seconds: float) -> None:
+        """Record an announcement of a handler to all its listeners, which lasted `seconds`."""
+        with self._lock:
+            self._announcements.record(seconds=seconds)
+        self._call_hook_if_due()
+
+    def _call_hook_if_due(self) -> None:
+        if self.hook is None:
+            return
+
+        now = time.perf_counter()
+        with self._lock:
+            if now - self._last_hook_time < self.hook_interval:
+                return
+            self._last_hook_time = now
+        self.hook(self._snapshot(for_hook=True, reset=True))
+
+    def snapshot(self, reset: bool = False) -> Dict[str, Any]:
+        """
+        Return the current metrics.
+
+        Parameters
+        ----------
+        reset : bool, default: False
+            Whether to start a new window for the `enqueue_rate` of the listeners. The `hook` measures its rates over
+            a window of its own, which is not affected.
+
+        Returns
+        -------
+        metrics : dict
+            - "callbacks": for each `callback_id`, its `progress_bar_id`, the `latency` of its calls (`count`,
+              `total_seconds`, `mean_seconds`, `max_seconds` and `histogram`), the `number_of_exceptions` it raised
+              and the `last_exception`.
+            - "listeners": for each listener, its `listener_type`, current `depth`, `high_water_mark`,
+              `number_of_enqueued_messages` and `enqueue_rate`, in messages per second since the previous snapshot
+              with `reset=True`, or since the first message put in the listener. The snapshots passed to the `hook`
+              measure it since the previous call of the `hook`.
+            - "announcements": the `latency` of the announcements of the handlers.
+        """
+        return self._snapshot(for_hook=False, reset=reset)
+
+    def _snapshot(self, for_hook: bool, reset: bool) -> Dict[str, Any]:
+        now = time.perf_counter()
+        with self._lock:
+            callbacks = {
+                callback_id: dict(
+                    progress_bar_id=metrics.progress_bar_id,
+                    latency=metrics.latency.to_dict(),
+                    number_of_exceptions=metrics.number_of_exceptions,
+                    last_exception=metrics.last_exception,
+                )
+                for callback_id, metrics in self._callbacks.items()
+            }
+
+            listeners = list()
+            for listener_id, metrics in tuple(self._listeners.items()):
+                listener = metrics.listener_reference()
+                if listener is None:
+                    del self._listeners[listener_id]
+                    continue
+
+                window_start, window_count = (
+                    (metrics.hook_window_start, metrics.hook_window_count)
+                    if for_hook
+                    else (metrics.window_start, metrics.window_count)
+                )
+                elapsed = now - window_start
+                listeners.append(
+                    dict(
+                        listener_id=listener_id,
+                        listener_type=metrics.listener_type,
+                        depth=listener.qsize(),
+                        high_water_mark=metrics.high_water_mark,
+                        number_of_enqueued_messages=metrics.number_of_enqueued_messages,
+                        enqueue_rate=window_count / elapsed if elapsed > 0 else 0.0,
+                    )
+                )
+                if not reset:
+                    continue
+                if for_hook:
+                    metrics.hook_window_start, metrics.hook_window_count = now, 0
+                else:
+                    metrics.window_start, metrics.window_count = now, 0
+
+            announcements = self._announcements.to_dict()
+
+        return dict(callbacks=callbacks, listeners=listeners, announcements=announcements)
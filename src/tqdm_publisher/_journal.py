@@ -0,0 +1,306 @@
+import hashlib
+import mmap
+import os
+import queue
+import struct
+import threading
+from collections.abc import Mapping
+from time import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+from uuid import UUID
+
+from ._codecs import _is_canonical_uuid
+from ._messages import _from_float, _to_float
+
+# The header of the journal file: magic, version, record size, capacity and number of records ever written
+_HEADER = struct.Struct("<8sIIQQ")
+_HEADER_SIZE = 64
+_MAGIC = b"TQDMJRNL"
+_VERSION = 1
+
+# Each record starts and ends with its sequence number (one-based, zero for an empty slot), so that a reader can skip
+# a record that is being overwritten: sequence, timestamp, key, n, total, elapsed, rate, prefix, flags, sequence
+_RECORD = struct.Struct("<Qd16sdddd32sB7xQ")
+_PREFIX_SIZE = 32
+
+# The flags of a record: whether the progress bar finished, and how its ID is stored in the 16-byte key
+_FINISHED = 0b001
+_UUID_KEY = 0b000  # The 16 bytes of a UUID string
+_TEXT_KEY = 0b010  # The encoded ID, padded with zeros, when it is at most 16 bytes long
+_HASHED_KEY = 0b100  # The BLAKE2b hash of any other ID, which cannot be restored
+_KEY_KINDS = _TEXT_KEY | _HASHED_KEY
+
+_MAX_CACHED_KEYS = 10_000
+
+
+def _get_key(progress_bar_id: Any) -> Tuple[bytes, int]:
+    """Return the 16-byte key of a progress bar ID and its kind."""
+    text = str(progress_bar_id)
+    if _is_canonical_uuid(text):
+        return UUID(text).bytes, _UUID_KEY
+
+    encoded = text.encode()
+    if len(encoded) <= 16 and not encoded.endswith(b"\0"):
+        return encoded.ljust(16, b"\0"), _TEXT_KEY
+    return hashlib.blake2b(encoded, digest_size=16).digest(), _HASHED_KEY
+
+
+def _get_progress_bar_id(key: bytes, flags: int) -> str:
+    key_kind = flags & _KEY_KINDS
+    if key_kind == _UUID_KEY:
+        return str(UUID(bytes=key))
+    if key_kind == _TEXT_KEY:
+        return key.rstrip(b"\0").decode()
+    return key.hex()
+
+
+def _open_mapping(path: Union[str, os.PathLike], capacity: int) -> Tuple[mmap.mmap, int]:
+    """Map the journal file, creating it if it is missing or empty, or else resuming the journal it holds."""
+    size = _HEADER_SIZE + capacity * _RECORD.size
+    with open(path, "r+b" if os.path.exists(path) else "w+b") as file:
+        existing_size = os.fstat(file.fileno()).st_size
+        if existing_size == 0:
+            file.truncate(size)  # A file of zeros, i.e., of empty slots
+            file.write(_HEADER.pack(_MAGIC, _VERSION, _RECORD.size, capacity, 0))
+            file.flush()
+            return mmap.mmap(file.fileno(), size), 0  # The mapping outlives the file object
+
+        header = file.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header)[:3] != (_MAGIC, _VERSION, _RECORD.size):
+            raise ValueError(f"'{path}' already exists and is not a progress journal.")
+        existing_capacity, number_of_written_records = _HEADER.unpack(header)[3:]
+        if existing_capacity != capacity or existing_size != size:
+            raise ValueError(
+                f"'{path}' is a progress journal with a capacity of {existing_capacity} records, not {capacity}."
+            )
+
+        return mmap.mmap(file.fileno(), size), number_of_written_records
+
+
+class ProgressJournal:
+    """
+    A listener that appends the progress of every announced message to a memory-mapped ring file.
+
+    Each message is written as a fixed-size binary record of the time, the progress bar ID and the `n`, `total`,
+    `elapsed`, `rate`, `prefix` (i.e., `desc`) and `finished` entries of its `format_dict`. Once the file holds
+    `capacity` records, each new record overwrites the oldest one, so the disk use is bounded. Writing a record only
+    copies it into memory, so `put_nowait` never blocks (and never fails) the `announce` of a handler; the operating
+    system writes the pages to disk in the background, or on `flush`.
+
+    Create it with `TQDMProgressHandler.listen_journal`, and read it (even while it is being written) with a
+    `ProgressJournalReader`. Messages without a `format_dict` are ignored; the messages of progress bars publishing
+    deltas only hold the entries that changed, the others being recorded as missing.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], capacity: int = 100_000):
+        """
+        Parameters
+        ----------
+        path : path-like
+            The journal file. An existing journal with the same capacity is appended to, and a missing or empty file is
+            created; any other file is left untouched and raises a ValueError.
+        capacity : int, default: 100_000
+            The number of records kept, i.e., the file holds `capacity * 112` bytes plus a small header.
+        """
+        if capacity < 1:
+            raise ValueError(f"The capacity of a journal must be positive, not {capacity}.")
+
+        self.path = path
+        self.capacity = capacity
+        self._mapping, self.number_of_written_records = _open_mapping(path=path, capacity=capacity)
+        self._lock = threading.Lock()
+        self._keys: Dict[Any, Tuple[bytes, int]] = dict()  # The keys of the known progress bar IDs
+        self.closed = False
+
+    def put_nowait(self, item: Mapping) -> None:
+        """Append the progress of a message to the journal."""
+        format_dict = item.get("format_dict")
+        if not isinstance(format_dict, Mapping):
+            return
+
+        progress_bar_id = item.get("progress_bar_id")
+        key = self._keys.get(progress_bar_id)
+        if key is None:
+            if len(self._keys) >= _MAX_CACHED_KEYS:  # Progress bars that never finished
+                self._keys.clear()
+            key = self._keys[progress_bar_id] = _get_key(progress_bar_id=progress_bar_id)
+        key_bytes, flags = key
+        if format_dict.get("finished", False):
+            flags |= _FINISHED
+            self._keys.pop(progress_bar_id, None)  # No more records are expected for this progress bar
+
+        prefix = format_dict.get("prefix") or ""
+        values = (
+            key_bytes,
+            _to_float(format_dict.get("n")),
+            _to_float(format_dict.get("total")),
+            _to_float(format_dict.get("elapsed")),
+            _to_float(format_dict.get("rate")),
+            prefix.encode()[:_PREFIX_SIZE],
+            flags,
+        )
+
+        with self._lock:
+            if self.closed:
+                return
+            sequence = self.number_of_written_records + 1
+            slot = self.number_of_written_records % self.capacity
+            _RECORD.pack_into(self._mapping, _HEADER_SIZE + slot * _RECORD.size, sequence, time(), *values, sequence)
+            self.number_of_written_records = sequence
+            struct.pack_into("<Q", self._mapping, _HEADER.size - 8, sequence)
+
+    def get_nowait(self) -> None:
+        """A journal is only written to; read it with a `ProgressJournalReader`."""
+        raise queue.Empty
+
+    def task_done(self) -> None:
+        pass
+
+    def qsize(self) -> int:
+        return 0
+
+    def empty(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        """Write the records to disk."""
+        with self._lock:
+            if not self.closed:
+                self._mapping.flush()
+
+    def close(self) -> None:
+        """Write the records to disk and unmap the file; the following messages are ignored."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._mapping.flush()
+            self._mapping.close()
+
+    def __enter__(self) -> "ProgressJournal":
+        return self
+
+    def __exit__(self, *exception_info) -> None:
+        self.close()
+
+
+class ProgressJournalReader:
+    """
+    Scan the records of a journal written by a `ProgressJournal`, possibly while it is being written.
+
+    Examples
+    --------
+    >>> reader = ProgressJournalReader(path="progress.journal")
+    >>> for message in reader.read(progress_bar_ids=[progress_bar_id], start_time=time.time() - 3600):
+    >>>     print(message["timestamp"], message["format_dict"]["rate"])
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        """
+        Parameters
+        ----------
+        path : path-like
+            The journal file.
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            magic, version, record_size, self.capacity, _ = _HEADER.unpack(file.read(_HEADER.size))
+        if magic != _MAGIC or version != _VERSION or record_size != _RECORD.size:
+            raise ValueError(f"'{path}' is not a progress journal.")
+
+    def read(
+        self,
+        progress_bar_ids: Optional[Iterable[str]] = None,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the records, from the oldest to the newest, as messages.
+
+        Parameters
+        ----------
+        progress_bar_ids : iterable of str, optional
+            If set, only the records of these progress bars are returned.
+        start_time : float, optional
+            If set, only the records written at or after this time (as returned by `time.time`) are returned.
+        end_time : float, optional
+            If set, only the records written at or before this time are returned.
+
+        Yields
+        ------
+        message : dict
+            The `progress_bar_id`, the `timestamp` of the record and a `format_dict` holding its `n`, `total`,
+            `elapsed`, `rate` and `prefix` (and `finished=True` for the final record of a progress bar).
+            The IDs longer than 16 bytes that are not UUIDs are stored as a hash, returned in hexadecimal.
+        """
+        keys = (
+            None if progress_bar_ids is None else {_get_key(progress_bar_id)[0] for progress_bar_id in progress_bar_ids}
+        )
+
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            number_of_written_records = _HEADER.unpack_from(mapping, 0)[4]
+            if number_of_written_records == 0:
+                return
+            first_sequence = max(1, number_of_written_records - self.capacity + 1)
+
+            # The records in ring order: from the oldest slot to the end of the file, then from the start of the file
+            first_slot = (first_sequence - 1) % self.capacity
+            last_slot = (number_of_written_records - 1) % self.capacity + 1
+            if first_slot < last_slot:
+                ranges = ((first_slot, last_slot),)
+            else:
+                ranges = ((first_slot, self.capacity), (0, last_slot))
+
+            for start_slot, end_slot in ranges:
+                data = mapping[_HEADER_SIZE + start_slot * _RECORD.size : _HEADER_SIZE + end_slot * _RECORD.size]
+                for (
+                    sequence,
+                    timestamp,
+                    key,
+                    n,
+                    total,
+                    elapsed,
+                    rate,
+                    prefix,
+                    flags,
+                    end_sequence,
+                ) in _RECORD.iter_unpack(data):
+                    if sequence != end_sequence or sequence < first_sequence:  # Being overwritten, or overwritten since
+                        continue
+                    if start_time is not None and timestamp < start_time:
+                        continue
+                    # The records are not necessarily in time order, e.g., across the writers of a resumed journal
+                    if end_time is not None and timestamp > end_time:
+                        continue
+                    if keys is not None and key not in keys:
+                        continue
+
+                    format_dict = dict(
+                        n=_from_float(n),
+                        total=_from_float(total),
+                        elapsed=_from_float(elapsed),
+                        rate=_from_float(rate),
+                        prefix=prefix.rstrip(b"\0").decode(errors="replace"),
+                    )
+                    if flags & _FINISHED:
+                        format_dict["finished"] = True
+                    yield dict(
+                        progress_bar_id=_get_progress_bar_id(key=key, flags=flags),
+                        timestamp=timestamp,
+                        format_dict=format_dict,
+                    )
+
+    def replay(self, handler: Any, **read_kwargs) -> int:
+        """
+        Announce the records (optionally filtered as with `read`) on a `TQDMProgressHandler`, as fast as possible.
+
+        Returns
+        -------
+        number_of_messages : int
+            The number of announced messages.
+        """
+        number_of_messages = 0
+        for message in self.read(**read_kwargs):
+            handler.announce(message=message)
+            number_of_messages += 1
+        return number_of_messages
@@ -0,0 +1,209 @@
+import asyncio
+import collections
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+from ._downsampling import _merge_delta
+
+
+class ConflatingListener:
+    """
+    A listener that only holds the newest message of each progress bar.
+
+    Its memory and the work of its consumer grow with the number of active progress bars rather than with the
+    number of updates, which suits consumers that redraw at their own pace (e.g., a dashboard refreshing at 10 Hz).
+
+    It exposes the subset of the `queue.Queue` interface used by the `TQDMProgressHandler` and is safe to share
+    between the producing and consuming threads.
+    """
+
+    def __init__(self, key: str = "progress_bar_id"):
+        """
+        Parameters
+        ----------
+        key : str, default: "progress_bar_id"
+            The message entry that identifies the messages that replace one another.
+        """
+        self.key = key
+        self._messages: Dict[Any, Dict[Any, Any]] = dict()
+        self._condition = threading.Condition()
+
+    def put_nowait(self, item: Dict[Any, Any]) -> None:
+        """
+        Store the message, replacing any unread message from the same progress bar.
+
+        The changed entries of a delta message (see the `publish_deltas` argument of `TQDMProgressPublisher`) are
+        merged into the unread message instead, so that no change is lost.
+        """
+        key = item.get(self.key)
+        with self._condition:
+            if item.get("delta", False):
+                unread_message = self._messages.get(key)
+                if unread_message is not None:
+                    item = _merge_delta(previous_message=unread_message, message=item)
+            self._messages[key] = item
+            self._condition.notify()
+
+    def get(self, block: bool = True, timeout: float = None) -> Dict[Any, Dict[Any, Any]]:
+        """
+        Remove and return the newest message of each progress bar that changed since the previous read.
+
+        Parameters
+        ----------
+        block : bool, default: True
+            Whether to wait for at least one message to be available.
+        timeout : float, optional
+            The maximum number of seconds to wait when blocking. By default, wait indefinitely.
+
+        Returns
+        -------
+        messages : dict
+            The newest messages, keyed by the `key` of the listener (i.e., the `progress_bar_id`).
+
+        Raises
+        ------
+        queue.Empty
+            If no message is available (after waiting `timeout` seconds when blocking).
+        """
+        with self._condition:
+            if not block and not self._messages:
+                raise queue.Empty
+            if not self._condition.wait_for(lambda: self._messages, timeout=timeout):
+                raise queue.Empty
+
+            messages, self._messages = self._messages, dict()
+            return messages
+
+    def get_nowait(self) -> Dict[Any, Dict[Any, Any]]:
+        """Equivalent to `get(block=False)`."""
+        return self.get(block=False)
+
+    def qsize(self) -> int:
+        """Return the number of progress bars with an unread message."""
+        return len(self._messages)
+
+    def empty(self) -> bool:
+        """Return True if no progress bar has an unread message."""
+        return not self._messages
+
+
+class AsyncListener:
+    """
+    A listener that hands messages over to an asyncio event loop, from any thread.
+
+    Messages announced while the consumer is busy accumulate and are handed over together, so a burst of updates costs
+    a single wakeup of the event loop rather than one per message.
+
+    Iterate over it with `async for message in listener`; the iteration ends once the listener is closed
+    (e.g., when it is unsubscribed from the `TQDMProgressHandler`) and its remaining messages are consumed.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = 0):
+        """
+        Parameters
+        ----------
+        loop : asyncio.AbstractEventLoop
+            The event loop of the consumer.
+        maxsize : int, default: 0
+            The maximum number of messages held by the listener, after which `put_nowait` raises `queue.Full`.
+            If zero or less, the listener is unbounded.
+        """
+        self.maxsize = maxsize
+
+        self._loop = loop
+        self._loop_thread_id = None
+        self._messages = collections.deque()
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None  # Created by the consumer, so it belongs to the consuming loop
+        self._wakeup_scheduled = False
+        self._closed = False
+        self._batch = collections.deque()
+
+    def put_nowait(self, item: Dict[Any, Any]) -> None:
+        """Store the message and, unless one is already pending, schedule a wakeup of the consumer."""
+        with self._lock:
+            if 0 < self.maxsize <= len(self._messages):
+                raise queue.Full
+            self._messages.append(item)
+
+            if self._wakeup_scheduled:
+                return
+            self._wakeup_scheduled = True
+
+        self._schedule_wakeup()
+
+    def get_nowait(self) -> Dict[Any, Any]:
+        """Remove and return the oldest message that was not handed over to the consumer yet."""
+        with self._lock:
+            if not self._messages:
+                raise queue.Empty
+            return self._messages.popleft()
+
+    def task_done(self) -> None:
+        """Present for compatibility with the `queue.Queue` interface; the listener does not track tasks."""
+
+    def close(self) -> None:
+        """Stop the iteration once the remaining messages have been consumed."""
+        with self._lock:
+            self._closed = True
+        self._schedule_wakeup()
+
+    def _schedule_wakeup(self) -> None:
+        if threading.get_ident() == self._loop_thread_id:
+            self._set_wakeup()
+            return
+
+        try:
+            self._loop.call_soon_threadsafe(self._set_wakeup)
+        except RuntimeError:  # The event loop of the consumer is closed; there is no one left to wake up
+            pass
+
+    def _set_wakeup(self) -> None:
+        # Before the consumer first waits, there is no event to set; it then finds the messages without waiting
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def get_batch(self) -> List[Dict[Any, Any]]:
+        """
+        Wait for messages, then remove and return all of them at once.
+
+        Returns
+        -------
+        messages : list of dict
+            The messages in the order in which they were announced. Empty only if the listener is closed.
+        """
+        self._loop_thread_id = threading.get_ident()
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+
+        while True:
+            with self._lock:
+                self._wakeup_scheduled = False
+                self._wakeup.clear()
+
+                if self._messages or self._closed:
+                    messages = list(self._messages)
+                    self._messages.clear()
+                    return messages
+
+            await self._wakeup.wait()
+
+    def qsize(self) -> int:
+        """Return the number of messages that are waiting to be handed over to the consumer."""
+        return len(self._messages) + len(self._batch)
+
+    def empty(self) -> bool:
+        """Return True if no message is waiting to be handed over to the consumer."""
+        return self.qsize() == 0
+
+    def __aiter__(self) -> "AsyncListener":
+        return self
+
+    async def __anext__(self) -> Dict[Any, Any]:
+        if not self._batch:
+            self._batch.extend(await self.get_batch())
+            if not self._batch:
+                raise StopAsyncIteration
+
+        return self._batch.popleft()
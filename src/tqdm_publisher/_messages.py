@@ -0,0 +1,183 @@
+import math
+import os
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Union
+
+_NOT_ENCODED = object()
+
+
+_IDENTIFIER_POOL_SIZE = 256  # The number of identifiers drawn from the random source at once
+
+
+def _reset_identifiers() -> None:
+    global _identifier_pool, _identifier_offset
+
+    _identifier_pool = b""
+    _identifier_offset = 0
+
+
+_identifier_lock = threading.Lock()
+_reset_identifiers()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_identifiers)  # Forked workers must not repeat the identifiers
+
+
+def _new_identifier() -> str:
+    """
+    Return a new random (version 4) UUID string, as `str(uuid4())`.
+
+    The random bytes are drawn from the random source for many identifiers at once rather than on each call, so each
+    identifier only costs a slice and its formatting.
+    """
+    global _identifier_pool, _identifier_offset
+
+    with _identifier_lock:
+        if _identifier_offset >= len(_identifier_pool):
+            _identifier_pool = os.urandom(16 * _IDENTIFIER_POOL_SIZE)
+            _identifier_offset = 0
+        random_bytes = bytearray(_identifier_pool[_identifier_offset : _identifier_offset + 16])
+        _identifier_offset += 16
+
+    random_bytes[6] = random_bytes[6] & 0x0F | 0x40  # The version
+    random_bytes[8] = random_bytes[8] & 0x3F | 0x80  # The RFC 4122 variant
+    text = random_bytes.hex()
+    return f"{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}"
+
+
+def _to_float(value: Any) -> float:
+    """Store an optional number of a `format_dict` as a float, with None as NaN."""
+    return math.nan if value is None else float(value)
+
+
+def _from_float(value: float) -> Optional[Union[int, float]]:
+    """Restore a number stored by `_to_float`, as an integer when it is one."""
+    if math.isnan(value):
+        return None
+    return int(value) if value.is_integer() else value
+
+
+class ProgressMessage(Mapping):
+    """
+    A compact progress message, holding the same entries as the dictionary
+    `dict(progress_bar_id=..., format_dict=..., **metadata)` in three slots.
+
+    The `metadata` is shared by all the messages of a progress bar rather than copied into each of them, so that
+    each update only allocates this object besides the `format_dict`. Behaves like the dictionary for lookups (e.g.,
+    `message["format_dict"]`, `message.get("request_id")` or `"request_id" in message`), and `to_dict` converts it
+    when a real dictionary is needed, e.g., to serialize it with `json.dumps`. The `JSONCodec`, `BinaryCodec`,
+    `ProgressBroadcastServer` and the transports between processes accept it as is.
+    """
+
+    __slots__ = ("progress_bar_id", "format_dict", "metadata")
+
+    _EMPTY_METADATA = MappingProxyType(dict())
+
+    def __init__(self, progress_bar_id: Hashable, format_dict: Dict[str, Any], metadata: Optional[Mapping] = None):
+        """
+        Parameters
+        ----------
+        progress_bar_id : hashable
+            The ID of the progress bar, e.g., a string, an integer or bytes.
+        format_dict : dict
+            The state of the progress bar.
+        metadata : mapping, optional
+            The entries shared by all the messages of the progress bar; it is not copied and must not be modified.
+            It must not contain the "progress_bar_id" or "format_dict" keys.
+        """
+        # Plain slot assignments, as this is created on each update; the message must not be modified once sent
+        self.progress_bar_id = progress_bar_id
+        self.format_dict = format_dict
+        self.metadata = self._EMPTY_METADATA if metadata is None else metadata
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the message as a new dictionary."""
+        return dict(progress_bar_id=self.progress_bar_id, format_dict=self.format_dict, **self.metadata)
+
+    def __reduce__(self):
+        return type(self), (self.progress_bar_id, self.format_dict, dict(self.metadata))
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "progress_bar_id":
+            return self.progress_bar_id
+        if key == "format_dict":
+            return self.format_dict
+        return self.metadata[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key == "progress_bar_id" or key == "format_dict" or key in self.metadata
+
+    def __iter__(self) -> Iterator[str]:
+        yield "progress_bar_id"
+        yield "format_dict"
+        yield from self.metadata
+
+    def __len__(self) -> int:
+        return 2 + len(self.metadata)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _to_serializable(value: Any) -> Dict[str, Any]:
+    """The `default` of `json.dumps` for the message types of this package."""
+    if isinstance(value, ProgressMessage):
+        return value.to_dict()
+    if isinstance(value, EncodedMessage):
+        return dict(value.data)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class EncodedMessage(Mapping):
+    """
+    An announced message along with its serialized form, computed once and shared by all listeners.
+
+    It is read-only and behaves like the message itself (e.g., `message["format_dict"]`), while `encoded` returns the
+    output of the encoder of the `TQDMProgressHandler`, computed by the first listener that asks for it and cached for
+    all others. The underlying dictionary, available as `data`, must not be modified once announced.
+    """
+
+    __slots__ = ("data", "_encoder", "_encoded")
+
+    def __init__(self, data: Mapping, encoder: Callable[[Dict[str, Any]], Union[bytes, str]]):
+        """
+        Parameters
+        ----------
+        data : dict or ProgressMessage
+            The announced message; a `ProgressMessage` is converted with `to_dict` before being passed to the encoder.
+        encoder : callable
+            The function serializing the message, e.g., `json.dumps`.
+        """
+        object.__setattr__(self, "data", data)
+        object.__setattr__(self, "_encoder", encoder)
+        object.__setattr__(self, "_encoded", _NOT_ENCODED)
+
+    @property
+    def encoded(self) -> Union[bytes, str]:
+        """The serialized message."""
+        encoded = self._encoded
+        if encoded is _NOT_ENCODED:
+            # Concurrent first reads may both encode the message, but always store the same result
+            data = self.data
+            encoded = self._encoder(data.to_dict() if isinstance(data, ProgressMessage) else data)
+            object.__setattr__(self, "_encoded", encoded)
+        return encoded
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"'{type(self).__name__}' is read-only.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"'{type(self).__name__}' is read-only.")
+
+    def __getitem__(self, key: str) -> Any:
+        return self.data[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.data!r})"
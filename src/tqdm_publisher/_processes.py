@@ -0,0 +1,204 @@
+import os
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, List, Optional
+
+from ._batching import BatchingSender
+from ._handler import TQDMProgressHandler
+
+# The maximum number of seconds to wait before accepting connections again after the listener failed
+_MAX_ACCEPT_RETRY_DELAY = 1.0
+
+
+class ProcessProgressSender(BatchingSender):
+    """
+    The worker side of a `ProcessProgressReceiver`.
+
+    It is picklable, so it can be passed to worker processes (e.g., as an argument of `ProcessPoolExecutor.submit`).
+    Inside a worker, it creates progress subscribers whose messages are batched and sent to the `TQDMProgressHandler`
+    of the parent process. All copies of a sender within a worker process share a single connection to the parent.
+    """
+
+    def __init__(
+        self,
+        address: Any,
+        authkey: bytes,
+        family: Optional[str] = None,
+        max_batch_size: int = 100,
+        max_batch_interval: float = 0.1,
+        maxsize: int = 10_000,
+    ):
+        """
+        Parameters
+        ----------
+        address : Any
+            The address of the `ProcessProgressReceiver`.
+        authkey : bytes
+            The authentication key of the `ProcessProgressReceiver`.
+        family : str, optional
+            The socket family of the `ProcessProgressReceiver`.
+        max_batch_size : int, default: 100
+            The number of waiting messages after which a batch is sent to the parent process.
+        max_batch_interval : float, default: 0.1
+            The age, in seconds, of the oldest waiting message after which a batch is sent to the parent process.
+        maxsize : int, default: 10,000
+            The maximum number of waiting messages, after which the oldest ones are dropped.
+        """
+        super().__init__(max_batch_size=max_batch_size, max_batch_interval=max_batch_interval, maxsize=maxsize)
+        self.address = address
+        self.authkey = authkey
+        self.family = family
+
+        self._connection: Optional[Connection] = None
+
+    def _get_parameters(self) -> Dict[str, Any]:
+        return dict(super()._get_parameters(), address=self.address, authkey=self.authkey, family=self.family)
+
+    def _send_batch(self, batch: List[Dict[Any, Any]]) -> None:
+        try:
+            if self._connection is None:
+                self._connection = Client(address=self.address, family=self.family, authkey=self.authkey)
+            self._connection.send(batch)
+        except (OSError, EOFError):  # The parent process stopped receiving; progress is not worth failing the work
+            self._close_connection()
+            with self._condition:
+                self.dropped_messages += len(batch)
+
+    def _close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class ProcessProgressReceiver:
+    """
+    Announce on a `TQDMProgressHandler` the progress published by worker processes.
+
+    The receiver listens on a local socket (a Unix socket or a named pipe, by default); each worker process publishes
+    through the picklable `sender` of the receiver, without any HTTP server in between.
+
+    Examples
+    --------
+    >>> handler = TQDMProgressHandler()
+    >>> with ProcessProgressReceiver(handler=handler) as receiver:
+    >>>     with ProcessPoolExecutor() as executor:
+    >>>         executor.submit(run_task, progress_sender=receiver.sender)
+    >>>
+    >>> def run_task(progress_sender: ProcessProgressSender):
+    >>>     for _ in progress_sender.create_progress_subscriber(range(100)):
+    >>>         ...
+    """
+
+    def __init__(
+        self,
+        handler: TQDMProgressHandler,
+        address: Any = None,
+        family: Optional[str] = None,
+        max_batch_size: int = 100,
+        max_batch_interval: float = 0.1,
+    ):
+        """
+        Parameters
+        ----------
+        handler : TQDMProgressHandler
+            The handler on which the received messages are announced.
+        address : Any, optional
+            The address to listen on. Defaults to a new address of the default family of the platform.
+        family : str, optional
+            The socket family ("AF_INET", "AF_UNIX" or "AF_PIPE"). Defaults to the fastest family of the platform.
+        max_batch_size : int, default: 100
+            The `max_batch_size` of the `sender`.
+        max_batch_interval : float, default: 0.1
+            The `max_batch_interval` of the `sender`.
+        """
+        self.handler = handler
+
+        authkey = os.urandom(32)
+        self._listener = Listener(address=address, family=family, authkey=authkey)
+        self.sender = ProcessProgressSender(
+            address=self._listener.address,
+            authkey=authkey,
+            family=family,
+            max_batch_size=max_batch_size,
+            max_batch_interval=max_batch_interval,
+        )
+
+        self._connection_threads: List[threading.Thread] = list()
+        self._closing = False
+        self._accepting_thread = threading.Thread(target=self._accept_connections, daemon=True)
+        self._accepting_thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Stop receiving progress.
+
+        All the messages sent before the receiver is closed (e.g., those of a finished process pool) are announced.
+
+        Parameters
+        ----------
+        timeout : float, default: 5.0
+            The maximum number of seconds to wait for each background thread to stop; a thread still running then
+            (e.g., waiting for a connection that could not be woken up) is left to stop on its own.
+        """
+        if self._closing:
+            return
+
+        self.sender.close(timeout=timeout)  # Sends the messages of this process, if any
+        self._closing = True
+
+        # Wake up the thread waiting for new connections; closing the listener also makes its next `accept` fail
+        try:
+            Client(address=self.sender.address, family=self.sender.family, authkey=self.sender.authkey).close()
+        except (OSError, EOFError, AuthenticationError):
+            pass
+        self._accepting_thread.join(timeout=timeout)
+        self._listener.close()
+
+        for connection_thread in self._connection_threads:
+            connection_thread.join(timeout=timeout)
+
+    def __enter__(self) -> "ProcessProgressReceiver":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _accept_connections(self) -> None:
+        retry_delay = 0.0
+        while not self._closing:
+            try:
+                connection = self._listener.accept()
+            except (AuthenticationError, EOFError):  # A client that failed the handshake
+                continue
+            except OSError:  # The listener is closed, or cannot accept connections for now (e.g., too many open files)
+                if self._closing:
+                    return
+                retry_delay = min(max(2 * retry_delay, 0.01), _MAX_ACCEPT_RETRY_DELAY)
+                time.sleep(retry_delay)
+                continue
+            retry_delay = 0.0
+
+            if self._closing:
+                connection.close()
+                return
+
+            connection_thread = threading.Thread(target=self._receive_messages, args=(connection,), daemon=True)
+            self._connection_threads.append(connection_thread)
+            connection_thread.start()
+
+    def _receive_messages(self, connection: Connection) -> None:
+        with connection:
+            while True:
+                try:
+                    if not connection.poll(0.1):
+                        if self._closing:  # Everything sent before closing was received
+                            return
+                        continue
+                    batch = connection.recv()
+                except (EOFError, OSError):  # The worker closed the connection
+                    return
+
+                for message in batch:
+                    self.handler.announce(message=message)
@@ -1,24 +1,282 @@
-from typing import Union
-from uuid import uuid4
+import threading
+from time import perf_counter, time
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
 
 from tqdm import tqdm as base_tqdm
 
+from ._dispatcher import ProgressDispatcher, get_shared_dispatcher
+from ._instrumentation import ProgressInstrumentation
+from ._messages import _new_identifier
+
 
 class TQDMProgressPublisher(base_tqdm):
-    def __init__(self, *tqdm_args, **tqdm_kwargs):
+    def __init__(
+        self,
+        *tqdm_args,
+        publish_mininterval: float = 0.0,
+        publish_miniters: Union[int, float] = 0,
+        publish_deltas: bool = False,
+        dispatcher: Union[bool, ProgressDispatcher] = False,
+        parent: Optional["TQDMProgressPublisher"] = None,
+        instrumentation: Optional[ProgressInstrumentation] = None,
+        publish_finished: bool = False,
+        **tqdm_kwargs,
+    ):
+        """
+        Parameters
+        ----------
+        publish_mininterval : float, default: 0.0
+            The minimum time, in seconds, between two publications of the progress to the subscribed callbacks.
+            Updates that arrive sooner are coalesced into the next publication.
+        publish_miniters : int or float, default: 0
+            The minimum progress increment, in iterations, between two publications of the progress to the
+            subscribed callbacks. Updates that advance less are coalesced into the next publication.
+        publish_deltas : bool, default: False
+            If True, each callback receives the full `format_dict` only once, when it subscribes, and afterwards
+            only the entries of the `format_dict` that changed since the previous publication.
+            The full state can be rebuilt on the receiving end by updating the first dictionary with each delta.
+        dispatcher : bool or ProgressDispatcher, default: False
+            If set, the callbacks are run in the background by this dispatcher rather than inside `update`, so slow
+            callbacks never block the iteration; while they run, only the newest state is kept for the next
+            publication. If True, use the dispatcher shared by all publishers of the process.
+            Closing the progress bar waits for the remaining publications to be delivered.
+        parent : TQDMProgressPublisher, optional
+            A progress bar aggregating this one. The progress of this bar (and its `total`, when known at creation) is
+            added to the parent in constant time on each update, so the parent shows the combined progress, rate and
+            remaining time of all its children, along with the number of `active_children` and `finished_children`
+            in its `format_dict`. The parent should be created without a `total` of its own.
+        instrumentation : ProgressInstrumentation, optional
+            If set, records the number of calls, the latency and the exceptions of each subscribed callback.
+        publish_finished : bool, default: False
+            If True, closing the progress bar always publishes its final state, with `finished=True` in its
+            `format_dict`, so that receivers (such as the state registry of a `TQDMProgressHandler`) learn that it
+            completed even when that state was already published.
+
+        When both limits are set, both must be satisfied before the callbacks are run again. An update that decreases
+        the progress (e.g., a negative update), or the first update after `reset`, is always published.
+        The final state of the progress bar is always published when the bar is closed.
+        """
+        # Set before the base initialization so that `close` (which may be triggered by `__del__`) is always safe
+        # The callbacks are replaced (copy-on-write) rather than modified on each (un)subscription, so that the
+        # publications iterate over an immutable snapshot without locking while other threads (un)subscribe
+        self.callbacks: Mapping[str, Callable[[Dict[str, Any]], Any]] = MappingProxyType(dict())
+        self._callback_items: Tuple[Tuple[str, Callable[[Dict[str, Any]], Any]], ...] = ()
+        self._callbacks_lock = threading.Lock()
+        self.publish_mininterval = publish_mininterval
+        self.publish_miniters = publish_miniters
+        self.publish_deltas = publish_deltas
+        self.dispatcher = get_shared_dispatcher() if dispatcher is True else dispatcher or None
+        self.instrumentation = instrumentation
+        self._last_published_format_dict = None
+        self._last_published_n = None
+        self._last_published_time = None
+        self.publish_finished = publish_finished
+        self.finished = False
+
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.number_of_active_children = 0
+        self.number_of_finished_children = 0
+        self._descendant_callbacks: Mapping[str, Tuple[Callable[[Dict[str, Any]], Any], int]] = MappingProxyType(dict())
+        self._children_lock = threading.Lock()
+        self._rolled_up_n = 0
+        self._is_active_child = False
+
         super().__init__(*tqdm_args, **tqdm_kwargs)
-        self.progress_bar_id = str(uuid4())
-        self.callbacks = dict()
+        self.progress_bar_id = _new_identifier()
+
+        if parent is not None:
+            self._rolled_up_n = self.n  # E.g., the `initial` progress, which the parent does not count
+            with parent._children_lock:
+                parent.number_of_active_children += 1
+            if self.total is not None:
+                parent._add_to_total(increment=self.total)
+            self._is_active_child = True
+
+    @property
+    def format_dict(self) -> Dict[str, Any]:
+        format_dict = super().format_dict
+        if self.number_of_active_children or self.number_of_finished_children:
+            format_dict.update(
+                active_children=self.number_of_active_children, finished_children=self.number_of_finished_children
+            )
+        if self.finished:
+            format_dict["finished"] = True
+        return format_dict
 
     # Override the update method to run callbacks
     def update(self, n: int = 1) -> Union[bool, None]:
         displayed = super().update(n)
 
-        for callback in self.callbacks.values():
-            callback(self.format_dict)
+        if self.parent is not None:
+            self._roll_up()
+
+        if self._is_publication_due():
+            self._publish()
 
         return displayed
 
+    def reset(self, total: Optional[Union[int, float]] = None) -> None:
+        """Reset to 0 iterations for repeated use, as `tqdm.reset`; the next update is published at once."""
+        super().reset(total=total)
+        self._last_published_n = None
+
+    def close(self) -> None:
+        """Publish any coalesced progress, or the `finished` state, before cleaning up the progress bar."""
+        if not getattr(self, "disable", True) and not self.finished:
+            if self.publish_finished:
+                self.finished = True
+                self._publish()
+            elif self._has_unpublished_progress():
+                self._publish()
+
+        if getattr(self, "_is_active_child", False):
+            self._is_active_child = False
+            self._roll_up()
+            with self.parent._children_lock:
+                self.parent.number_of_active_children -= 1
+                self.parent.number_of_finished_children += 1
+            if not self.parent.disable and self.parent._is_publication_due():
+                self.parent._publish()
+
+        if getattr(self, "dispatcher", None) is not None:  # Not set if the constructor raised early
+            self.dispatcher.flush(publisher=self)
+
+        super().close()
+
+    def _add_to_total(self, increment: Union[int, float]) -> None:
+        """Add the total of a new descendant to this progress bar and all its ancestors."""
+        publisher = self
+        while publisher is not None:
+            with publisher._children_lock:
+                publisher.total = (publisher.total or 0) + increment
+            publisher = publisher.parent
+
+    def _roll_up(self) -> None:
+        """Add the progress made since the previous call to the parent."""
+        n = self.n
+        increment = n - self._rolled_up_n
+        if increment:
+            self._rolled_up_n = n
+            with self.parent._children_lock:
+                self.parent.update(increment)
+
+    def _has_unpublished_progress(self) -> bool:
+        """Whether the progress changed since the last publication, or since creation if nothing was published."""
+        last_published_n = self.initial if self._last_published_n is None else self._last_published_n
+        return self.n != last_published_n
+
+    def _is_publication_due(self) -> bool:
+        if self._last_published_n is None or (self.publish_mininterval == 0 and self.publish_miniters == 0):
+            return True
+
+        increment = self.n - self._last_published_n
+        if increment < 0:  # The progress went back, which the callbacks must learn at once
+            return True
+        if increment < self.publish_miniters:
+            return False
+
+        return time() - self._last_published_time >= self.publish_mininterval
+
+    def _publish(self) -> None:
+        """Send the current state of the progress bar to all subscribed callbacks."""
+        self._last_published_n = self.n
+        self._last_published_time = time()
+
+        if self.parent is not None:
+            self._send_to_ancestors()
+
+        if not self._callback_items:  # Avoid building the `format_dict` for no one
+            return
+
+        if self.dispatcher is None:
+            self._send_to_callbacks(format_dict=self.format_dict)
+        else:
+            self.dispatcher.submit(publisher=self, format_dict=self.format_dict)
+
+    def _send_to_callbacks(self, format_dict: Dict[str, Any]) -> None:
+        if self.publish_deltas:
+            previous_format_dict = self._last_published_format_dict
+            self._last_published_format_dict = format_dict
+
+            if previous_format_dict is not None:
+                format_dict = {
+                    key: value
+                    for key, value in format_dict.items()
+                    if key not in previous_format_dict or previous_format_dict[key] != value
+                }
+                if not format_dict:
+                    return
+
+        if self.instrumentation is None:
+            for _, callback in self._callback_items:
+                callback(format_dict)
+            return
+
+        for callback_id, callback in self._callback_items:
+            exception = None
+            start = perf_counter()
+            try:
+                callback(format_dict)
+            except Exception as raised_exception:
+                exception = raised_exception
+                raise
+            finally:
+                self.instrumentation.record_callback(
+                    callback_id=callback_id,
+                    progress_bar_id=self.progress_bar_id,
+                    seconds=perf_counter() - start,
+                    exception=exception,
+                )
+
+    def _send_to_ancestors(self) -> None:
+        message = None
+        ancestor = self.parent
+        distance = 1
+        while ancestor is not None:
+            if ancestor._descendant_callbacks:
+                for callback, depth in ancestor._descendant_callbacks.values():
+                    if distance > depth:
+                        continue
+                    if message is None:
+                        message = dict(
+                            progress_bar_id=self.progress_bar_id,
+                            parent_progress_bar_id=self.parent.progress_bar_id,
+                            format_dict=self.format_dict,
+                        )
+                    callback(message)
+
+            ancestor = ancestor.parent
+            distance += 1
+
+    def subscribe_descendants(self, callback: Callable[[Dict[str, Any]], Any], depth: int = 1) -> str:
+        """
+        Subscribe to the updates of the progress bars below this one, down to a given depth.
+
+        The updates of this progress bar itself are not included; use `subscribe` for those.
+
+        Parameters
+        ----------
+        callback : callable
+            Called on each publication of a descendant with a dictionary containing its `progress_bar_id`, the
+            `parent_progress_bar_id` of the bar it rolls up into, and its full `format_dict`.
+            It is always run inside the `update` of the descendant, regardless of the `dispatcher`.
+        depth : int, default: 1
+            The number of levels below this progress bar to include; 1 means the direct children only.
+
+        Returns
+        -------
+        callback_id : str
+            A unique identifier, to be passed to `unsubscribe`.
+        """
+        callback_id = _new_identifier()
+        with self._callbacks_lock:
+            self._descendant_callbacks = MappingProxyType(
+                {**self._descendant_callbacks, callback_id: (callback, depth)}
+            )
+        return callback_id
+
     def subscribe(self, callback: callable) -> str:
         """
         Subscribe to updates from the progress bar.
@@ -28,6 +286,8 @@ class TQDMProgressPublisher(base_tqdm):
         update function for TQDM. The unique callback ID is returned, which can be used
         for future operations such as deregistering the callback.
 
+        It is safe to subscribe from any thread, even while another thread updates the progress bar.
+
         Parameters
         ----------
         callback : callable
@@ -50,12 +310,31 @@ class TQDMProgressPublisher(base_tqdm):
         >>> callback_id = publisher.subscribe(my_callback)
         >>> print(callback_id)  # Prints the unique callback ID
         """
+        callback_id = _new_identifier()
+
+        def add_callback() -> None:
+            format_dict = self.format_dict
 
-        callback_id = str(uuid4())
-        self.callbacks[callback_id] = callback
-        callback(self.format_dict)  # Call the callback immediately to show the current state
+            # Bring the existing callbacks up to date so that every callback shares the same base for the next delta
+            if self.publish_deltas:
+                self._send_to_callbacks(format_dict=format_dict)
+
+            with self._callbacks_lock:
+                self._replace_callbacks(callbacks={**self.callbacks, callback_id: callback})
+            callback(format_dict)  # Call the callback immediately to show the current state
+
+        if self.dispatcher is None:
+            add_callback()
+        else:
+            # After the publications pending in the background, and before those submitted in the meantime
+            self.dispatcher.run_exclusively(publisher=self, function=add_callback)
         return callback_id
 
+    def _replace_callbacks(self, callbacks: Dict[str, Callable[[Dict[str, Any]], Any]]) -> None:
+        """Swap in a new registry of callbacks; must be called while holding the `_callbacks_lock`."""
+        self._callback_items = tuple(callbacks.items())
+        self.callbacks = MappingProxyType(callbacks)
+
     def unsubscribe(self, callback_id: str) -> bool:
         """
         Unsubscribe a previously registered callback from the progress bar updates.
@@ -68,7 +347,7 @@ class TQDMProgressPublisher(base_tqdm):
         Parameters
         ----------
         callback_id : str
-            The unique identifier of the callback to be unsubscribed. This is the same UUID string
+            The unique identifier of the callback to be unsubscribed. This is the same string
             that was returned by the `subscribe` method when the callback was registered.
 
         Returns
@@ -91,8 +370,20 @@ class TQDMProgressPublisher(base_tqdm):
         number of subscribers might grow large or change frequently. Unsubscribing callbacks
         when they are no longer needed can help prevent memory leaks and other performance issues.
         """
-        if callback_id not in self.callbacks:
-            return False
+        with self._callbacks_lock:
+            if callback_id in self._descendant_callbacks:
+                descendant_callbacks = dict(self._descendant_callbacks)
+                del descendant_callbacks[callback_id]
+                self._descendant_callbacks = MappingProxyType(descendant_callbacks)
+                return True
+
+            if callback_id not in self.callbacks:
+                return False
+
+            callbacks = dict(self.callbacks)
+            del callbacks[callback_id]
+            self._replace_callbacks(callbacks=callbacks)
 
-        del self.callbacks[callback_id]
+        if self.instrumentation is not None:
+            self.instrumentation.forget_callback(callback_id=callback_id)
         return True
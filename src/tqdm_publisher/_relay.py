@@ -0,0 +1,261 @@
+import queue
+import socket
+import struct
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+from time import monotonic
+from typing import Any, Dict, List, Mapping, Set, Type, Union
+
+from ._codecs import BinaryCodec, JSONCodec
+from ._handler import TQDMProgressHandler
+
+
+class ProgressRelayServer:
+    """
+    Expose the messages of a `TQDMProgressHandler` over TCP to the `ProgressRelay` of other hosts.
+
+    Each connected relay receives the newest message of each progress bar that changed, in batches sent at most every
+    `max_batch_interval` seconds, so a slow network never delays the announcements and the traffic grows with the
+    number of active progress bars rather than with the number of updates. The skipped delta messages of a progress bar
+    are merged into the one that is sent.
+
+    When the handler keeps the state of its progress bars (see its `state_maxsize`), each new connection first
+    receives the latest message of every known progress bar, so a relay that reconnects catches up at once.
+
+    The connections are authenticated with the `authkey`, which must be shared with the relays only. The batches are
+    sent as bytes encoded by the `codec`, never pickled, so a peer cannot make the other end run arbitrary code.
+    """
+
+    def __init__(
+        self,
+        handler: TQDMProgressHandler,
+        authkey: bytes,
+        address: Any = ("localhost", 0),
+        max_batch_interval: float = 0.1,
+        codec: Type[Union[JSONCodec, BinaryCodec]] = JSONCodec,
+    ):
+        """
+        Parameters
+        ----------
+        handler : TQDMProgressHandler
+            The handler whose messages are relayed.
+        authkey : bytes
+            The secret key authenticating the relays.
+        address : tuple of str and int, default: ("localhost", 0)
+            The host and port to listen on; if the port is zero, a free port is chosen, available as `address`.
+        max_batch_interval : float, default: 0.1
+            The minimum number of seconds between two batches sent to a relay.
+        codec : JSONCodec or BinaryCodec class, default: JSONCodec
+            The codec encoding each batch; the relays must decode it with the same codec. A new codec is used for each
+            batch, so every batch can be decoded on its own.
+        """
+        self.handler = handler
+        self.max_batch_interval = max_batch_interval
+        self.codec = codec
+
+        self._listener = Listener(address=address, family="AF_INET", authkey=authkey)
+        self.address = self._listener.address
+
+        self._connection_threads: List[threading.Thread] = list()
+        self._closing = threading.Event()
+        self._accepting_thread = threading.Thread(target=self._accept_connections, daemon=True)
+        self._accepting_thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Stop accepting relays and disconnect the connected ones.
+
+        Parameters
+        ----------
+        timeout : float, default: 5.0
+            The maximum number of seconds to wait for each background thread to stop; a thread still running then
+            (e.g., waiting for a peer stuck in the authentication) is left to stop on its own.
+        """
+        if self._closing.is_set():
+            return
+        self._closing.set()
+
+        # Wake up the thread waiting for new connections, without an authentication that a relay connecting at the
+        # same time could leave waiting forever
+        try:
+            socket.create_connection(self.address, timeout=1.0).close()
+        except OSError:
+            pass
+        self._accepting_thread.join(timeout=timeout)
+        self._listener.close()
+
+        for connection_thread in self._connection_threads:
+            connection_thread.join(timeout=timeout)
+
+    def __enter__(self) -> "ProgressRelayServer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _accept_connections(self) -> None:
+        while not self._closing.is_set():
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                continue
+
+            if self._closing.is_set():
+                connection.close()
+                return
+
+            connection_thread = threading.Thread(target=self._send_messages, args=(connection,), daemon=True)
+            self._connection_threads.append(connection_thread)
+            connection_thread.start()
+
+    def _send_messages(self, connection: Connection) -> None:
+        listener = self.handler.listen_latest(snapshot=self.handler.state_maxsize > 0)
+        last_batch_time = 0.0
+        try:
+            with connection:
+                while not self._closing.is_set():
+                    # Let the messages of a batch accumulate (and replace one another) in the listener
+                    if self._closing.wait(timeout=last_batch_time + self.max_batch_interval - monotonic()):
+                        return
+                    try:
+                        messages = listener.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+
+                    batch = list()
+                    for message in messages.values():
+                        if "snapshot" in message and "progress_bar_id" not in message:
+                            batch.extend(dict(snapshot_message) for snapshot_message in message["snapshot"])
+                        else:
+                            batch.append(dict(message))
+                    connection.send_bytes(self.codec().encode_batch(messages=batch))
+                    last_batch_time = monotonic()
+        except (OSError, EOFError):  # The relay disconnected
+            return
+        finally:
+            self.handler.unsubscribe(listener=listener)
+
+
+class ProgressRelay:
+    """
+    Merge the messages of the `TQDMProgressHandler` of several hosts, each exposed by a `ProgressRelayServer`, into a
+    local `TQDMProgressHandler`.
+
+    The `progress_bar_id` (and `parent_progress_bar_id`) of each relayed message is prefixed with the name of its
+    source, e.g., "host-1:5d0b...", and the message gains a `source` entry, so that the listeners of the local handler
+    can filter on it (e.g., `handler.listen(metadata=dict(source="host-1"))`). Each source is relayed by its own
+    thread, which reconnects after a lost connection and then receives the current state of the source again.
+
+    Examples
+    --------
+    >>> handler = TQDMProgressHandler()
+    >>> relay = ProgressRelay(
+    >>>     handler=handler,
+    >>>     upstreams={"host-1": ("host-1.local", 6000), "host-2": ("host-2.local", 6000)},
+    >>>     authkey=authkey,
+    >>> )
+    """
+
+    def __init__(
+        self,
+        handler: TQDMProgressHandler,
+        upstreams: Mapping[str, Any],
+        authkey: bytes,
+        separator: str = ":",
+        reconnect_interval: float = 0.5,
+        max_reconnect_interval: float = 30.0,
+        codec: Type[Union[JSONCodec, BinaryCodec]] = JSONCodec,
+    ):
+        """
+        Parameters
+        ----------
+        handler : TQDMProgressHandler
+            The local handler on which the messages of all sources are announced.
+        upstreams : mapping of str to tuple of str and int
+            The name of each source and the address of its `ProgressRelayServer`.
+        authkey : bytes
+            The secret key of the servers.
+        separator : str, default: ":"
+            The separator between the name of the source and the original ID of a progress bar.
+        reconnect_interval : float, default: 0.5
+            The number of seconds to wait before reconnecting to a source, doubled after each failed attempt.
+        max_reconnect_interval : float, default: 30.0
+            The maximum number of seconds to wait before reconnecting to a source.
+        codec : JSONCodec or BinaryCodec class, default: JSONCodec
+            The codec of the servers.
+        """
+        self.handler = handler
+        self.upstreams = dict(upstreams)
+        self.separator = separator
+        self.reconnect_interval = reconnect_interval
+        self.max_reconnect_interval = max_reconnect_interval
+        self.codec = codec
+        self.connected_sources: Set[str] = set()
+        self.number_of_connections: Dict[str, int] = {source: 0 for source in self.upstreams}
+
+        self._authkey = authkey
+        self._closing = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._relay_source, args=(source, address), daemon=True)
+            for source, address in self.upstreams.items()
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Disconnect from all sources.
+
+        Parameters
+        ----------
+        timeout : float, default: 5.0
+            The maximum number of seconds to wait for the thread of each source to stop; a thread still running then
+            (e.g., connecting to a source that does not answer) is left to stop on its own.
+        """
+        self._closing.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+
+    def __enter__(self) -> "ProgressRelay":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _namespace(self, source: str, message: Dict[Any, Any]) -> Dict[Any, Any]:
+        for key in ("progress_bar_id", "parent_progress_bar_id", "source"):
+            if key in message:
+                message[key] = f"{source}{self.separator}{message[key]}"
+        message.setdefault("source", source)
+        return message
+
+    def _relay_source(self, source: str, address: Any) -> None:
+        reconnect_interval = self.reconnect_interval
+        while not self._closing.is_set():
+            try:
+                connection = Client(address=address, family="AF_INET", authkey=self._authkey)
+            except (OSError, EOFError, AuthenticationError):
+                self._closing.wait(timeout=reconnect_interval)
+                reconnect_interval = min(reconnect_interval * 2, self.max_reconnect_interval)
+                continue
+
+            reconnect_interval = self.reconnect_interval
+            self.connected_sources.add(source)
+            self.number_of_connections[source] += 1
+            try:
+                with connection:
+                    while not self._closing.is_set():
+                        if not connection.poll(0.1):
+                            continue
+                        for message in self.codec().decode_batch(data=connection.recv_bytes()):
+                            self.handler.announce(message=self._namespace(source=source, message=message))
+            except (
+                OSError,
+                EOFError,
+                ValueError,
+                struct.error,
+            ):  # The source stopped or sent a malformed batch; reconnect
+                pass
+            finally:
+                self.connected_sources.discard(source)
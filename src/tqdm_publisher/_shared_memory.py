@@ -0,0 +1,249 @@
+import math
+import os
+import threading
+from multiprocessing.shared_memory import SharedMemory
+from multiprocessing.util import Finalize
+from time import time
+from typing import Any, Dict, List, Optional, Union
+
+from ._handler import TQDMProgressHandler
+from ._messages import _new_identifier
+from ._publisher import TQDMProgressPublisher
+
+# The layout of each slot, as consecutive float64 values
+# The sequence is odd while the slot is being written, so that the sampler never reads a partially written slot
+_SEQUENCE, _N, _TOTAL, _ELAPSED = range(4)
+_FIELDS_PER_SLOT = 4
+_BYTES_PER_FIELD = 8
+
+# The shared memory blocks attached by the slots of this process, shared by all copies of the same slot
+_attached_values: Dict[Any, memoryview] = dict()
+_attached_values_lock = threading.Lock()
+
+
+def _attach_values(shared_memory_name: str) -> memoryview:
+    key = (os.getpid(), shared_memory_name)
+    with _attached_values_lock:
+        values = _attached_values.get(key)
+        if values is None:
+            shared_memory = SharedMemory(name=shared_memory_name)
+            values = shared_memory.buf.cast("d")
+            _attached_values[key] = values
+
+            def detach():
+                values.release()
+                shared_memory.close()
+
+            Finalize(shared_memory, detach, exitpriority=0)
+
+    return values
+
+
+def _from_float(value: float) -> Union[int, float]:
+    return int(value) if value.is_integer() else value
+
+
+class SharedProgressSlot:
+    """
+    A picklable handle to a slot of a `SharedProgressBoard`.
+
+    Pass it to a worker process (e.g., as an argument of `ProcessPoolExecutor.submit`) and create the progress bar of
+    the worker with `create_progress_publisher`.
+    """
+
+    def __init__(self, shared_memory_name: str, index: int, progress_bar_id: str):
+        self.shared_memory_name = shared_memory_name
+        self.index = index
+        self.progress_bar_id = progress_bar_id
+        self._values: Optional[memoryview] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return dict(self.__dict__, _values=None)
+
+    def create_progress_publisher(self, *tqdm_args, **tqdm_kwargs) -> "SharedMemoryProgressPublisher":
+        """Create a progress bar that writes its progress into this slot on every update."""
+        return SharedMemoryProgressPublisher(*tqdm_args, slot=self, **tqdm_kwargs)
+
+    def write(self, n: Union[int, float], total: Optional[Union[int, float]], elapsed: float) -> None:
+        """Write the progress into the slot."""
+        if self._values is None:
+            self._values = _attach_values(shared_memory_name=self.shared_memory_name)
+
+        values = self._values
+        offset = self.index * _FIELDS_PER_SLOT
+
+        values[offset + _SEQUENCE] += 1
+        values[offset + _N] = n
+        values[offset + _TOTAL] = math.nan if total is None else total
+        values[offset + _ELAPSED] = elapsed
+        values[offset + _SEQUENCE] += 1
+
+
+class SharedMemoryProgressPublisher(TQDMProgressPublisher):
+    """
+    A `TQDMProgressPublisher` that also writes its `n`, `total` and `elapsed` into a slot of a `SharedProgressBoard`.
+
+    Its `progress_bar_id` is the one of the slot, under which the board announces its progress.
+    """
+
+    def __init__(self, *tqdm_args, slot: SharedProgressSlot, **tqdm_kwargs):
+        self.slot = slot
+        super().__init__(*tqdm_args, **tqdm_kwargs)
+        self.progress_bar_id = slot.progress_bar_id
+
+        self._write_to_slot()
+
+    def update(self, n: int = 1) -> Union[bool, None]:
+        displayed = super().update(n)
+        self._write_to_slot()
+        return displayed
+
+    def close(self) -> None:
+        if not getattr(self, "disable", True):
+            self._write_to_slot()
+        super().close()
+
+    def _write_to_slot(self) -> None:
+        elapsed = time() - self.start_t if hasattr(self, "start_t") else 0.0
+        self.slot.write(n=self.n, total=self.total, elapsed=elapsed)
+
+
+class SharedProgressBoard:
+    """
+    Announce on a `TQDMProgressHandler` the progress that worker processes write into shared memory.
+
+    Each worker writes the progress of its bar into a fixed slot of a shared array, which costs a few memory writes per
+    update. A background thread samples all the slots in a single pass and announces only the progress bars that
+    changed since the previous sample.
+
+    The messages contain the `progress_bar_id` of the slot, a `format_dict` with the `n`, `total` and `elapsed` of the
+    progress bar, and any additional metadata given for the slot.
+
+    Examples
+    --------
+    >>> handler = TQDMProgressHandler()
+    >>> with SharedProgressBoard(handler=handler, number_of_slots=N_JOBS) as board:
+    >>>     with ProcessPoolExecutor() as executor:
+    >>>         for job_index in range(N_JOBS):
+    >>>             executor.submit(run_job, slot=board.get_slot(index=job_index))
+    >>>
+    >>> def run_job(slot: SharedProgressSlot):
+    >>>     for _ in slot.create_progress_publisher(range(100)):
+    >>>         ...
+    """
+
+    def __init__(self, handler: TQDMProgressHandler, number_of_slots: int, sampling_interval: float = 0.1):
+        """
+        Parameters
+        ----------
+        handler : TQDMProgressHandler
+            The handler on which the progress is announced.
+        number_of_slots : int
+            The maximum number of progress bars written at the same time.
+        sampling_interval : float, default: 0.1
+            The number of seconds between two samples of the slots.
+        """
+        self.handler = handler
+        self.number_of_slots = number_of_slots
+        self.sampling_interval = sampling_interval
+
+        self.shared_memory = SharedMemory(create=True, size=number_of_slots * _FIELDS_PER_SLOT * _BYTES_PER_FIELD)
+        self._values = self.shared_memory.buf.cast("d")  # Zero-initialized
+
+        self._progress_bar_ids: List[Optional[str]] = [None] * number_of_slots
+        self._additional_metadata: List[Dict[str, Any]] = [dict()] * number_of_slots
+        self._sampled_sequences: List[float] = [0.0] * number_of_slots
+
+        self._stop_sampling = threading.Event()
+        self._sampling_thread = threading.Thread(target=self._sample_periodically, daemon=True)
+        self._sampling_thread.start()
+
+    def get_slot(self, index: int, additional_metadata: dict = dict()) -> SharedProgressSlot:
+        """
+        Assign a slot to a new progress bar.
+
+        Parameters
+        ----------
+        index : int
+            The index of the slot, between 0 and `number_of_slots - 1`. A slot may be reassigned once the progress bar
+            that used it is closed.
+        additional_metadata : dict, optional
+            Entries added to every message announced for this progress bar.
+
+        Returns
+        -------
+        slot : SharedProgressSlot
+            The picklable handle to the slot, to pass to the worker process.
+        """
+        if not 0 <= index < self.number_of_slots:
+            raise IndexError(f"The slot index {index} is out of range for {self.number_of_slots} slots.")
+
+        progress_bar_id = _new_identifier()
+        self._progress_bar_ids[index] = progress_bar_id
+        self._additional_metadata[index] = additional_metadata
+        return SharedProgressSlot(
+            shared_memory_name=self.shared_memory.name, index=index, progress_bar_id=progress_bar_id
+        )
+
+    def sample(self) -> int:
+        """
+        Read all the slots and announce the progress bars that changed since the previous sample.
+
+        Returns
+        -------
+        number_of_announcements : int
+            The number of progress bars that were announced.
+        """
+        values = self._values.tolist()  # A single pass over the shared memory
+
+        number_of_announcements = 0
+        for index in range(self.number_of_slots):
+            offset = index * _FIELDS_PER_SLOT
+            sequence = values[offset + _SEQUENCE]
+
+            # Skip unchanged slots, and slots written during the copy (they are read again on the next sample)
+            if sequence == self._sampled_sequences[index] or sequence % 2 == 1 or self._values[offset] != sequence:
+                continue
+            self._sampled_sequences[index] = sequence
+
+            progress_bar_id = self._progress_bar_ids[index]
+            if progress_bar_id is None:
+                continue
+
+            total = values[offset + _TOTAL]
+            format_dict = dict(
+                n=_from_float(values[offset + _N]),
+                total=None if math.isnan(total) else _from_float(total),
+                elapsed=values[offset + _ELAPSED],
+            )
+            self.handler.announce(
+                message=dict(
+                    progress_bar_id=progress_bar_id, format_dict=format_dict, **self._additional_metadata[index]
+                )
+            )
+            number_of_announcements += 1
+
+        return number_of_announcements
+
+    def close(self) -> None:
+        """Stop sampling after a final sample, then release the shared memory."""
+        if self._stop_sampling.is_set():
+            return
+
+        self._stop_sampling.set()
+        self._sampling_thread.join()
+        self.sample()
+
+        self._values.release()
+        self.shared_memory.close()
+        self.shared_memory.unlink()
+
+    def __enter__(self) -> "SharedProgressBoard":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _sample_periodically(self) -> None:
+        while not self._stop_sampling.wait(timeout=self.sampling_interval):
+            self.sample()
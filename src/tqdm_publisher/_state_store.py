@@ -0,0 +1,349 @@
+import math
+import queue
+import threading
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from time import monotonic, time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ._messages import _from_float, _to_float
+
+try:
+    import numpy
+except ImportError:  # The columns are then stored in `array.array` instances
+    numpy = None
+
+# The float64 columns, indexed by the slot of each progress bar
+_FLOAT_COLUMNS = ("n", "total", "elapsed", "start_time", "rate")
+_NUMPY_TYPES = dict(d="float64", B="uint8", Q="uint64")  # The NumPy equivalents of the `array` type codes
+
+
+def _new_column(typecode: str, length: int, fill: Union[int, float]) -> Any:
+    if numpy is not None:
+        return numpy.full(length, fill, dtype=_NUMPY_TYPES[typecode])
+    return array(typecode, [fill]) * length
+
+
+def _extend_column(column: Any, typecode: str, length: int, fill: Union[int, float]) -> Any:
+    if numpy is not None:
+        return numpy.concatenate((column, _new_column(typecode=typecode, length=length, fill=fill)))
+    column.extend(_new_column(typecode=typecode, length=length, fill=fill))
+    return column
+
+
+class ProgressStateStore:
+    """
+    A listener that keeps the latest progress of many progress bars in contiguous typed columns.
+
+    Each progress bar is assigned a slot, i.e., a row of the `n`, `total`, `elapsed`, `start_time` and `rate` columns
+    (stored as NumPy arrays if NumPy is installed, or else as `array.array` instances), so each announced message only
+    writes five numbers instead of being kept as a dictionary. Thousands of concurrent progress bars then cost a few
+    dozen bytes each and nothing for the garbage collector to track.
+
+    The rates and remaining times of all progress bars are computed on demand in a single (vectorized, with NumPy)
+    pass, and messages are only built when reading a `snapshot` or a `diff`. The other entries of the messages (e.g.,
+    the `prefix` or metadata) are not kept, and delta messages only update the entries they hold. As in the state of
+    a `TQDMProgressHandler`, finished progress bars are forgotten `finished_ttl` seconds after their `finished` message,
+    so a long-running store does not grow with every progress bar it ever saw.
+
+    Create it with `TQDMProgressHandler.listen_state`, or feed it directly with `update`.
+
+    Examples
+    --------
+    >>> store = handler.listen_state()
+    >>> version, messages = store.diff(since=0)
+    >>> ...
+    >>> version, messages = store.diff(since=version)  # Only the progress bars updated since the previous diff
+    """
+
+    def __init__(self, capacity: int = 1024, finished_ttl: Optional[float] = 60.0):
+        """
+        Parameters
+        ----------
+        capacity : int, default: 1024
+            The initial number of slots; the columns double in size whenever they are full.
+        finished_ttl : float, optional, default: 60.0
+            The number of seconds a progress bar is kept after its `finished` message; expired progress bars are
+            forgotten on the next write or read. If None, finished progress bars are kept until `forget_finished` or
+            `forget` is called.
+        """
+        if capacity < 1:
+            raise ValueError(f"The capacity of a state store must be positive, not {capacity}.")
+
+        self.capacity = capacity
+        self._slots: Dict[Any, int] = dict()  # The slot of each progress bar
+        self._progress_bar_ids: List[Any] = [None] * capacity  # The progress bar of each slot
+        self._free_slots: List[int] = list(range(capacity - 1, -1, -1))  # The lowest slots are used first
+        self._columns: Dict[str, Any] = {
+            name: _new_column(typecode="d", length=capacity, fill=math.nan) for name in _FLOAT_COLUMNS
+        }
+        self._finished = _new_column(typecode="B", length=capacity, fill=0)
+        self._versions = _new_column(typecode="Q", length=capacity, fill=0)  # The version of the last write
+        self.version = 0  # Incremented by each write
+        self.finished_ttl = finished_ttl
+        self._finished_times: Dict[Any, float] = OrderedDict()  # The finished progress bars, oldest first
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, progress_bar_id: Any) -> bool:
+        return progress_bar_id in self._slots
+
+    def update(
+        self,
+        progress_bar_id: Any,
+        n: Optional[float] = None,
+        total: Optional[float] = None,
+        elapsed: Optional[float] = None,
+        rate: Optional[float] = None,
+        finished: bool = False,
+    ) -> None:
+        """
+        Write the latest progress of a progress bar, assigning it a slot if it is new.
+
+        The `start_time` of a new progress bar is derived from the current time and its `elapsed` time.
+        """
+        with self._lock:
+            self._expire_finished(now=monotonic())
+            self._write(
+                progress_bar_id=progress_bar_id,
+                values=dict(n=n, total=total, elapsed=elapsed, rate=rate),
+                finished=finished,
+                delta=False,
+            )
+
+    def put_nowait(self, item: Mapping) -> None:
+        """Write the progress of a message into the slot of its progress bar."""
+        format_dict = item.get("format_dict")
+        if not isinstance(format_dict, Mapping):
+            return
+        progress_bar_id = item.get("progress_bar_id")
+        try:
+            hash(progress_bar_id)
+        except TypeError:  # An unhashable ID, which cannot be tracked
+            return
+
+        delta = item.get("delta", False)
+        values = {name: format_dict[name] for name in ("n", "total", "elapsed", "rate") if name in format_dict}
+        with self._lock:
+            self._expire_finished(now=monotonic())
+            self._write(
+                progress_bar_id=progress_bar_id,
+                values=values,
+                finished=format_dict.get("finished", False),
+                delta=delta,
+            )
+
+    def _write(self, progress_bar_id: Any, values: Dict[str, Any], finished: bool, delta: bool) -> None:
+        slot = self._slots.get(progress_bar_id)
+        columns = self._columns
+        if slot is None:
+            slot = self._allocate(progress_bar_id=progress_bar_id)
+            elapsed = values.get("elapsed")
+            columns["start_time"][slot] = time() - (elapsed or 0.0)
+            delta = False  # Missing entries of the first message of a progress bar are unknown
+
+        for name in ("n", "total", "elapsed", "rate"):
+            if delta and name not in values:
+                continue
+            columns[name][slot] = _to_float(values.get(name))
+
+        if finished or not delta:
+            self._finished[slot] = finished
+        if finished:
+            self._finished_times.pop(progress_bar_id, None)
+            self._finished_times[progress_bar_id] = monotonic()
+        elif not delta:  # E.g., restarted
+            self._finished_times.pop(progress_bar_id, None)
+        self.version += 1
+        self._versions[slot] = self.version
+
+    def _allocate(self, progress_bar_id: Any) -> int:
+        if not self._free_slots:
+            self._grow()
+        slot = self._free_slots.pop()
+        self._slots[progress_bar_id] = slot
+        self._progress_bar_ids[slot] = progress_bar_id
+        return slot
+
+    def _grow(self) -> None:
+        length = self.capacity
+        for name in _FLOAT_COLUMNS:
+            self._columns[name] = _extend_column(self._columns[name], typecode="d", length=length, fill=math.nan)
+        self._finished = _extend_column(self._finished, typecode="B", length=length, fill=0)
+        self._versions = _extend_column(self._versions, typecode="Q", length=length, fill=0)
+        self._progress_bar_ids.extend([None] * length)
+        self._free_slots.extend(range(2 * length - 1, length - 1, -1))
+        self.capacity = 2 * length
+
+    def forget(self, progress_bar_ids: Iterable[Any]) -> None:
+        """Release the slots of these progress bars, which are then missing from the snapshots and diffs."""
+        with self._lock:
+            for progress_bar_id in progress_bar_ids:
+                self._release(progress_bar_id=progress_bar_id)
+
+    def forget_finished(self) -> List[Any]:
+        """Release the slots of the finished progress bars and return their IDs."""
+        with self._lock:
+            finished_progress_bar_ids = [self._progress_bar_ids[slot] for slot in self._select(finished_only=True)]
+            for progress_bar_id in finished_progress_bar_ids:
+                self._release(progress_bar_id=progress_bar_id)
+        return finished_progress_bar_ids
+
+    def _expire_finished(self, now: float) -> None:
+        """Forget the progress bars that finished more than `finished_ttl` seconds ago, oldest first."""
+        if self.finished_ttl is None:
+            return
+        while self._finished_times:
+            progress_bar_id, finished_time = next(iter(self._finished_times.items()))
+            if now - finished_time < self.finished_ttl:
+                return
+            self._release(progress_bar_id=progress_bar_id)
+
+    def _release(self, progress_bar_id: Any) -> None:
+        self._finished_times.pop(progress_bar_id, None)
+        slot = self._slots.pop(progress_bar_id, None)
+        if slot is None:
+            return
+        self._progress_bar_ids[slot] = None
+        for name in _FLOAT_COLUMNS:
+            self._columns[name][slot] = math.nan
+        self._finished[slot] = 0
+        self._versions[slot] = 0
+        self._free_slots.append(slot)
+
+    def _select(self, since: int = 0, finished_only: bool = False) -> List[int]:
+        """Return the occupied slots written after the version `since`, in slot order."""
+        if numpy is not None:
+            mask = self._versions > since  # Free slots have a version of zero
+            if finished_only:
+                mask &= self._finished != 0
+            return numpy.flatnonzero(mask).tolist()
+
+        versions, finished = self._versions, self._finished
+        return [
+            slot for slot in range(self.capacity) if versions[slot] > since and (not finished_only or finished[slot])
+        ]
+
+    def compute_rates(self) -> Tuple[Any, Any]:
+        """
+        Compute the rate and remaining time of every slot in a single pass.
+
+        The rate of a progress bar is the last one it reported (i.e., the smoothed `rate` of tqdm), or else its average
+        rate, `n / elapsed`. Its remaining time, `(total - n) / rate`, is NaN when the total or rate is unknown.
+
+        Returns
+        -------
+        rates, remaining : numpy.ndarray or array.array
+            The rates and remaining times, in seconds, indexed by slot; the values of the free slots are NaN.
+        """
+        with self._lock:
+            self._expire_finished(now=monotonic())
+            return self._compute_rates()
+
+    def _compute_rates(self) -> Tuple[Any, Any]:
+        columns = self._columns
+        if numpy is not None:
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                average_rates = columns["n"] / columns["elapsed"]
+                average_rates[~numpy.isfinite(average_rates)] = math.nan
+                rates = numpy.where(numpy.isnan(columns["rate"]), average_rates, columns["rate"])
+                remaining = (columns["total"] - columns["n"]) / rates
+                remaining[~numpy.isfinite(remaining)] = math.nan
+            return rates, remaining
+
+        rates, remaining = array("d", [math.nan]) * self.capacity, array("d", [math.nan]) * self.capacity
+        for slot, (n, total, elapsed, rate) in enumerate(
+            zip(columns["n"], columns["total"], columns["elapsed"], columns["rate"])
+        ):
+            if math.isnan(rate):
+                rate = n / elapsed if elapsed > 0 else math.nan
+            rates[slot] = rate
+            if rate > 0:  # False for NaN
+                remaining[slot] = (total - n) / rate
+        return rates, remaining
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """
+        Return the latest message of each progress bar, in slot order.
+
+        Returns
+        -------
+        messages : list of dict
+            The `progress_bar_id`, `start_time` and a `format_dict` holding the `n`, `total`, `elapsed`, `rate` and
+            `remaining` time of each progress bar, plus `finished=True` once finished.
+        """
+        return self.diff(since=0)[1]
+
+    def diff(self, since: int) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Return the latest message of each progress bar updated after a given version, as with `snapshot`.
+
+        Parameters
+        ----------
+        since : int
+            The version returned by a previous call, or zero for all progress bars.
+
+        Returns
+        -------
+        version : int
+            The current version, to pass to the next call.
+        messages : list of dict
+            The messages of the progress bars updated since then; forgotten progress bars are not reported.
+        """
+        with self._lock:
+            self._expire_finished(now=monotonic())
+            slots = self._select(since=since)
+            rates, remaining = self._compute_rates()
+            columns = self._columns
+            if numpy is not None:
+                rows = zip(
+                    *(columns[name][slots].tolist() for name in ("n", "total", "elapsed", "start_time")),
+                    rates[slots].tolist(),
+                    remaining[slots].tolist(),
+                    self._finished[slots].tolist(),
+                )
+            else:
+                rows = (
+                    (
+                        columns["n"][slot],
+                        columns["total"][slot],
+                        columns["elapsed"][slot],
+                        columns["start_time"][slot],
+                        rates[slot],
+                        remaining[slot],
+                        self._finished[slot],
+                    )
+                    for slot in slots
+                )
+
+            messages = list()
+            for slot, (n, total, elapsed, start_time, rate, remaining_time, finished) in zip(slots, rows):
+                format_dict = dict(
+                    n=_from_float(n),
+                    total=_from_float(total),
+                    elapsed=_from_float(elapsed),
+                    rate=_from_float(rate),
+                    remaining=_from_float(remaining_time),
+                )
+                if finished:
+                    format_dict["finished"] = True
+                messages.append(
+                    dict(progress_bar_id=self._progress_bar_ids[slot], start_time=start_time, format_dict=format_dict)
+                )
+            return self.version, messages
+
+    def get_nowait(self) -> None:
+        """A state store is read with `snapshot` or `diff`."""
+        raise queue.Empty
+
+    def task_done(self) -> None:
+        pass
+
+    def qsize(self) -> int:
+        return 0
+
+    def empty(self) -> bool:
+        return True
@@ -1,23 +1,70 @@
-from typing import Any, Dict, Iterable, Optional
+from collections.abc import Mapping
+from typing import Any, Dict, Optional
 
+from ._messages import ProgressMessage
 from ._publisher import TQDMProgressPublisher
 
 
 class TQDMProgressSubscriber(TQDMProgressPublisher):
-    def __init__(self, *tqdm_args, on_progress_update: callable, **tqdm_kwargs):
+    def __init__(
+        self,
+        *tqdm_args,
+        on_progress_update: callable,
+        depth: int = 0,
+        compact_messages: bool = False,
+        metadata: Optional[Mapping] = None,
+        **tqdm_kwargs,
+    ):
+        """
+        Parameters
+        ----------
+        on_progress_update : callable
+            Called with a dictionary containing the `progress_bar_id` and `format_dict` on each publication.
+        depth : int, default: 0
+            The number of levels of child progress bars (see the `parent` argument of `TQDMProgressPublisher`) whose
+            publications are also passed to `on_progress_update`, each with the `parent_progress_bar_id` it rolls up
+            into. By default, only the progress of this (possibly aggregate) progress bar is sent.
+        compact_messages : bool, default: False
+            If True, `on_progress_update` is called with a read-only `ProgressMessage` instead of a new dictionary,
+            which avoids allocating a dictionary (and an intermediate closure call) on each publication. It cannot be
+            combined with `publish_deltas`.
+        metadata : mapping, optional
+            Entries shared by all the `ProgressMessage` of this progress bar, without being copied. Requires
+            `compact_messages`.
+        """
+        if compact_messages and tqdm_kwargs.get("publish_deltas", False):
+            raise ValueError("The compact messages do not support the `publish_deltas` option.")
+        if metadata is not None and not compact_messages:
+            raise ValueError("The `metadata` argument requires `compact_messages=True`.")
 
         super().__init__(*tqdm_args, **tqdm_kwargs)
 
+        sent_snapshot = False
+
         def run_on_progress_update(format_dict: Dict[str, Any]):
             """
             This is the injection called on every update of the progress bar.
 
-            It calls the `on_progress_update` function, which must take a dictionary
-            containing the progress bar ID and `format_dict`.
+            It calls the `on_progress_update` function, which must take a dictionary (or a `ProgressMessage` when
+            `compact_messages` is enabled) containing the progress bar ID and `format_dict`.
+
+            When `publish_deltas` is enabled, the dictionary also contains a `delta` flag; the first message carries
+            the full `format_dict` (`delta=False`) and the following ones only the changed entries (`delta=True`).
 
             It must be defined inside this local scope to include the `.progress_bar_id` attribute from the level above
             without including it in the method signature.
             """
-            on_progress_update(dict(progress_bar_id=self.progress_bar_id, format_dict=format_dict))
+            if compact_messages:
+                on_progress_update(ProgressMessage(self.progress_bar_id, format_dict, metadata))
+                return
+            if not self.publish_deltas:
+                on_progress_update(dict(progress_bar_id=self.progress_bar_id, format_dict=format_dict))
+                return
+
+            nonlocal sent_snapshot
+            on_progress_update(dict(progress_bar_id=self.progress_bar_id, format_dict=format_dict, delta=sent_snapshot))
+            sent_snapshot = True
 
         self.subscribe(run_on_progress_update)
+        if depth > 0:
+            self.subscribe_descendants(on_progress_update, depth=depth)
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from tqdm_publisher import AsyncTQDMProgressPublisher
+
+
+async def _numbers(count: int):
+    for number in range(count):
+        await asyncio.sleep(0)
+        yield number
+
+
+@pytest.mark.asyncio
+async def test_coroutine_callbacks_do_not_block_iteration():
+    received_n = list()
+    synchronous_n = list()
+    callbacks_may_return = asyncio.Event()
+
+    async def slow_callback(format_dict):
+        await callbacks_may_return.wait()
+        received_n.append(format_dict["n"])
+
+    publisher = AsyncTQDMProgressPublisher(_numbers(100), total=100, mininterval=0)
+    publisher.subscribe(slow_callback)
+    publisher.subscribe(lambda format_dict: synchronous_n.append(format_dict["n"]))
+
+    items = [number async for number in publisher]
+    assert items == list(range(100))
+    assert synchronous_n == list(range(101))  # Regular callbacks are still called inside `update`
+    assert received_n == list()  # The iteration did not wait for the coroutine callback
+
+    callbacks_may_return.set()
+    await publisher.wait_for_callbacks()
+    assert received_n[-1] == 100
+    assert received_n == [0, 100]  # The publications made during the first call were merged
+
+
+@pytest.mark.asyncio
+async def test_gather():
+    messages = list()
+
+    async def on_progress_update(format_dict):
+        messages.append(format_dict)
+
+    async def double(number):
+        await asyncio.sleep(0.001 * (5 - number))
+        return 2 * number
+
+    results = await AsyncTQDMProgressPublisher.gather(
+        *[double(number) for number in range(5)], on_progress_update=on_progress_update, mininterval=0
+    )
+    assert results == [0, 2, 4, 6, 8]
+
+    await asyncio.sleep(0.01)
+    assert messages[-1]["n"] == messages[-1]["total"] == 5
+
+
+@pytest.mark.asyncio
+async def test_bounded_concurrency():
+    number_running, max_number_running = 0, 0
+
+    async def callback(format_dict):
+        nonlocal number_running, max_number_running
+        number_running += 1
+        max_number_running = max(max_number_running, number_running)
+        await asyncio.sleep(0.01)
+        number_running -= 1
+
+    publisher = AsyncTQDMProgressPublisher(total=10, max_concurrent_callbacks=2)
+    callback_ids = [publisher.subscribe(callback) for _ in range(5)]
+    publisher.update(5)
+    await publisher.wait_for_callbacks()
+    assert max_number_running == 2
+
+    assert publisher.unsubscribe(callback_ids[0])
+    publisher.close()
+    await publisher.wait_for_callbacks()
@@ -0,0 +1,37 @@
+import json
+import subprocess
+import sys
+
+from tqdm_publisher._benchmarks import run_benchmarks
+
+
+def test_benchmarks_run_and_are_serializable():
+    results = run_benchmarks(quick=True)
+    results = json.loads(json.dumps(results))
+
+    assert set(results) == {
+        "metadata",
+        "publisher_overhead",
+        "announce_throughput",
+        "slow_consumer_memory",
+        "update_latency",
+    }
+    assert [entry["number_of_callbacks"] for entry in results["publisher_overhead"]["update"]["publisher"]] == [
+        0,
+        1,
+        10,
+    ]
+    assert {entry["queue_class"] for entry in results["announce_throughput"]} == {"queue.Queue", "asyncio.queues.Queue"}
+    unbounded, bounded = results["slow_consumer_memory"]
+    assert unbounded["retained_messages"] == unbounded["number_of_messages"]
+    assert bounded["retained_messages"] == bounded["maxsize"]
+    assert results["update_latency"]["thread"]["number_of_samples"] > 0
+
+
+def test_benchmark_command_does_not_import_the_demos():
+    code = (
+        "import sys; import tqdm_publisher._demos._demo_command_line_interface; "
+        "print(any(name.endswith('._server') for name in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
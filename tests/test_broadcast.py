@@ -0,0 +1,260 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+
+import pytest
+
+from tqdm_publisher import (
+    BinaryCodec,
+    ProgressBroadcastServer,
+    TQDMProgressHandler,
+    format_server_sent_events,
+)
+from tqdm_publisher._broadcast import _BroadcastClient
+
+
+async def _connect_server_sent_events(server):
+    reader, writer = await asyncio.open_connection("localhost", server.port)
+    writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    headers = await reader.readuntil(b"\r\n\r\n")
+    assert headers.startswith(b"HTTP/1.1 200")
+    assert b"text/event-stream" in headers
+    return reader, writer
+
+
+async def _connect_websocket(server):
+    reader, writer = await asyncio.open_connection("localhost", server.port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write(
+        f"GET /ws HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+    )
+    headers = await reader.readuntil(b"\r\n\r\n")
+    assert headers.startswith(b"HTTP/1.1 101")
+    expected_accept = base64.b64encode(hashlib.sha1((key + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest())
+    assert b"Sec-WebSocket-Accept: " + expected_accept in headers
+    return reader, writer
+
+
+async def _read_websocket_frame(reader):
+    first_byte, length = await reader.readexactly(2)
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    return first_byte & 0x0F, await reader.readexactly(length)
+
+
+def _encode_masked_frame(opcode, payload):
+    mask = os.urandom(4)
+    return bytes([0x80 | opcode, 0x80 | len(payload)]) + mask + bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+
+async def _wait_for_clients(server, number_of_clients):
+    for _ in range(100):
+        if server.number_of_clients == number_of_clients:
+            return
+        await asyncio.sleep(0.01)
+    raise TimeoutError
+
+
+@pytest.mark.asyncio
+async def test_broadcast_to_server_sent_events_and_websocket_clients():
+    handler = TQDMProgressHandler()
+    number_of_encodings = 0
+
+    def encoder(message):
+        nonlocal number_of_encodings
+        number_of_encodings += 1
+        return json.dumps(message)
+
+    async with ProgressBroadcastServer(handler=handler, encoder=encoder) as server:
+        server_sent_events_clients = [await _connect_server_sent_events(server=server) for _ in range(3)]
+        websocket_clients = [await _connect_websocket(server=server) for _ in range(3)]
+        await _wait_for_clients(server=server, number_of_clients=6)
+
+        messages = [dict(progress_bar_id="a", format_dict=dict(n=n, total=10)) for n in range(5)]
+        for message in messages:
+            handler.announce(message=message)
+
+        expected_event = b"".join(
+            format_server_sent_events(message_data=json.dumps(message)).encode() for message in messages
+        )
+        for reader, _ in server_sent_events_clients:
+            assert await reader.readexactly(len(expected_event)) == expected_event
+        for reader, _ in websocket_clients:
+            for message in messages:
+                assert await _read_websocket_frame(reader) == (0x1, json.dumps(message).encode())
+
+        assert number_of_encodings == len(messages)
+
+    assert server.number_of_clients == 0
+    for reader, _ in server_sent_events_clients + websocket_clients:
+        assert await reader.read() == b""
+
+
+@pytest.mark.asyncio
+async def test_websocket_control_frames():
+    handler = TQDMProgressHandler()
+    async with ProgressBroadcastServer(handler=handler) as server:
+        reader, writer = await _connect_websocket(server=server)
+
+        writer.write(_encode_masked_frame(opcode=0x9, payload=b"ping"))
+        assert await _read_websocket_frame(reader) == (0xA, b"ping")
+
+        writer.write(_encode_masked_frame(opcode=0x8, payload=struct.pack("!H", 1000)))
+        assert await _read_websocket_frame(reader) == (0x8, struct.pack("!H", 1000))
+        assert await reader.read() == b""
+        await _wait_for_clients(server=server, number_of_clients=0)
+
+
+@pytest.mark.asyncio
+async def test_websocket_unmasks_payloads_of_any_length():
+    handler = TQDMProgressHandler()
+    async with ProgressBroadcastServer(handler=handler) as server:
+        reader, writer = await _connect_websocket(server=server)
+        for payload in (b"", b"a", b"ping!", bytes(range(125))):
+            writer.write(_encode_masked_frame(opcode=0x9, payload=payload))
+            assert await _read_websocket_frame(reader) == (0xA, payload)
+
+
+@pytest.mark.asyncio
+async def test_websocket_rejects_fragmented_messages():
+    handler = TQDMProgressHandler()
+    async with ProgressBroadcastServer(handler=handler) as server:
+        reader, writer = await _connect_websocket(server=server)
+
+        first_fragment = _encode_masked_frame(opcode=0x1, payload=b"frag")
+        writer.write(bytes([first_fragment[0] & 0x7F]) + first_fragment[1:])  # Without the FIN bit
+        assert await asyncio.wait_for(_read_websocket_frame(reader), timeout=5) == (0x8, struct.pack("!H", 1003))
+        assert await reader.read() == b""
+        await _wait_for_clients(server=server, number_of_clients=0)
+
+
+@pytest.mark.asyncio
+async def test_disconnected_clients_are_removed():
+    handler = TQDMProgressHandler()
+    async with ProgressBroadcastServer(handler=handler) as server:
+        _, writer = await _connect_server_sent_events(server=server)
+        await _wait_for_clients(server=server, number_of_clients=1)
+
+        writer.close()
+        await _wait_for_clients(server=server, number_of_clients=0)
+
+
+@pytest.mark.asyncio
+async def test_unknown_path():
+    async with ProgressBroadcastServer(handler=TQDMProgressHandler()) as server:
+        reader, writer = await asyncio.open_connection("localhost", server.port)
+        writer.write(b"GET /unknown HTTP/1.1\r\n\r\n")
+        assert (await reader.read()).startswith(b"HTTP/1.1 404")
+
+
+def test_invalid_overflow_policy():
+    with pytest.raises(ValueError):
+        ProgressBroadcastServer(handler=TQDMProgressHandler(), overflow="block")
+
+
+class _StalledWriter:
+    """A writer whose client never reads, so that draining never completes."""
+
+    def __init__(self):
+        self.written = list()
+        self.closed = False
+
+    def write(self, data):
+        self.written.append(data)
+
+    async def drain(self):
+        await asyncio.Future()
+
+    def close(self):
+        self.closed = True
+
+    def is_closing(self):
+        return self.closed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("overflow, expected_dropped_messages", [("drop_oldest", 2), ("drop_newest", 2)])
+async def test_slow_client_does_not_grow_unbounded(overflow, expected_dropped_messages):
+    writer = _StalledWriter()
+    client = _BroadcastClient(writer=writer, maxsize=3, overflow=overflow)
+    writing_task = asyncio.create_task(client.write_forever())
+
+    client.send(data=b"0")
+    await asyncio.sleep(0)  # The first write is now waiting for the client
+    for index in range(1, 6):
+        client.send(data=str(index).encode())
+
+    assert writer.written == [b"0"]
+    assert client.dropped_messages == expected_dropped_messages
+    assert list(client._outgoing) == ([b"3", b"4", b"5"] if overflow == "drop_oldest" else [b"1", b"2", b"3"])
+
+    writing_task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_slow_client_disconnected():
+    writer = _StalledWriter()
+    client = _BroadcastClient(writer=writer, maxsize=1, overflow="disconnect")
+    writing_task = asyncio.create_task(client.write_forever())
+
+    client.send(data=b"0")
+    await asyncio.sleep(0)
+    client.send(data=b"1")
+    client.send(data=b"2")
+    assert client.closed
+
+    writing_task.cancel()
+    await asyncio.gather(writing_task, return_exceptions=True)
+    assert writer.closed
+
+
+@pytest.mark.asyncio
+async def test_control_frames_bypass_a_full_buffer():
+    writer = _StalledWriter()
+    client = _BroadcastClient(writer=writer, maxsize=1, overflow="disconnect")
+    writing_task = asyncio.create_task(client.write_forever())
+
+    client.send(data=b"0")
+    await asyncio.sleep(0)
+    client.send(data=b"1")  # The buffer is now full
+    client.send_control(data=b"pong")
+    assert not client.closed
+    assert writer.written == [b"0", b"pong"]
+
+    writing_task.cancel()
+    await asyncio.gather(writing_task, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_of_encoded_messages():
+    handler = TQDMProgressHandler(encoder=lambda message: json.dumps(message).encode())
+    async with ProgressBroadcastServer(handler=handler, encoder=None) as server:
+        reader, _ = await _connect_websocket(server=server)
+        await _wait_for_clients(server=server, number_of_clients=1)
+
+        handler.announce(message=dict(progress_bar_id="a"))
+        assert await _read_websocket_frame(reader) == (0x1, b'{"progress_bar_id": "a"}')
+
+
+@pytest.mark.asyncio
+async def test_broadcast_survives_encoders_returning_bytes(caplog):
+    handler = TQDMProgressHandler()
+    binary_codec = BinaryCodec()
+
+    def encoder(message):
+        if message.get("binary", False):
+            return binary_codec.encode(message=message)  # Not text; skipped
+        return json.dumps(message).encode()
+
+    async with ProgressBroadcastServer(handler=handler, encoder=encoder) as server:
+        reader, _ = await _connect_websocket(server=server)
+        await _wait_for_clients(server=server, number_of_clients=1)
+
+        handler.announce(message=dict(progress_bar_id="a", binary=True, format_dict=dict(n=2**40)))
+        handler.announce(message=dict(progress_bar_id="b"))
+        assert await asyncio.wait_for(_read_websocket_frame(reader), timeout=5) == (0x1, b'{"progress_bar_id": "b"}')
+        assert "Failed to encode a progress message" in caplog.text
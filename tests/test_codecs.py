@@ -0,0 +1,144 @@
+import json
+from uuid import uuid4
+
+import pytest
+
+from tqdm_publisher import (
+    BinaryCodec,
+    JSONCodec,
+    ProgressMessage,
+    TQDMProgressSubscriber,
+)
+
+
+def _get_messages(total=10, **tqdm_kwargs):
+    messages = list()
+    progress_bar = TQDMProgressSubscriber(total=total, mininterval=0, on_progress_update=messages.append, **tqdm_kwargs)
+    for _ in range(10):
+        progress_bar.update(1)
+    progress_bar.close()
+    return [dict(message, request_id="abc") for message in messages]
+
+
+@pytest.mark.parametrize("codec_class", [JSONCodec, BinaryCodec])
+def test_round_trip(codec_class):
+    messages = _get_messages(desc="Processing", unit="files", postfix=dict(loss=0.5))
+    messages += _get_messages(total=None)
+
+    encoder, decoder = codec_class(), codec_class()
+    assert [decoder.decode(data=encoder.encode(message=message)) for message in messages] == messages
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        dict(),
+        dict(progress_bar_id="not-a-uuid"),
+        dict(progress_bar_id=3, format_dict=None),
+        dict(progress_bar_id=str(uuid4()), format_dict=dict(n=2**70, total=True, rate=1.5), delta=True),
+        dict(progress_bar_id=str(uuid4()).upper(), format_dict=dict(prefix=None, unit=3, elapsed=0)),
+        dict(format_dict=dict(), nested=dict(values=[1, 2.5, "a", None])),
+    ],
+)
+def test_binary_round_trip_of_unusual_messages(message):
+    encoder, decoder = BinaryCodec(), BinaryCodec()
+    decoded_message = decoder.decode(data=encoder.encode(message=message))
+    assert decoded_message == message
+    assert type(decoded_message.get("progress_bar_id")) is type(message.get("progress_bar_id"))
+
+
+def test_binary_round_trip_keeps_the_types_of_equal_values():
+    messages = [
+        dict(progress_bar_id="a", format_dict=dict(unit_scale=1, unit_divisor=1000.0), delta=False),
+        dict(progress_bar_id="a", format_dict=dict(unit_scale=True, unit_divisor=1000), delta=0),
+        dict(progress_bar_id="a", format_dict=dict(unit_scale=1.0, unit_divisor=1000), delta=0.0),
+        dict(progress_bar_id="a", format_dict=dict(unit_scale=True, unit_divisor=(1,)), delta=0),
+        dict(progress_bar_id="a", format_dict=dict(unit_scale=True, unit_divisor=(True,)), delta=0),
+    ]
+
+    encoder, decoder = BinaryCodec(), BinaryCodec()
+    for message in messages:
+        decoded_message = decoder.decode(data=encoder.encode(message=message))
+        assert type(decoded_message["delta"]) is type(message["delta"])
+        for field in ("unit_scale", "unit_divisor"):
+            decoded_value = decoded_message["format_dict"][field]
+            value = message["format_dict"][field]
+            if type(value) is tuple:  # Serialized as a JSON array
+                assert [type(item) for item in decoded_value] == [type(item) for item in value]
+            else:
+                assert type(decoded_value) is type(value)
+
+
+def test_binary_is_compact():
+    messages = _get_messages()
+    encoder = BinaryCodec()
+
+    encoded_messages = [encoder.encode(message=message) for message in messages]
+    assert len(encoded_messages[-1]) < len(JSONCodec().encode(message=messages[-1])) / 4
+
+    # The strings are only sent with the first message
+    assert len(encoded_messages[0]) > len(encoded_messages[1])
+    assert len(set(len(encoded_message) for encoded_message in encoded_messages[1:])) == 1
+
+
+def test_binary_decoder_joining_the_stream():
+    messages = _get_messages()
+    encoder = BinaryCodec()
+    for message in messages[:5]:
+        encoder.encode(message=message)
+
+    decoder = BinaryCodec()
+    assert decoder.decode(data=encoder.encode_state()) is None
+    assert [decoder.decode(data=encoder.encode(message=message)) for message in messages[5:]] == messages[5:]
+
+
+def test_binary_table_is_bounded():
+    messages = [
+        dict(progress_bar_id=f"bar-{index % 3}", format_dict=dict(n=index, postfix=f"loss={index}"))
+        for index in range(100)
+    ]
+    encoder = BinaryCodec(max_table_size=10)
+    decoder = BinaryCodec()
+    joining_decoder = None
+    for index, message in enumerate(messages):
+        if index == 50:  # A decoder joining the stream also follows the following resets
+            joining_decoder = BinaryCodec()
+            assert joining_decoder.decode(data=encoder.encode_state()) is None
+
+        data = encoder.encode(message=message)
+        assert decoder.decode(data=data) == message
+        if joining_decoder is not None:
+            assert joining_decoder.decode(data=data) == message
+        assert len(encoder._definitions) <= 10 + 2  # Each message interns up to two new entries here
+
+    assert len(decoder._table) <= 10 + 2
+
+
+@pytest.mark.parametrize("codec_class", [JSONCodec, BinaryCodec])
+def test_batch_round_trip(codec_class):
+    messages = _get_messages()
+    data = codec_class().encode_batch(messages=messages)
+    assert codec_class().decode_batch(data=data) == messages
+
+
+def test_json_batch_format():
+    assert json.loads(JSONCodec().encode_batch(messages=[dict(progress_bar_id="a")])) == dict(
+        messages=[dict(progress_bar_id="a")]
+    )
+
+
+@pytest.mark.parametrize("codec_class", [JSONCodec, BinaryCodec])
+def test_progress_message(codec_class):
+    encoder, decoder = codec_class(), codec_class()
+    messages = _get_messages()
+    compact_messages = [
+        ProgressMessage(
+            progress_bar_id=message["progress_bar_id"],
+            format_dict=message["format_dict"],
+            metadata=dict(request_id=message["request_id"]),
+        )
+        for message in messages
+    ]
+
+    assert [decoder.decode(encoder.encode(message)) for message in compact_messages] == json.loads(json.dumps(messages))
+    assert codec_class().decode_batch(codec_class().encode_batch(compact_messages)) == json.loads(json.dumps(messages))
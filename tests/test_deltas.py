@@ -0,0 +1,37 @@
+import pytest
+
+from tqdm_publisher import ProgressDeltaDecoder, TQDMProgressHandler
+
+
+def test_decode_handler_messages():
+    handler = TQDMProgressHandler()
+    queue = handler.listen()
+
+    progress_bar = handler.create_progress_subscriber(
+        total=5, mininterval=0, publish_deltas=True, additional_metadata=dict(request_id="abc")
+    )
+    for _ in range(5):
+        progress_bar.update(1)
+    progress_bar.close()
+
+    decoder = ProgressDeltaDecoder()
+    decoded_messages = list()
+    while not queue.empty():
+        decoded_messages.append(decoder.decode(message=queue.get_nowait()))
+
+    assert len(decoded_messages) == 6
+    for message in decoded_messages:
+        assert "delta" not in message
+        assert message["request_id"] == "abc"
+        assert message["format_dict"]["total"] == 5
+        assert message["format_dict"]["unit"] == "it"
+    assert [message["format_dict"]["n"] for message in decoded_messages] == [0, 1, 2, 3, 4, 5]
+
+    assert decoder.forget(progress_bar_id=progress_bar.progress_bar_id) == True
+    assert decoder.forget(progress_bar_id=progress_bar.progress_bar_id) == False
+
+
+def test_delta_before_snapshot():
+    decoder = ProgressDeltaDecoder()
+    with pytest.raises(ValueError):
+        decoder.decode(message=dict(progress_bar_id="abc", format_dict=dict(n=1), delta=True))
@@ -0,0 +1,172 @@
+import threading
+import time
+
+from tqdm_publisher import (
+    ProgressDispatcher,
+    TQDMProgressPublisher,
+    TQDMProgressSubscriber,
+)
+
+
+def test_slow_callbacks_do_not_block_updates():
+    dispatcher = ProgressDispatcher()
+    published_n = list()
+
+    def slow_callback(format_dict):
+        time.sleep(0.01)
+        published_n.append(format_dict["n"])
+
+    publisher = TQDMProgressPublisher(total=1000, dispatcher=dispatcher)
+    publisher.subscribe(slow_callback)
+
+    start = time.time()
+    for _ in range(1000):
+        publisher.update(1)
+    assert time.time() - start < 5  # Running the callbacks inline would take at least 10 seconds
+
+    publisher.close()
+
+    # Snapshots were conflated while the callback was busy, yet the final state was delivered in order
+    assert len(published_n) < 1000
+    assert published_n == sorted(published_n)
+    assert published_n[-1] == 1000
+
+    dispatcher.close()
+
+
+def test_callbacks_run_on_dispatcher_thread():
+    dispatcher = ProgressDispatcher(number_of_threads=2)
+    callback_threads = set()
+    messages = list()
+
+    def on_progress_update(message):
+        callback_threads.add(threading.current_thread().name)
+        messages.append(message)
+
+    progress_bars = [
+        TQDMProgressSubscriber(total=10, mininterval=0, dispatcher=dispatcher, on_progress_update=on_progress_update)
+        for _ in range(2)
+    ]
+    for _ in range(10):
+        for progress_bar in progress_bars:
+            progress_bar.update(1)
+    for progress_bar in progress_bars:
+        progress_bar.close()
+
+    assert dispatcher.flush(timeout=5) == True
+    for progress_bar in progress_bars:
+        final_messages = [message for message in messages if message["progress_bar_id"] == progress_bar.progress_bar_id]
+        assert final_messages[-1]["format_dict"]["n"] == 10
+
+    callback_threads.discard(threading.current_thread().name)  # The initial call made by `subscribe` is inline
+    assert callback_threads == {"ProgressDispatcher"}
+    assert dispatcher.close(timeout=5) == True
+
+
+def test_callback_exceptions_do_not_stop_the_dispatcher(caplog):
+    dispatcher = ProgressDispatcher()
+    published_n = list()
+
+    def failing_callback(format_dict):
+        if format_dict["n"] == 1:
+            raise ValueError("Failure")
+        published_n.append(format_dict["n"])
+
+    publisher = TQDMProgressPublisher(total=2, dispatcher=dispatcher)
+    publisher.subscribe(failing_callback)
+    publisher.update(1)
+    dispatcher.flush()
+    publisher.update(1)
+    publisher.close()
+
+    assert published_n[-1] == 2
+    assert "raised an exception" in caplog.text
+    dispatcher.close()
+
+
+def test_shared_dispatcher():
+    first_publisher = TQDMProgressPublisher(total=1, dispatcher=True)
+    second_publisher = TQDMProgressPublisher(total=1, dispatcher=True)
+    assert first_publisher.dispatcher is second_publisher.dispatcher
+
+    first_publisher.close()
+    second_publisher.close()
+
+
+def test_submissions_after_close_are_delivered_inline():
+    dispatcher = ProgressDispatcher()
+    published_n = list()
+    publisher = TQDMProgressPublisher(total=10, dispatcher=dispatcher)
+    publisher.subscribe(lambda format_dict: published_n.append(format_dict["n"]))
+    dispatcher.close()
+
+    publisher.update(5)  # Would raise if the closed dispatcher refused the snapshot
+    publisher.close()
+    assert published_n == [0, 5]
+
+
+def test_submissions_from_callbacks_of_a_full_dispatcher_do_not_wait_for_themselves():
+    dispatcher = ProgressDispatcher(maxsize=1)
+    inner_publisher = TQDMProgressPublisher(total=10, dispatcher=dispatcher)
+    other_publisher = TQDMProgressPublisher(total=10, dispatcher=dispatcher)
+    inner_n = list()
+    inner_publisher.subscribe(lambda format_dict: inner_n.append(format_dict["n"]))
+    other_publisher.subscribe(lambda format_dict: None)
+
+    def fill_and_update(format_dict):
+        if format_dict["n"] == 1:
+            other_publisher.update(1)  # Fills the dispatcher, as this callback keeps its only thread busy
+            inner_publisher.update(1)
+
+    outer_publisher = TQDMProgressPublisher(total=10, dispatcher=dispatcher)
+    outer_publisher.subscribe(fill_and_update)
+    outer_publisher.update(1)
+
+    assert dispatcher.flush(timeout=5) == True
+    assert inner_n == [0, 1]
+    for publisher in (inner_publisher, other_publisher, outer_publisher):
+        publisher.close()
+    dispatcher.close()
+
+
+def test_subscriptions_do_not_race_with_deliveries():
+    dispatcher = ProgressDispatcher()
+    publisher = TQDMProgressPublisher(total=None, dispatcher=dispatcher, publish_deltas=True)
+    running_callbacks = 0
+    overlaps = 0
+    states = list()
+
+    def make_callback():
+        state = dict()
+        states.append(state)
+
+        def callback(format_dict):
+            nonlocal running_callbacks, overlaps
+            running_callbacks += 1
+            overlaps += running_callbacks > 1
+            time.sleep(0.001)
+            state.update(format_dict)
+            running_callbacks -= 1
+
+        return callback
+
+    subscribing = True
+
+    def update():
+        while subscribing:
+            publisher.update(1)
+            time.sleep(0.0005)
+
+    publisher.subscribe(make_callback())
+    thread = threading.Thread(target=update)
+    thread.start()
+    for _ in range(20):
+        publisher.subscribe(make_callback())
+    subscribing = False
+    thread.join()
+
+    assert dispatcher.flush(timeout=5)
+    assert overlaps == 0
+    assert all(state["n"] == publisher.n for state in states)  # Every callback followed the deltas to the final state
+    publisher.close()
+    dispatcher.close()
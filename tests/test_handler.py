@@ -1,9 +1,14 @@
 import asyncio
+import json
+import pickle
+import queue
+import threading
+import time
 from uuid import UUID
 
 import pytest
 
-from tqdm_publisher import TQDMProgressHandler
+from tqdm_publisher import EncodedMessage, ProgressMessage, TQDMProgressHandler
 from tqdm_publisher.testing import create_tasks
 
 N_SUBSCRIBERS = 3
@@ -66,3 +71,414 @@ def test_unsubscription():
     assert len(handler.listeners) == 0
     result = handler.unsubscribe(queue)
     assert result == False
+
+
+def test_throttled_progress_subscriber():
+    handler = TQDMProgressHandler()
+    queue = handler.listen()
+
+    subscriber = handler.create_progress_subscriber(total=50, mininterval=0, publish_miniters=25)
+    for _ in range(50):
+        subscriber.update(1)
+    subscriber.close()
+
+    published_n = list()
+    while not queue.empty():
+        published_n.append(queue.get_nowait()["format_dict"]["n"])
+
+    assert published_n == [0, 1, 26, 50]
+
+
+def _drain(queue):
+    messages = list()
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+@pytest.mark.parametrize("queue_cls", [queue.Queue, asyncio.Queue])
+def test_drop_oldest_overflow(queue_cls):
+    handler = TQDMProgressHandler(queue_cls)
+    listener = handler.listen(maxsize=2, overflow="drop_oldest")
+
+    for index in range(5):
+        handler.announce(message=dict(index=index))
+
+    assert [message["index"] for message in _drain(listener)] == [3, 4]
+    assert handler.get_dropped_message_count(listener) == 3
+
+
+@pytest.mark.parametrize("queue_cls", [queue.Queue, asyncio.Queue])
+def test_drop_newest_overflow(queue_cls):
+    handler = TQDMProgressHandler(queue_cls)
+    listener = handler.listen(maxsize=2, overflow="drop_newest")
+
+    for index in range(5):
+        handler.announce(message=dict(index=index))
+
+    assert [message["index"] for message in _drain(listener)] == [0, 1]
+    assert handler.get_dropped_message_count(listener) == 3
+
+
+def test_block_overflow():
+    handler = TQDMProgressHandler()
+    listener = handler.listen(maxsize=1, overflow="block", timeout=0.01)
+
+    handler.announce(message=dict(index=0))
+    handler.announce(message=dict(index=1))
+
+    assert [message["index"] for message in _drain(listener)] == [0]
+    assert handler.get_dropped_message_count(listener) == 1
+
+    with pytest.raises(ValueError):
+        TQDMProgressHandler(asyncio.Queue).listen(maxsize=1, overflow="block")
+
+
+def test_disconnect_overflow():
+    handler = TQDMProgressHandler()
+    slow_listener = handler.listen(maxsize=1, overflow="disconnect")
+    fast_listener = handler.listen()
+
+    for index in range(3):
+        handler.announce(message=dict(index=index))
+
+    assert slow_listener not in handler.listeners
+    assert [message["index"] for message in _drain(slow_listener)] == [0]
+    assert [message["index"] for message in _drain(fast_listener)] == [0, 1, 2]
+
+
+def test_unknown_overflow_policy():
+    with pytest.raises(ValueError):
+        TQDMProgressHandler().listen(overflow="unknown")
+
+
+def test_encoder_serializes_each_message_once():
+    number_of_encodings = 0
+
+    def encoder(message):
+        nonlocal number_of_encodings
+        number_of_encodings += 1
+        return json.dumps(message)
+
+    handler = TQDMProgressHandler(encoder=encoder)
+    listeners = [handler.listen() for _ in range(5)]
+    latest_listener = handler.listen_latest()
+
+    message = dict(progress_bar_id="a", format_dict=dict(n=1, total=10))
+    handler.announce(message=message)
+    assert number_of_encodings == 0  # Only encoded when first needed
+
+    received_messages = [listener.get_nowait() for listener in listeners]
+    assert all(received_message is received_messages[0] for received_message in received_messages)
+    assert all(received_message.encoded == json.dumps(message) for received_message in received_messages)
+    assert number_of_encodings == 1
+
+    assert latest_listener.get_nowait()["a"] is received_messages[0]
+
+
+def test_encoded_message_is_read_only_mapping():
+    message = EncodedMessage(data=dict(progress_bar_id="a", request_id="abc"), encoder=json.dumps)
+
+    assert message == dict(progress_bar_id="a", request_id="abc")
+    assert message["request_id"] == "abc"
+    assert message.get("format_dict") is None
+    assert dict(**message) == message.data
+    with pytest.raises(AttributeError):
+        message.data = dict()
+    with pytest.raises(TypeError):
+        message["request_id"] = "def"
+
+
+def test_compact_messages():
+    handler = TQDMProgressHandler(compact_messages=True, encoder=json.dumps)
+    listener = handler.listen(metadata=dict(request_id="abc"))
+
+    progress_bars = [
+        handler.create_progress_subscriber(total=3, mininterval=0, additional_metadata=dict(request_id=request_id))
+        for request_id in ("abc", "def")
+    ]
+    for progress_bar in progress_bars:
+        progress_bar.update(3)
+        progress_bar.close()
+
+    messages = [listener.get_nowait() for _ in range(listener.qsize())]
+    assert len(messages) == 2
+    assert all(isinstance(message.data, ProgressMessage) for message in messages)
+    assert messages[0].data.metadata is messages[1].data.metadata  # Shared rather than copied on each update
+
+    expected_message = dict(progress_bar_id=progress_bars[0].progress_bar_id, request_id="abc")
+    assert json.loads(messages[-1].encoded) == dict(
+        expected_message, format_dict=json.loads(messages[-1].encoded)["format_dict"]
+    )
+    assert messages[-1]["format_dict"]["n"] == 3
+    assert messages[-1].data.to_dict() == dict(expected_message, format_dict=messages[-1]["format_dict"])
+
+
+def test_progress_message_is_a_mapping():
+    message = ProgressMessage(progress_bar_id=7, format_dict=dict(n=1), metadata=dict(request_id="abc"))
+
+    assert message == dict(progress_bar_id=7, format_dict=dict(n=1), request_id="abc")
+    assert list(message) == ["progress_bar_id", "format_dict", "request_id"]
+    assert "request_id" in message and "delta" not in message
+    assert message.get("delta") is None
+    assert pickle.loads(pickle.dumps(message)) == message
+    with pytest.raises(TypeError):
+        message["request_id"] = "def"
+
+
+def test_filters():
+    handler = TQDMProgressHandler()
+    all_listener = handler.listen()
+    id_listener = handler.listen(progress_bar_ids=["a", "b"])
+    request_listener = handler.listen(metadata=dict(request_id="abc"))
+    both_listener = handler.listen(progress_bar_ids=["a"], metadata=dict(request_id="def"))
+    conjunction_listener = handler.listen_latest(metadata=dict(request_id="abc", stage="upload"))
+
+    messages = [
+        dict(progress_bar_id="a", request_id="abc"),
+        dict(progress_bar_id="b", request_id="def"),
+        dict(progress_bar_id="a", request_id="def"),
+        dict(progress_bar_id="c", request_id="abc", stage="upload"),
+        dict(progress_bar_id="d"),
+        dict(progress_bar_id="e", request_id=["unhashable"]),
+    ]
+    for message in messages:
+        handler.announce(message=message)
+
+    assert _drain(all_listener) == messages
+    assert _drain(id_listener) == messages[:3]
+    assert _drain(request_listener) == [messages[0], messages[3]]
+    assert _drain(both_listener) == [messages[2]]
+    assert conjunction_listener.get_nowait() == dict(c=messages[3])
+
+    handler.unsubscribe(id_listener)
+    handler.unsubscribe(request_listener)
+    handler.unsubscribe(both_listener)
+    handler.unsubscribe(conjunction_listener)
+    assert handler._listeners_by_progress_bar_id == dict()
+    assert handler._listeners_by_metadata == dict()
+    assert handler._metadata_key_counts == dict()
+
+    handler.announce(message=messages[0])
+    assert _drain(all_listener) == [messages[0]]
+
+
+def test_filtered_announce_only_visits_matching_listeners():
+    handler = TQDMProgressHandler()
+    listeners = [handler.listen(metadata=dict(request_id=index)) for index in range(1000)]
+
+    matching_records = handler._get_matching_records(message=dict(progress_bar_id="a", request_id=10))
+    assert [record.get_listener() for record in matching_records] == [listeners[10]]
+    assert handler._get_matching_records(message=dict(progress_bar_id="a")) == ()
+
+
+def test_listening_context_manager():
+    handler = TQDMProgressHandler()
+    with handler.listening(maxsize=10) as listener:
+        assert handler.listeners == [listener]
+        handler.announce(message=dict(progress_bar_id="a"))
+        assert listener.get_nowait() == dict(progress_bar_id="a")
+    assert handler.listeners == []
+    assert handler.unsubscribe(listener) == False
+
+
+def test_weak_listeners_are_evicted_once_garbage_collected():
+    handler = TQDMProgressHandler()
+    strong_listener = handler.listen()
+    weak_listener = handler.listen(weak=True, metadata=dict(request_id="abc"))
+    handler.announce(message=dict(progress_bar_id="a", request_id="abc"))
+    assert weak_listener.get_nowait()["progress_bar_id"] == "a"
+
+    del weak_listener
+    assert handler.listeners == [strong_listener]
+    assert handler.eviction_counts["garbage_collected"] == 1
+    assert handler._metadata_key_counts == dict()
+
+
+def test_idle_listeners_are_evicted():
+    handler = TQDMProgressHandler()
+    abandoned_listener = handler.listen(idle_timeout=0.05)
+    slow_listener = handler.listen(idle_timeout=0.05)
+
+    for _ in range(3):
+        handler.announce(message=dict(progress_bar_id="a"))
+        slow_listener.get_nowait()  # Reads, although it never catches up
+        time.sleep(0.04)
+
+    assert handler.listeners == [slow_listener]
+    assert handler.eviction_counts["idle"] == 1
+    assert abandoned_listener.qsize() == 2  # The third announcement evicted it
+
+
+def test_disconnect_overflow_counts_as_eviction():
+    handler = TQDMProgressHandler()
+    listener = handler.listen(maxsize=1, overflow="disconnect")
+    handler.announce(message=dict(progress_bar_id="a"))
+    handler.announce(message=dict(progress_bar_id="a"))
+
+    assert handler.listeners == []
+    assert handler.eviction_counts == dict(garbage_collected=0, idle=0, overflow=1)
+
+
+def test_unsubscribe_many_listeners():
+    handler = TQDMProgressHandler()
+    listeners = [handler.listen() for _ in range(10_000)]
+
+    for listener in listeners[::2]:
+        assert handler.unsubscribe(listener)
+    assert handler.listeners == listeners[1::2]
+
+    handler.announce(message=dict(progress_bar_id="a"))
+    assert all(listener.qsize() == 1 for listener in listeners[1::2])
+    assert all(listener.qsize() == 0 for listener in listeners[::2])
+
+
+def test_snapshot_for_late_listeners():
+    handler = TQDMProgressHandler(state_maxsize=10, encoder=json.dumps)
+    finished_bar = handler.create_progress_subscriber(total=2, additional_metadata=dict(request_id="abc"))
+    finished_bar.update(2)
+    finished_bar.close()
+    running_bars = [
+        handler.create_progress_subscriber(total=5, additional_metadata=dict(request_id=request_id))
+        for request_id in ("abc", "def")
+    ]
+    running_bars[0].update(1)
+
+    listener = handler.listen(snapshot=True, metadata=dict(request_id="abc"))
+    snapshot = json.loads(listener.get_nowait().encoded)["snapshot"]
+    assert [message["progress_bar_id"] for message in snapshot] == [
+        finished_bar.progress_bar_id,
+        running_bars[0].progress_bar_id,
+    ]
+    assert snapshot[0]["format_dict"]["finished"] == True
+    assert snapshot[1]["format_dict"]["n"] == 1
+
+    running_bars[0].update(1)
+    running_bars[1].update(1)
+    assert listener.get_nowait()["format_dict"]["n"] == 2
+    assert listener.empty()
+
+    with pytest.raises(ValueError):
+        TQDMProgressHandler().listen(snapshot=True)
+
+
+def test_finished_states_expire():
+    handler = TQDMProgressHandler(state_maxsize=2, finished_ttl=60)
+    progress_bars = [handler.create_progress_subscriber(total=1) for _ in range(2)]
+    progress_bars[1].close()
+
+    # The finished progress bar is forgotten first to make room for a new one
+    new_progress_bar = handler.create_progress_subscriber(total=1)
+    assert [message["progress_bar_id"] for message in handler.snapshot()] == [
+        progress_bars[0].progress_bar_id,
+        new_progress_bar.progress_bar_id,
+    ]
+
+    handler.finished_ttl = 0
+    new_progress_bar.close()
+    assert [message["progress_bar_id"] for message in handler.snapshot()] == [progress_bars[0].progress_bar_id]
+
+
+def test_snapshot_merges_deltas():
+    handler = TQDMProgressHandler(state_maxsize=10)
+    progress_bar = handler.create_progress_subscriber(total=3, mininterval=0, publish_deltas=True, desc="Loading")
+    progress_bar.update(2)
+
+    (message,) = handler.snapshot(progress_bar_ids=[progress_bar.progress_bar_id])
+    assert message["format_dict"]["n"] == 2
+    assert message["format_dict"]["prefix"] == "Loading"
+    assert "delta" not in message
+
+
+def test_max_rate_downsamples_each_listener():
+    handler = TQDMProgressHandler()
+    every_message_listener = handler.listen()
+    downsampled_listener = handler.listen(max_rate=10)
+
+    progress_bar = handler.create_progress_subscriber(total=1000, mininterval=0, publish_finished=True)
+    for _ in range(1000):
+        progress_bar.update(1)
+    progress_bar.close()
+    time.sleep(0.2)
+
+    assert every_message_listener.qsize() == 1002
+    messages = [downsampled_listener.get_nowait()["format_dict"] for _ in range(downsampled_listener.qsize())]
+    assert len(messages) < 10
+    assert messages[0]["n"] == 0  # The first message of the progress bar is delivered at once
+    assert messages[-1]["n"] == 1000 and messages[-1]["finished"] == True  # And so is its final message
+
+
+def test_max_rate_delivers_the_newest_state_after_the_interval():
+    handler = TQDMProgressHandler()
+    listener = handler.listen(max_rate=20)
+    progress_bar = handler.create_progress_subscriber(total=10, mininterval=0, publish_deltas=True, desc="Loading")
+    progress_bar.update(1)
+    progress_bar.update(1)
+    progress_bar.update(1)
+
+    assert [listener.get_nowait()["format_dict"]["n"] for _ in range(2)] == [0, 1]
+    assert listener.empty()
+
+    # The undelivered deltas are merged, then delivered by the background thread
+    message = listener.get(timeout=1.0)
+    assert message["format_dict"]["n"] == 3
+    assert message["delta"] == True
+    assert listener.empty()
+
+    assert handler.unsubscribe(listener)
+    progress_bar.update(1)
+    progress_bar.update(1)
+    time.sleep(0.1)
+    assert listener.empty()
+
+    with pytest.raises(ValueError):
+        handler.listen(max_rate=0)
+
+
+def test_max_rate_is_rejected_for_asyncio_queues():
+    handler = TQDMProgressHandler(asyncio.Queue)
+    with pytest.raises(ValueError, match="alisten"):
+        handler.listen(max_rate=10)
+    assert not handler.listeners
+
+
+def test_listeners_can_be_read_while_subscribing():
+    handler = TQDMProgressHandler()
+    permanent_listener = handler.listen()
+    filtered_listener = handler.listen(metadata=dict(request_id="abc"))
+    stop = threading.Event()
+    errors = list()
+
+    def run(function):
+        try:
+            while not stop.is_set():
+                function()
+        except Exception as exception:
+            errors.append(exception)
+            stop.set()
+
+    def subscribe_and_unsubscribe(index):
+        listen_kwargs = [dict(), dict(progress_bar_ids=["a", "b"]), dict(metadata=dict(request_id="abc"))][index % 3]
+        listener = handler.listen(**listen_kwargs)
+        assert handler.unsubscribe(listener)
+
+    def announce():
+        handler.announce(message=dict(progress_bar_id="a", request_id="abc", format_dict=dict(n=1)))
+
+    def read_listeners():
+        assert permanent_listener in handler.listeners
+
+    threads = [
+        threading.Thread(target=run, args=(lambda index=index: subscribe_and_unsubscribe(index),)) for index in range(3)
+    ]
+    threads += [threading.Thread(target=run, args=(function,)) for function in (announce, read_listeners)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1.0)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == list()
+    assert handler.listeners == [permanent_listener, filtered_listener]
+    assert permanent_listener.qsize() == filtered_listener.qsize() > 0
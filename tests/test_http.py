@@ -0,0 +1,189 @@
+import pickle
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tqdm_publisher import (
+    BatchingSender,
+    BinaryCodec,
+    HTTPProgressForwarder,
+    JSONCodec,
+    TQDMProgressHandler,
+    announce_progress_batch,
+)
+
+
+class _StandInServer(ThreadingHTTPServer):
+    """A local server announcing the received batches on a handler, optionally failing the first requests."""
+
+    daemon_threads = True
+
+    def __init__(self, number_of_failures: int = 0):
+        self.handler = TQDMProgressHandler()
+        self.number_of_connections = 0
+        self.number_of_requests = 0
+        self.number_of_failures = number_of_failures
+        super().__init__(("localhost", 0), _StandInRequestHandler)
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.server_address[1]}/update"
+
+
+class _StandInRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Supports persistent connections
+
+    def setup(self):
+        super().setup()
+        self.server.number_of_connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.number_of_requests += 1
+
+        if self.server.number_of_failures > 0:
+            self.server.number_of_failures -= 1
+            self.send_response(503)
+        else:
+            codec = BinaryCodec if self.headers["Content-Type"] == BinaryCodec.content_type else JSONCodec
+            announce_progress_batch(handler=self.server.handler, body=body, codec=codec)
+            self.send_response(200)
+
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(request):
+    server = _StandInServer(number_of_failures=getattr(request, "param", 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _drain(queue):
+    messages = list()
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def test_batched_forwarding_over_persistent_connection(server):
+    listener = server.handler.listen()
+    forwarder = HTTPProgressForwarder(url=server.url, max_batch_size=25, max_batch_interval=60)
+
+    progress_bars = [
+        forwarder.create_progress_subscriber(total=50, mininterval=0, additional_metadata=dict(request_id="abc"))
+        for _ in range(2)
+    ]
+    for _ in range(50):
+        for progress_bar in progress_bars:
+            progress_bar.update(1)
+    for progress_bar in progress_bars:
+        progress_bar.close()
+    assert forwarder.close(timeout=5) == True
+
+    messages = _drain(listener)
+    assert len(messages) == 102
+    assert all(message["request_id"] == "abc" for message in messages)
+    for progress_bar in progress_bars:
+        n_values = [
+            message["format_dict"]["n"]
+            for message in messages
+            if message["progress_bar_id"] == progress_bar.progress_bar_id
+        ]
+        assert n_values == list(range(51))
+
+    assert server.number_of_requests == 5
+    assert server.number_of_connections == 1
+
+
+def test_binary_codec(server):
+    listener = server.handler.listen()
+    forwarder = HTTPProgressForwarder(url=server.url, max_batch_size=10, max_batch_interval=60, codec=BinaryCodec)
+    forwarder = pickle.loads(pickle.dumps(forwarder))
+
+    progress_bar = forwarder.create_progress_subscriber(
+        total=20, mininterval=0, additional_metadata=dict(request_id="abc")
+    )
+    for _ in range(20):
+        progress_bar.update(1)
+    progress_bar.close()
+    assert forwarder.close(timeout=5) == True
+
+    messages = _drain(listener)
+    assert [message["format_dict"]["n"] for message in messages] == list(range(21))
+    assert messages[-1]["format_dict"]["total"] == 20
+    assert all(message["progress_bar_id"] == progress_bar.progress_bar_id for message in messages)
+    assert all(message["request_id"] == "abc" for message in messages)
+    assert server.number_of_requests == 3
+
+
+def test_time_threshold(server):
+    listener = server.handler.listen()
+    forwarder = HTTPProgressForwarder(url=server.url, max_batch_size=100, max_batch_interval=0.05)
+
+    forwarder(message=dict(progress_bar_id="a"))
+    forwarder(message=dict(progress_bar_id="b"))
+    assert listener.get(timeout=5) == dict(progress_bar_id="a")
+    assert listener.get(timeout=5) == dict(progress_bar_id="b")
+    assert server.number_of_requests == 1
+    forwarder.close()
+
+
+@pytest.mark.parametrize("server", [2], indirect=True)
+def test_retries(server):
+    listener = server.handler.listen()
+    forwarder = HTTPProgressForwarder(url=server.url, retry_interval=0.01)
+
+    forwarder(message=dict(progress_bar_id="a"))
+    forwarder.flush(timeout=5)
+
+    assert _drain(listener) == [dict(progress_bar_id="a")]
+    assert server.number_of_requests == 3
+    assert forwarder.dropped_messages == 0
+    forwarder.close()
+
+
+def test_dropped_after_retries():
+    forwarder = HTTPProgressForwarder(url="http://localhost:1/update", max_retries=1, retry_interval=0.01)
+    forwarder = pickle.loads(pickle.dumps(forwarder))
+
+    forwarder(message=dict(progress_bar_id="a"))
+    assert forwarder.close(timeout=5) == True
+    assert forwarder.dropped_messages == 1
+
+
+def test_messages_sent_after_close_are_dropped():
+    forwarder = HTTPProgressForwarder(url="http://localhost:1/update")
+    progress_bar = forwarder.create_progress_subscriber(total=3)
+    forwarder.close(timeout=5)
+    dropped_messages = forwarder.dropped_messages
+
+    progress_bar.update(3)  # E.g., during the shutdown of the interpreter; must not raise
+    assert forwarder.dropped_messages == dropped_messages + 1
+
+
+def test_closing_a_progress_bar_waits_a_bounded_time_for_retries(caplog):
+    forwarder = HTTPProgressForwarder(url="http://localhost:1/update", max_retries=3, retry_interval=1.0)
+    progress_bar = forwarder.create_progress_subscriber(total=3, flush_timeout=0.2)
+    progress_bar.update(3)
+
+    start = time.perf_counter()
+    progress_bar.close()
+    assert time.perf_counter() - start < 1.0
+    assert "were not sent within 0.2 seconds" in caplog.text
+
+    assert forwarder.close(timeout=10) == True
+
+
+def test_batching_sender_is_abstract():
+    with pytest.raises(TypeError):
+        BatchingSender()
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+from tqdm_publisher import (
+    ProgressInstrumentation,
+    TQDMProgressHandler,
+    TQDMProgressPublisher,
+)
+
+
+def test_callback_metrics():
+    instrumentation = ProgressInstrumentation()
+    publisher = TQDMProgressPublisher(total=10, instrumentation=instrumentation)
+
+    fast_callback_id = publisher.subscribe(lambda format_dict: None)
+    slow_callback_id = publisher.subscribe(lambda format_dict: time.sleep(0.002))
+    for _ in range(3):
+        publisher.update(1)
+
+    callbacks = instrumentation.snapshot()["callbacks"]
+    assert set(callbacks) == {fast_callback_id, slow_callback_id}
+    assert callbacks[fast_callback_id]["progress_bar_id"] == publisher.progress_bar_id
+    assert callbacks[fast_callback_id]["latency"]["count"] == 3
+    assert sum(callbacks[fast_callback_id]["latency"]["histogram"]) == 3
+    assert callbacks[slow_callback_id]["latency"]["max_seconds"] >= 0.002
+    assert callbacks[slow_callback_id]["latency"]["histogram"][4] == 3  # Between 1 and 10 milliseconds
+
+    publisher.unsubscribe(slow_callback_id)
+    assert set(instrumentation.snapshot()["callbacks"]) == {fast_callback_id}
+
+
+def test_callback_exceptions_are_recorded_and_raised():
+    instrumentation = ProgressInstrumentation()
+    publisher = TQDMProgressPublisher(total=10, instrumentation=instrumentation)
+
+    def failing_callback(format_dict):
+        if format_dict["n"] > 0:
+            raise RuntimeError("Unavailable")
+
+    callback_id = publisher.subscribe(failing_callback)
+    with pytest.raises(RuntimeError):
+        publisher.update(1)
+
+    metrics = instrumentation.snapshot()["callbacks"][callback_id]
+    assert metrics["number_of_exceptions"] == 1
+    assert metrics["last_exception"] == "RuntimeError('Unavailable')"
+
+
+def test_listener_and_announcement_metrics():
+    instrumentation = ProgressInstrumentation()
+    handler = TQDMProgressHandler(instrumentation=instrumentation)
+    consumed_listener = handler.listen()
+    backed_up_listener = handler.listen()
+
+    for n in range(5):
+        handler.announce(message=dict(progress_bar_id="a", format_dict=dict(n=n)))
+        consumed_listener.get_nowait()
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["announcements"]["count"] == 5
+    listeners = {metrics["listener_id"]: metrics for metrics in snapshot["listeners"]}
+    assert listeners[id(consumed_listener)]["depth"] == 0
+    assert listeners[id(consumed_listener)]["high_water_mark"] == 1
+    assert listeners[id(backed_up_listener)]["depth"] == 5
+    assert listeners[id(backed_up_listener)]["high_water_mark"] == 5
+    assert listeners[id(backed_up_listener)]["number_of_enqueued_messages"] == 5
+    assert listeners[id(backed_up_listener)]["enqueue_rate"] > 0
+
+    # The rate is measured since the previous snapshot that reset its window
+    assert instrumentation.snapshot()["listeners"][0]["enqueue_rate"] > 0
+    instrumentation.snapshot(reset=True)
+    assert instrumentation.snapshot()["listeners"][0]["enqueue_rate"] == 0
+
+    handler.unsubscribe(backed_up_listener)
+    assert [metrics["listener_id"] for metrics in instrumentation.snapshot()["listeners"]] == [id(consumed_listener)]
+
+
+def test_hook():
+    snapshots = list()
+    instrumentation = ProgressInstrumentation(hook=snapshots.append, hook_interval=0.0)
+    handler = TQDMProgressHandler(instrumentation=instrumentation)
+    handler.listen()
+
+    handler.announce(message=dict(progress_bar_id="a"))
+    handler.announce(message=dict(progress_bar_id="a"))
+    assert [snapshot["announcements"]["count"] for snapshot in snapshots] == [1, 2]
+
+
+def test_hook_and_snapshots_keep_separate_rate_windows():
+    snapshots = list()
+    instrumentation = ProgressInstrumentation(hook=snapshots.append, hook_interval=0.0)
+    handler = TQDMProgressHandler(instrumentation=instrumentation)
+    handler.listen()
+
+    handler.announce(message=dict(progress_bar_id="a"))
+    assert snapshots[-1]["listeners"][0]["enqueue_rate"] > 0
+    assert instrumentation.snapshot(reset=True)["listeners"][0]["enqueue_rate"] > 0
+
+    # Neither the hook nor a manual snapshot starts a new window for the other
+    handler.announce(message=dict(progress_bar_id="a"))
+    assert snapshots[-1]["listeners"][0]["enqueue_rate"] > 0
+    assert instrumentation.snapshot()["listeners"][0]["enqueue_rate"] > 0
@@ -0,0 +1,124 @@
+import hashlib
+import time
+
+import pytest
+
+from tqdm_publisher import ProgressJournal, ProgressJournalReader, TQDMProgressHandler
+
+
+def test_journal_of_handler(tmp_path):
+    path = tmp_path / "progress.journal"
+    handler = TQDMProgressHandler()
+    journal = handler.listen_journal(path=path, capacity=100)
+
+    progress_bars = [
+        handler.create_progress_subscriber(total=3, mininterval=0, desc=f"Bar {index}", publish_finished=True)
+        for index in range(2)
+    ]
+    for _ in range(3):
+        for progress_bar in progress_bars:
+            progress_bar.update(1)
+    for progress_bar in progress_bars:
+        progress_bar.close()
+    handler.announce(message=dict(snapshot=list()))  # Not a progress message; ignored
+
+    reader = ProgressJournalReader(path=path)
+    messages = list(reader.read())
+    assert len(messages) == journal.number_of_written_records == 10
+
+    messages = list(reader.read(progress_bar_ids=[progress_bars[1].progress_bar_id]))
+    assert [message["format_dict"]["n"] for message in messages] == [0, 1, 2, 3, 3]
+    assert all(message["progress_bar_id"] == progress_bars[1].progress_bar_id for message in messages)
+    assert messages[0]["format_dict"]["total"] == 3
+    assert messages[0]["format_dict"]["prefix"] == "Bar 1"
+    assert messages[-1]["format_dict"]["finished"] == True
+    assert "finished" not in messages[-2]["format_dict"]
+
+    assert handler.unsubscribe(journal)
+    assert journal.closed
+    handler.announce(message=dict(progress_bar_id="a", format_dict=dict(n=1)))
+    assert len(list(reader.read())) == 10
+
+
+def test_ring_retention_and_time_range(tmp_path):
+    path = tmp_path / "progress.journal"
+    with ProgressJournal(path=path, capacity=4) as journal:
+        for n in range(6):
+            journal.put_nowait(dict(progress_bar_id="a", format_dict=dict(n=n, total=None, elapsed=0.5)))
+        middle_time = time.time()
+        journal.put_nowait(dict(progress_bar_id="b", format_dict=dict(n=0)))
+
+    assert path.stat().st_size == 64 + 4 * 112
+    reader = ProgressJournalReader(path=path)
+    messages = list(reader.read())
+    assert [(message["progress_bar_id"], message["format_dict"]["n"]) for message in messages] == [
+        ("a", 3),
+        ("a", 4),
+        ("a", 5),
+        ("b", 0),
+    ]
+    assert messages[0]["format_dict"]["total"] is None
+    assert messages[0]["format_dict"]["elapsed"] == 0.5
+
+    assert [message["progress_bar_id"] for message in reader.read(start_time=middle_time)] == ["b"]
+    assert [message["progress_bar_id"] for message in reader.read(end_time=middle_time)] == ["a"] * 3
+
+    # Reopening a journal with the same capacity appends to it
+    with ProgressJournal(path=path, capacity=4) as journal:
+        journal.put_nowait(dict(progress_bar_id="c" * 40, format_dict=dict(n=1)))
+    messages = list(reader.read())
+    assert [message["format_dict"]["n"] for message in messages] == [4, 5, 0, 1]
+
+    # The IDs that are neither UUIDs nor short are stored as a hash, which can still be filtered on
+    (message,) = reader.read(progress_bar_ids=["c" * 40])
+    assert message["progress_bar_id"] == hashlib.blake2b(b"c" * 40, digest_size=16).hexdigest()
+
+
+def test_replay(tmp_path):
+    path = tmp_path / "progress.journal"
+    with ProgressJournal(path=path) as journal:
+        for n in range(3):
+            journal.put_nowait(dict(progress_bar_id="a", format_dict=dict(n=n, prefix="Loading")))
+
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+    assert ProgressJournalReader(path=path).replay(handler=handler, progress_bar_ids=["a"]) == 3
+    assert [listener.get_nowait()["format_dict"]["n"] for _ in range(3)] == [0, 1, 2]
+
+
+def test_not_a_journal(tmp_path):
+    path = tmp_path / "progress.journal"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        ProgressJournalReader(path=path)
+
+
+def test_other_files_are_not_replaced(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"Not a journal")
+    with pytest.raises(ValueError):
+        ProgressJournal(path=path)
+    assert path.read_bytes() == b"Not a journal"
+
+    path = tmp_path / "progress.journal"
+    ProgressJournal(path=path, capacity=4).close()
+    with pytest.raises(ValueError):
+        ProgressJournal(path=path, capacity=8)
+    assert path.stat().st_size == 64 + 4 * 112
+
+    path = tmp_path / "empty.journal"
+    path.touch()
+    with ProgressJournal(path=path, capacity=4) as journal:
+        journal.put_nowait(dict(progress_bar_id="a", format_dict=dict(n=1)))
+    assert len(list(ProgressJournalReader(path=path).read())) == 1
+
+
+def test_end_time_with_records_out_of_time_order(tmp_path, monkeypatch):
+    path = tmp_path / "progress.journal"
+    with ProgressJournal(path=path) as journal:
+        for n, timestamp in enumerate((10.0, 30.0, 20.0)):  # E.g., written by two processes whose clocks differ
+            monkeypatch.setattr("tqdm_publisher._journal.time", lambda: timestamp)
+            journal.put_nowait(dict(progress_bar_id="a", format_dict=dict(n=n)))
+
+    reader = ProgressJournalReader(path=path)
+    assert [message["format_dict"]["n"] for message in reader.read(end_time=25.0)] == [0, 2]
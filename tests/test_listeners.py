@@ -0,0 +1,135 @@
+import asyncio
+import queue
+import threading
+
+import pytest
+
+from tqdm_publisher import TQDMProgressHandler
+
+
+def test_conflating_listener():
+    handler = TQDMProgressHandler()
+    listener = handler.listen_latest()
+    full_listener = handler.listen()
+
+    progress_bars = [handler.create_progress_subscriber(total=100, mininterval=0) for _ in range(3)]
+    for _ in range(100):
+        for progress_bar in progress_bars:
+            progress_bar.update(1)
+
+    assert listener.qsize() == 3
+    assert full_listener.qsize() == 303
+
+    latest_messages = listener.get()
+    assert set(latest_messages) == {progress_bar.progress_bar_id for progress_bar in progress_bars}
+    assert all(message["format_dict"]["n"] == 100 for message in latest_messages.values())
+    assert listener.empty()
+
+    progress_bars[0].update(1)
+    assert list(listener.get_nowait()) == [progress_bars[0].progress_bar_id]
+
+    with pytest.raises(queue.Empty):
+        listener.get_nowait()
+
+    assert handler.unsubscribe(listener) == True
+
+
+def test_conflating_listener_merges_deltas():
+    handler = TQDMProgressHandler()
+    listener = handler.listen_latest()
+    progress_bar = handler.create_progress_subscriber(total=10, mininterval=0, publish_deltas=True, desc="Loading")
+    assert listener.get_nowait()[progress_bar.progress_bar_id]["delta"] == False
+
+    progress_bar.set_description_str("Saving", refresh=False)
+    progress_bar.update(1)
+    progress_bar.update(1)
+
+    # Coalesced into one delta, with the prefix from the first one
+    (message,) = listener.get_nowait().values()
+    assert message["delta"] == True  # Still relative to the previously read message
+    assert message["format_dict"]["n"] == 2
+    assert message["format_dict"]["prefix"] == "Saving"
+    assert "elapsed" in message["format_dict"] and "total" not in message["format_dict"]
+
+
+def test_conflating_listener_blocking_get():
+    handler = TQDMProgressHandler()
+    listener = handler.listen_latest()
+
+    with pytest.raises(queue.Empty):
+        listener.get(timeout=0.01)
+
+    timer = threading.Timer(interval=0.05, function=handler.announce, kwargs=dict(message=dict(progress_bar_id="a")))
+    timer.start()
+    assert listener.get(timeout=5) == {"a": dict(progress_bar_id="a")}
+    timer.join()
+
+
+@pytest.mark.asyncio
+async def test_async_listener_from_thread():
+    handler = TQDMProgressHandler()
+    listener = handler.alisten()
+
+    def run_progress_bar():
+        progress_bar = handler.create_progress_subscriber(total=100, mininterval=0)
+        for _ in range(100):
+            progress_bar.update(1)
+        progress_bar.close()
+        handler.unsubscribe(listener)  # Ends the iteration
+
+    thread = threading.Thread(target=run_progress_bar)
+    thread.start()
+
+    messages = [message async for message in listener]
+    thread.join()
+
+    assert [message["format_dict"]["n"] for message in messages] == list(range(101))
+
+
+@pytest.mark.asyncio
+async def test_async_listener_batches():
+    handler = TQDMProgressHandler()
+    listener = handler.alisten()
+
+    thread = threading.Thread(target=lambda: [handler.announce(message=dict(index=index)) for index in range(1000)])
+    thread.start()
+    thread.join()
+
+    batch = await listener.get_batch()
+    assert [message["index"] for message in batch] == list(range(1000))
+    assert listener.empty()
+
+
+@pytest.mark.asyncio
+async def test_async_listener_overflow():
+    handler = TQDMProgressHandler()
+    listener = handler.alisten(maxsize=2)
+
+    for index in range(5):
+        handler.announce(message=dict(index=index))
+
+    assert [message["index"] for message in await listener.get_batch()] == [3, 4]
+    assert handler.get_dropped_message_count(listener) == 3
+
+    with pytest.raises(ValueError):
+        handler.alisten(overflow="block")
+
+
+def test_async_listener_created_outside_its_loop():
+    handler = TQDMProgressHandler()
+    loop = asyncio.new_event_loop()
+    try:
+        listener = handler.alisten(loop=loop)  # Created while no event loop is running
+
+        def announce():
+            for index in range(3):
+                handler.announce(message=dict(index=index))
+            handler.unsubscribe(listener)
+
+        async def consume():
+            threading.Timer(interval=0.05, function=announce).start()
+            return [message["index"] async for message in listener]
+
+        assert loop.run_until_complete(asyncio.wait_for(consume(), timeout=5)) == [0, 1, 2]
+    finally:
+        loop.close()
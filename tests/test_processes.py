@@ -0,0 +1,98 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tqdm_publisher import (
+    ProcessProgressReceiver,
+    ProcessProgressSender,
+    TQDMProgressHandler,
+)
+
+N_JOBS = 3
+N_ITERATIONS_PER_JOB = 50
+
+
+def _run_task(progress_sender: ProcessProgressSender, job_index: int) -> str:
+    progress_bar = progress_sender.create_progress_subscriber(
+        range(N_ITERATIONS_PER_JOB), mininterval=0, additional_metadata=dict(job_index=job_index)
+    )
+    for _ in progress_bar:
+        pass
+
+    return progress_bar.progress_bar_id
+
+
+def _drain(queue):
+    messages = list()
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def test_progress_from_process_pool():
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+
+    with ProcessProgressReceiver(handler=handler) as receiver:
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            futures = [executor.submit(_run_task, receiver.sender, job_index) for job_index in range(N_JOBS)]
+            progress_bar_ids = [future.result() for future in futures]
+
+    messages = _drain(listener)
+    assert {message["progress_bar_id"] for message in messages} == set(progress_bar_ids)
+
+    for job_index, progress_bar_id in enumerate(progress_bar_ids):
+        job_messages = [message for message in messages if message["progress_bar_id"] == progress_bar_id]
+        assert all(message["job_index"] == job_index for message in job_messages)
+        assert [message["format_dict"]["n"] for message in job_messages] == list(range(N_ITERATIONS_PER_JOB + 1))
+
+
+def test_progress_from_same_process():
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+
+    with ProcessProgressReceiver(handler=handler, max_batch_size=10**6, max_batch_interval=10**6) as receiver:
+        progress_bar = receiver.sender.create_progress_subscriber(total=10, mininterval=0)
+        for _ in range(10):
+            progress_bar.update(1)
+
+        assert listener.empty()  # Still batched
+        progress_bar.close()  # Sends the batch
+
+        receiver.close()  # Waits until the batch is announced
+    assert [message["format_dict"]["n"] for message in _drain(listener)] == list(range(11))
+
+
+def test_close_does_not_hang_when_the_wake_up_fails(monkeypatch):
+    receiver = ProcessProgressReceiver(handler=TQDMProgressHandler())
+
+    def failing_client(*args, **kwargs):
+        raise OSError
+
+    monkeypatch.setattr("tqdm_publisher._processes.Client", failing_client)
+    start = time.perf_counter()
+    receiver.close(timeout=0.2)
+    assert time.perf_counter() - start < 2.0
+
+
+def test_failing_listener_does_not_busy_loop(monkeypatch):
+    receiver = ProcessProgressReceiver(handler=TQDMProgressHandler())
+    receiver.close()
+
+    number_of_accepts = 0
+
+    def failing_accept():
+        nonlocal number_of_accepts
+        number_of_accepts += 1
+        raise OSError
+
+    receiver._closing = False
+    monkeypatch.setattr(receiver._listener, "accept", failing_accept)
+    accepting_thread = threading.Thread(target=receiver._accept_connections, daemon=True)
+    accepting_thread.start()
+    time.sleep(0.3)
+    receiver._closing = True
+    accepting_thread.join(timeout=2.0)
+
+    assert not accepting_thread.is_alive()
+    assert number_of_accepts < 10
@@ -1,4 +1,6 @@
 import asyncio
+import threading
+from uuid import UUID
 
 import pytest
 
@@ -13,6 +15,15 @@ def test_initialization():
     assert len(publisher.callbacks) == 0
 
 
+def test_identifiers_are_unique_uuid4_strings():
+    publishers = [TQDMProgressPublisher(total=1) for _ in range(1000)]  # More IDs than drawn at once
+    callback_ids = [publisher.subscribe(callback=lambda format_dict: None) for publisher in publishers]
+
+    identifiers = [publisher.progress_bar_id for publisher in publishers] + callback_ids
+    assert len(set(identifiers)) == len(identifiers)
+    assert all(str(UUID(identifier, version=4)) == identifier for identifier in identifiers)
+
+
 # Test concurrent callback execution
 @pytest.mark.asyncio
 async def test_subscription_and_callback_execution():
@@ -61,3 +72,195 @@ def test_unsubscription():
 
     result = publisher.unsubscribe(callback_id)
     assert result == False
+
+
+def test_subscriptions_from_other_threads_during_updates():
+    publisher = TQDMProgressPublisher(total=20_000)
+    received = list()
+    errors = list()
+
+    def iterate():
+        try:
+            for _ in range(20_000):
+                publisher.update(1)
+        except Exception as exception:
+            errors.append(exception)
+
+    thread = threading.Thread(target=iterate)
+    thread.start()
+    while thread.is_alive():
+        callback_id = publisher.subscribe(lambda format_dict: received.append(format_dict["n"]))
+        publisher.subscribe_descendants(lambda message: None)
+        assert publisher.unsubscribe(callback_id)
+    thread.join()
+
+    assert errors == list()
+    assert len(publisher.callbacks) == 0
+    assert len(received) > 0
+    with pytest.raises(TypeError):  # The registry is only changed through `subscribe` and `unsubscribe`
+        publisher.callbacks["callback_id"] = print
+
+
+def test_publish_miniters_coalesces_updates():
+    published_n = list()
+
+    publisher = TQDMProgressPublisher(total=100, publish_miniters=10)
+    publisher.subscribe(lambda format_dict: published_n.append(format_dict["n"]))
+
+    for _ in range(95):
+        publisher.update(1)
+
+    assert published_n == [0, 1, 11, 21, 31, 41, 51, 61, 71, 81, 91]
+
+    publisher.close()
+    assert published_n[-1] == 95
+
+
+def test_decreasing_progress_is_published_at_once():
+    published_n = list()
+
+    publisher = TQDMProgressPublisher(total=100, publish_miniters=10, publish_mininterval=60)
+    publisher.subscribe(lambda format_dict: published_n.append(format_dict["n"]))
+
+    publisher.update(50)
+    publisher.update(-5)
+    publisher.update(1)  # Coalesced again
+    publisher.reset()
+    publisher.update(1)
+    assert published_n == [0, 50, 45, 1]
+
+    publisher.close()
+
+
+def test_publish_mininterval_coalesces_updates():
+    published_n = list()
+
+    publisher = TQDMProgressPublisher(total=1000, publish_mininterval=60)
+    publisher.subscribe(lambda format_dict: published_n.append(format_dict["n"]))
+
+    for _ in range(1000):
+        publisher.update(1)
+
+    assert published_n == [0, 1]
+
+    publisher.close()
+    assert published_n == [0, 1, 1000]
+
+
+def test_final_state_published_on_close_after_iteration():
+    published_n = list()
+
+    publisher = TQDMProgressPublisher(range(10**4), publish_mininterval=60)
+    publisher.subscribe(lambda format_dict: published_n.append(format_dict["n"]))
+
+    for _ in publisher:
+        pass
+
+    assert published_n[-1] == 10**4
+
+
+def test_no_publication_on_close_without_progress():
+    published_n = list()
+
+    publisher = TQDMProgressPublisher(total=10)
+    publisher.subscribe(lambda format_dict: published_n.append(format_dict["n"]))
+    publisher.close()
+
+    assert published_n == [0]  # Only the state sent on subscription
+
+
+def test_publish_deltas():
+    first_payloads = list()
+    second_payloads = list()
+
+    publisher = TQDMProgressPublisher(total=10, publish_deltas=True)
+    publisher.subscribe(first_payloads.append)
+    publisher.update(1)
+    publisher.subscribe(second_payloads.append)
+    publisher.update(1)
+
+    assert "unit" in first_payloads[0] and "total" in first_payloads[0]
+    assert all("unit" not in payload and "total" not in payload for payload in first_payloads[1:])
+    assert first_payloads[1]["n"] == 1
+
+    assert "unit" in second_payloads[0]
+    assert second_payloads[-1]["n"] == 2
+
+    first_state = dict()
+    for payload in first_payloads:
+        first_state.update(payload)
+    second_state = dict()
+    for payload in second_payloads:
+        second_state.update(payload)
+    assert first_state == second_state
+    publisher.close()
+
+
+def test_children_roll_up_into_parent():
+    parent = TQDMProgressPublisher(mininterval=0)
+    parent_format_dicts = list()
+    parent.subscribe(parent_format_dicts.append)
+
+    children = [TQDMProgressPublisher(total=10, mininterval=0, parent=parent) for _ in range(3)]
+    assert parent.total == 30
+    assert parent.number_of_active_children == 3
+
+    for child in children:
+        child.update(4)
+    assert parent.n == 12
+    assert parent_format_dicts[-1]["n"] == 12
+    assert parent_format_dicts[-1]["active_children"] == 3
+
+    for _ in TQDMProgressPublisher(range(5), parent=parent):  # Iteration only updates at the display interval
+        pass
+    children[0].update(6)
+    children[0].close()
+
+    assert parent.n == 23
+    assert parent.total == 35
+    assert (parent.number_of_active_children, parent.number_of_finished_children) == (2, 2)
+    assert parent_format_dicts[-1]["n"] == 23
+    assert parent_format_dicts[-1]["finished_children"] == 2
+
+    children[0].close()  # Closing twice does not count twice
+    assert parent.number_of_finished_children == 2
+
+
+def test_grandchildren_roll_up_and_descendant_subscriptions():
+    root = TQDMProgressPublisher(mininterval=0)
+    middle = TQDMProgressPublisher(mininterval=0, parent=root)
+    leaf = TQDMProgressPublisher(total=4, mininterval=0, parent=middle)
+    assert (root.depth, middle.depth, leaf.depth) == (0, 1, 2)
+    assert root.total == middle.total == 4
+
+    children_messages, descendant_messages = list(), list()
+    root.subscribe_descendants(children_messages.append, depth=1)
+    callback_id = root.subscribe_descendants(descendant_messages.append, depth=2)
+
+    leaf.update(1)
+    assert root.n == 1
+    assert [message["progress_bar_id"] for message in children_messages] == [middle.progress_bar_id]
+    assert [message["progress_bar_id"] for message in descendant_messages] == [
+        middle.progress_bar_id,
+        leaf.progress_bar_id,
+    ]
+    assert descendant_messages[-1]["parent_progress_bar_id"] == middle.progress_bar_id
+    assert descendant_messages[-1]["format_dict"]["n"] == 1
+
+    assert root.unsubscribe(callback_id)
+    leaf.update(1)
+    assert len(descendant_messages) == 2
+    assert len(children_messages) == 2
+
+
+def test_publish_finished():
+    format_dicts = list()
+    publisher = TQDMProgressPublisher(total=2, mininterval=0, publish_finished=True)
+    publisher.subscribe(format_dicts.append)
+    publisher.update(2)
+    publisher.close()
+    publisher.close()
+
+    assert [format_dict["n"] for format_dict in format_dicts] == [0, 2, 2]  # Published again once finished
+    assert "finished" not in format_dicts[1]
+    assert format_dicts[-1]["finished"] == True
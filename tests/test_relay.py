@@ -0,0 +1,140 @@
+import os
+import socket
+import time
+
+from tqdm_publisher import (
+    BinaryCodec,
+    ProgressRelay,
+    ProgressRelayServer,
+    TQDMProgressHandler,
+)
+
+AUTHKEY = os.urandom(16)
+
+
+def _wait_for(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _drain(listener):
+    messages = list()
+    while not listener.empty():
+        messages.append(listener.get_nowait())
+    return messages
+
+
+def test_relay_merges_sources():
+    upstream_handlers = [TQDMProgressHandler() for _ in range(2)]
+    servers = [
+        ProgressRelayServer(handler=handler, authkey=AUTHKEY, max_batch_interval=0.01) for handler in upstream_handlers
+    ]
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+    host_listener = handler.listen(metadata=dict(source="host-1"))
+
+    with ProgressRelay(
+        handler=handler,
+        upstreams={f"host-{index}": server.address for index, server in enumerate(servers)},
+        authkey=AUTHKEY,
+    ) as relay:
+        assert _wait_for(lambda: relay.connected_sources == {"host-0", "host-1"})
+        assert _wait_for(lambda: all(len(upstream.listeners) == 1 for upstream in upstream_handlers))
+
+        progress_bars = [
+            upstream.create_progress_subscriber(total=10, mininterval=0, additional_metadata=dict(request_id="abc"))
+            for upstream in upstream_handlers
+        ]
+        for progress_bar in progress_bars:
+            progress_bar.update(10)
+            progress_bar.close()
+
+        expected_ids = {
+            f"host-{index}:{progress_bar.progress_bar_id}" for index, progress_bar in enumerate(progress_bars)
+        }
+        latest_messages = dict()
+
+        def has_final_states():
+            for message in _drain(listener):
+                latest_messages[message["progress_bar_id"]] = message
+            return set(latest_messages) == expected_ids and all(
+                message["format_dict"]["n"] == 10 for message in latest_messages.values()
+            )
+
+        assert _wait_for(has_final_states)
+        assert all(message["request_id"] == "abc" for message in latest_messages.values())
+        assert {message["source"] for message in _drain(host_listener)} == {"host-1"}
+
+    for server in servers:
+        server.close()
+    assert all(upstream.listeners == [] for upstream in upstream_handlers)
+
+
+def test_relay_reconnects_and_resyncs():
+    upstream_handler = TQDMProgressHandler(state_maxsize=100)
+    progress_bar = upstream_handler.create_progress_subscriber(total=10, mininterval=0)
+    progress_bar.update(3)
+
+    server = ProgressRelayServer(handler=upstream_handler, authkey=AUTHKEY, max_batch_interval=0.01)
+    address = server.address
+    handler = TQDMProgressHandler(state_maxsize=100)
+    relayed_id = f"host:{progress_bar.progress_bar_id}"
+
+    with ProgressRelay(
+        handler=handler, upstreams=dict(host=address), authkey=AUTHKEY, reconnect_interval=0.01
+    ) as relay:
+        # The state of the source is received on connection
+        assert _wait_for(lambda: [message["format_dict"]["n"] for message in handler.snapshot()] == [3])
+
+        server.close()
+        assert _wait_for(lambda: not relay.connected_sources)
+        progress_bar.update(4)  # Missed while disconnected
+
+        server = ProgressRelayServer(handler=upstream_handler, authkey=AUTHKEY, address=address)
+        assert _wait_for(lambda: handler.snapshot(progress_bar_ids=[relayed_id])[0]["format_dict"]["n"] == 7)
+        assert relay.number_of_connections["host"] >= 2
+
+    server.close()
+
+
+def test_relay_with_binary_codec():
+    upstream_handler = TQDMProgressHandler()
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+
+    server = ProgressRelayServer(handler=upstream_handler, authkey=AUTHKEY, max_batch_interval=0.01, codec=BinaryCodec)
+    with ProgressRelay(handler=handler, upstreams=dict(host=server.address), authkey=AUTHKEY, codec=BinaryCodec):
+        assert _wait_for(lambda: len(upstream_handler.listeners) == 1)
+        progress_bar = upstream_handler.create_progress_subscriber(total=10, mininterval=0)
+        progress_bar.update(10)
+        progress_bar.close()
+
+        messages = list()
+
+        def has_final_state():
+            messages.extend(_drain(listener))
+            return any(message["format_dict"]["n"] == 10 for message in messages)
+
+        assert _wait_for(has_final_state)
+        assert all(message["progress_bar_id"] == f"host:{progress_bar.progress_bar_id}" for message in messages)
+
+    server.close()
+
+
+def test_relay_close_does_not_hang_on_a_silent_source():
+    silent_server = socket.create_server(("localhost", 0))  # Accepts connections but never answers the handshake
+    handler = TQDMProgressHandler()
+    try:
+        relay = ProgressRelay(handler=handler, upstreams=dict(host=silent_server.getsockname()), authkey=AUTHKEY)
+        connection, _ = silent_server.accept()
+        start_time = time.monotonic()
+        relay.close(timeout=0.1)
+        assert time.monotonic() - start_time < 2
+        assert not relay.connected_sources
+        connection.close()
+    finally:
+        silent_server.close()
@@ -0,0 +1,71 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from tqdm_publisher import SharedProgressBoard, SharedProgressSlot, TQDMProgressHandler
+
+N_JOBS = 4
+N_ITERATIONS_PER_JOB = 1000
+
+
+def _run_job(slot: SharedProgressSlot) -> None:
+    for _ in slot.create_progress_publisher(range(N_ITERATIONS_PER_JOB), mininterval=0):
+        pass
+
+
+def _drain(queue):
+    messages = list()
+    while not queue.empty():
+        messages.append(queue.get_nowait())
+    return messages
+
+
+def test_progress_from_process_pool():
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+
+    with SharedProgressBoard(handler=handler, number_of_slots=N_JOBS, sampling_interval=0.01) as board:
+        slots = [
+            board.get_slot(index=job_index, additional_metadata=dict(job_index=job_index))
+            for job_index in range(N_JOBS)
+        ]
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for future in [executor.submit(_run_job, slot) for slot in slots]:
+                future.result()
+
+    messages = _drain(listener)
+    for job_index, slot in enumerate(slots):
+        job_messages = [message for message in messages if message["progress_bar_id"] == slot.progress_bar_id]
+        assert all(message["job_index"] == job_index for message in job_messages)
+
+        # Intermediate states may be skipped, but never repeated, and the final state is always announced
+        n_values = [message["format_dict"]["n"] for message in job_messages]
+        assert n_values == sorted(set(n_values))
+        assert job_messages[-1]["format_dict"]["n"] == N_ITERATIONS_PER_JOB
+        assert job_messages[-1]["format_dict"]["total"] == N_ITERATIONS_PER_JOB
+
+
+def test_sample_announces_changed_slots_only():
+    handler = TQDMProgressHandler()
+    listener = handler.listen()
+
+    with SharedProgressBoard(handler=handler, number_of_slots=3, sampling_interval=60) as board:
+        slots = [pickle.loads(pickle.dumps(board.get_slot(index=index))) for index in range(3)]
+        progress_bars = [slot.create_progress_publisher(total=None) for slot in slots]
+        assert board.sample() == 3
+        assert board.sample() == 0
+
+        progress_bars[1].update(5)
+        assert board.sample() == 1
+
+        messages = _drain(listener)
+        assert messages[-1]["progress_bar_id"] == slots[1].progress_bar_id
+        assert messages[-1]["format_dict"]["n"] == 5
+        assert messages[-1]["format_dict"]["total"] is None
+
+        for progress_bar in progress_bars:
+            progress_bar.close()
+
+    with pytest.raises(IndexError):
+        board.get_slot(index=3)
@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+from tqdm_publisher import ProgressStateStore, TQDMProgressHandler
+
+
+def test_state_store_of_handler():
+    handler = TQDMProgressHandler()
+    store = handler.listen_state(capacity=2)
+
+    progress_bars = [
+        handler.create_progress_subscriber(total=10, mininterval=0, publish_finished=True, publish_deltas=index == 2)
+        for index in range(3)
+    ]
+    version, messages = store.diff(since=0)
+    assert len(store) == store.capacity - 1 == 3  # The columns grew to fit the third progress bar
+    assert [message["progress_bar_id"] for message in messages] == [
+        progress_bar.progress_bar_id for progress_bar in progress_bars
+    ]
+
+    progress_bars[0].update(5)
+    progress_bars[2].update(3)
+    progress_bars[2].close()
+    version, messages = store.diff(since=version)
+    assert [(message["progress_bar_id"], message["format_dict"]["n"]) for message in messages] == [
+        (progress_bars[0].progress_bar_id, 5),
+        (progress_bars[2].progress_bar_id, 3),
+    ]
+    assert messages[1]["format_dict"]["total"] == 10  # Kept from the first message of the delta progress bar
+    assert messages[1]["format_dict"]["finished"] == True
+    assert "finished" not in messages[0]["format_dict"]
+    assert store.diff(since=version) == (version, list())
+
+    assert store.forget_finished() == [progress_bars[2].progress_bar_id]
+    assert progress_bars[2].progress_bar_id not in store
+    assert len(store.snapshot()) == 2
+
+    assert handler.unsubscribe(store)
+
+
+def test_rates_and_remaining_times():
+    store = ProgressStateStore(capacity=4)
+    store.update(progress_bar_id="average", n=10, total=30, elapsed=5.0)
+    store.update(progress_bar_id="reported", n=10, total=30, elapsed=5.0, rate=4.0)
+    store.update(progress_bar_id="unknown", n=10, total=None, elapsed=0.0)
+
+    rates, remaining = store.compute_rates()
+    assert list(rates[:3])[:2] == [2.0, 4.0] and math.isnan(rates[2])
+    assert list(remaining[:2]) == [10.0, 5.0] and math.isnan(remaining[2]) and math.isnan(remaining[3])
+
+    messages = {message["progress_bar_id"]: message for message in store.snapshot()}
+    assert messages["average"]["format_dict"] == dict(n=10, total=30, elapsed=5, rate=2, remaining=10)
+    assert messages["unknown"]["format_dict"]["total"] is None
+    assert messages["unknown"]["format_dict"]["remaining"] is None
+    assert messages["average"]["start_time"] == pytest.approx(messages["reported"]["start_time"], abs=1.0)
+
+    store.forget(["average"])
+    store.update(progress_bar_id="new", n=0, total=1, elapsed=0.0)
+    assert [message["progress_bar_id"] for message in store.snapshot()] == ["new", "reported", "unknown"]
+
+    with pytest.raises(ValueError):
+        ProgressStateStore(capacity=0)
+
+
+def test_finished_progress_bars_expire():
+    store = ProgressStateStore(capacity=2, finished_ttl=0)
+    store.update(progress_bar_id="finished", n=1, total=1, elapsed=1.0, finished=True)
+    store.update(progress_bar_id="running", n=0, total=1, elapsed=0.0)
+    assert [message["progress_bar_id"] for message in store.snapshot()] == ["running"]
+
+    store = ProgressStateStore(capacity=2, finished_ttl=None)
+    store.update(progress_bar_id="finished", n=1, total=1, elapsed=1.0, finished=True)
+    assert [message["progress_bar_id"] for message in store.snapshot()] == ["finished"]
+    assert store.forget_finished() == ["finished"]
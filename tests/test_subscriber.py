@@ -3,7 +3,7 @@ from uuid import UUID
 
 import pytest
 
-from tqdm_publisher import TQDMProgressSubscriber
+from tqdm_publisher import TQDMProgressPublisher, TQDMProgressSubscriber
 from tqdm_publisher.testing import create_tasks
 
 
@@ -76,3 +76,56 @@ async def test_manual_updates():
     assert n_callback_executions == total + 1
 
     subscriber.close()
+
+
+def test_delta_messages():
+    messages = list()
+
+    subscriber = TQDMProgressSubscriber(total=3, mininterval=0, publish_deltas=True, on_progress_update=messages.append)
+    for _ in range(3):
+        subscriber.update(1)
+    subscriber.close()
+
+    assert [message["delta"] for message in messages] == [False, True, True, True]
+    assert "unit" in messages[0]["format_dict"]
+    assert "unit" not in messages[-1]["format_dict"]
+    assert messages[-1]["format_dict"]["n"] == 3
+
+
+def test_compact_messages():
+    messages = list()
+    metadata = dict(request_id="abc")
+
+    subscriber = TQDMProgressSubscriber(
+        total=3, mininterval=0, compact_messages=True, metadata=metadata, on_progress_update=messages.append
+    )
+    for _ in range(3):
+        subscriber.update(1)
+    subscriber.close()
+
+    assert [message["format_dict"]["n"] for message in messages] == [0, 1, 2, 3]
+    assert all(message.metadata is metadata for message in messages)
+    assert messages[-1].to_dict() == dict(
+        progress_bar_id=subscriber.progress_bar_id, format_dict=messages[-1].format_dict, request_id="abc"
+    )
+
+    with pytest.raises(ValueError):
+        TQDMProgressSubscriber(total=3, compact_messages=True, publish_deltas=True, on_progress_update=print)
+
+
+def test_aggregate_with_children():
+    messages = list()
+    aggregate = TQDMProgressSubscriber(on_progress_update=messages.append, depth=1, mininterval=0)
+    for _ in range(3):
+        for _ in TQDMProgressPublisher(range(5), parent=aggregate, mininterval=0):
+            pass
+    aggregate.close()
+
+    aggregate_messages = [message for message in messages if message["progress_bar_id"] == aggregate.progress_bar_id]
+    child_messages = [message for message in messages if message["progress_bar_id"] != aggregate.progress_bar_id]
+    assert aggregate_messages[-1]["format_dict"]["n"] == 15
+    assert aggregate_messages[-1]["format_dict"]["total"] == 15
+    assert aggregate_messages[-1]["format_dict"]["finished_children"] == 3
+    assert len(set(message["progress_bar_id"] for message in child_messages)) == 3
+    assert [message["format_dict"]["n"] for message in child_messages].count(5) == 3
+    assert all(message["parent_progress_bar_id"] == aggregate.progress_bar_id for message in child_messages)